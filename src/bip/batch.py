@@ -0,0 +1,267 @@
+import glob
+import importlib
+import json
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import List
+
+from bip.common import iq_layout
+from bip.parse import parse_bin
+from bip.recorder.background.async_recorder import new_async_recorder
+from bip.recorder.parquet.pqwriter import PQWriter
+from bip.recorder.partitioned_parquet.partitioned_pqwriter import new_partitioned_parquet_writer
+
+
+SUMMARY_FILENAME = "batch_summary.json"
+
+DEFAULT_OPTIONS = {
+    "compression": None,
+    "compression_level": None,
+    "clean": False,
+    "dump_bad_packets": False,
+    "gps_nav": False,
+    "heartbeat_lists": False,
+    "mmap": False,
+    "workers": 1,
+    "iq_layout": iq_layout.SPLIT,
+    "batch_bytes": 64 * 2**20,
+    "min_batch_rows": None,
+    "max_batch_rows": None,
+    "background_writes": False,
+    "partition_data": False,
+    "partition_key_prefix": "",
+    "partition_orphan_key": "ORPHAN_DATA",
+    "partition_max_open_files": 64,
+    "log_level": "WARNING",
+}
+
+
+def _prefixed_key(prefix: str, key: str) -> str:
+    return f"{prefix}{key}"
+
+
+def new_parser(parser_name: str, input_path: Path, output_path: Path, options: dict):
+    """
+    Builds the parser of plugin `parser_name` the way the command line does,
+    from `options` (see `DEFAULT_OPTIONS`).
+    """
+    options = DEFAULT_OPTIONS | options
+    plugin = importlib.import_module(f"bip.plugins.{parser_name}")
+
+    recorder_opts = {}
+    if options["compression_level"] is not None:
+        if options["compression"] is None:
+            raise ValueError("compression level specified with no compression codec")
+        recorder_opts["compression_level"] = options["compression_level"]
+    if options["compression"] is not None:
+        recorder_opts["compression"] = options["compression"].upper()
+    for name in ("batch_bytes", "min_batch_rows", "max_batch_rows"):
+        if options[name] is not None:
+            recorder_opts[name] = options[name]
+
+    data_recorder = (
+        new_partitioned_parquet_writer(['data_key'], options["partition_max_open_files"])
+        if options["partition_data"]
+        else PQWriter
+    )
+    Recorder = PQWriter
+    if options["background_writes"]:
+        Recorder = new_async_recorder(Recorder)
+        data_recorder = new_async_recorder(data_recorder)
+
+    return plugin.Parser(
+            input_path,
+            output_path,
+            Recorder,
+            getattr(logging, options["log_level"].upper()),
+            recorder_opts=recorder_opts,
+            data_recorder=data_recorder,
+            clean = options["clean"],
+            dump_bad_packets = options["dump_bad_packets"],
+            gps_nav = options["gps_nav"],
+            heartbeat_lists = options["heartbeat_lists"],
+            mmap = options["mmap"],
+            workers = options["workers"],
+            iq_layout = options["iq_layout"],
+            orphan_context_key=options["partition_orphan_key"],
+            context_key_function=partial(_prefixed_key, options["partition_key_prefix"])
+            )
+
+
+def is_batch_input(input_: str) -> bool:
+    """
+    Whether `input_` names a batch of files (a directory, a glob or a json
+    job manifest) rather than a single file.
+    """
+    path = Path(input_)
+    if path.is_dir() or glob.has_magic(input_):
+        return True
+    return path.is_file() and path.suffix.lower() == ".json"
+
+
+def find_jobs(input_: str, output_path: Path, parser_name: str, options: dict) -> List[dict]:
+    """
+    Lists the jobs of a batch.
+
+    A directory or a glob gives a job per file, parsed with `parser_name`
+    and `options` into `output_path / <file stem>`.  A json manifest holds a
+    list of jobs (or `{"jobs": [...]}`), each an object with an `input` and
+    optionally its own `output`, `parser` and `options`; relative paths are
+    relative to the manifest.
+    """
+    path = Path(input_)
+    if path.is_dir():
+        inputs = sorted(p for p in path.iterdir() if p.is_file())
+    elif glob.has_magic(input_):
+        inputs = sorted(Path(p) for p in glob.glob(input_) if Path(p).is_file())
+    else:
+        return _read_manifest(path, output_path, parser_name, options)
+
+    return [{
+        "input": str(p),
+        "output": str(output_path / p.stem),
+        "parser": parser_name,
+        "options": dict(options),
+    } for p in inputs]
+
+
+def _read_manifest(manifest: Path, output_path: Path, parser_name: str, options: dict) -> List[dict]:
+    with open(manifest, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if isinstance(entries, dict):
+        entries = entries["jobs"]
+
+    jobs = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"input": entry}
+        input_path = manifest.parent / entry["input"]
+        output = entry.get("output")
+        jobs.append({
+            "input": str(input_path),
+            "output": str(manifest.parent / output if output else output_path / input_path.stem),
+            "parser": entry.get("parser", parser_name),
+            "options": options | entry.get("options", {}),
+        })
+    return jobs
+
+
+def run_job(job: dict) -> dict:
+    """
+    Parses the input of a single job, returning a summary of it.  Failures
+    are reported in the summary rather than raised.
+    """
+    result = {
+        "input": job["input"],
+        "output": job["output"],
+        "parser": job["parser"],
+    }
+    tic = time.time()
+    try:
+        input_path = Path(job["input"])
+        output_path = Path(job["output"])
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        parser = new_parser(job["parser"], input_path, output_path, job["options"])
+        parse_bin(parser, input_path, output_path, verbose=False)
+        if hasattr(parser, "close"):
+            parser.close()
+
+        result |= {
+            "status": "ok",
+            "bytes": int(parser.bytes_read),
+            "packets": int(parser.packets_read),
+            "bad_packets": int(getattr(parser, "bad_packets", 0)),
+        }
+    except Exception as e:
+        result |= {
+            "status": "failed",
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(),
+        }
+
+    result["seconds"] = time.time() - tic
+    return result
+
+
+def run_jobs(jobs: List[dict], max_jobs: int = 1):
+    """
+    Runs `jobs` in a pool of at most `max_jobs` processes, yielding the
+    summary of each job as it finishes.  A job that takes its worker
+    process down with it is reported as failed.
+    """
+    if max_jobs <= 1:
+        for job in jobs:
+            yield run_job(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_jobs) as executor:
+        futures = {executor.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {
+                    "input": job["input"],
+                    "output": job["output"],
+                    "parser": job["parser"],
+                    "status": "failed",
+                    "error": f"{type(e).__name__}: {e}",
+                    "seconds": 0.0,
+                }
+
+
+def summarize(results: List[dict], seconds: float) -> dict:
+    """
+    Totals the job summaries of a batch.
+    """
+    succeeded = [r for r in results if r["status"] == "ok"]
+    total_bytes = sum(r["bytes"] for r in succeeded)
+    total_packets = sum(r["packets"] for r in succeeded)
+    return {
+        "files": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "bytes": total_bytes,
+        "packets": total_packets,
+        "bad_packets": sum(r["bad_packets"] for r in succeeded),
+        "seconds": seconds,
+        "bytes_per_second": total_bytes / seconds if seconds > 0 else 0.0,
+        "packets_per_second": total_packets / seconds if seconds > 0 else 0.0,
+    }
+
+
+def run_batch(jobs: List[dict], output_path: Path, max_jobs: int = 1, *, verbose: bool = True) -> dict:
+    """
+    Runs a batch of jobs and writes a summary of it to `SUMMARY_FILENAME`
+    in `output_path`.
+    """
+    tic = time.time()
+    results = []
+    for result in run_jobs(jobs, max_jobs):
+        if verbose:
+            if result["status"] == "ok":
+                print(f"parsed: {result['input']}: {result['packets']} packets, "
+                      f"{result['bad_packets']} bad packets [{result['seconds']:.1f} s]")
+            else:
+                print(f"failed: {result['input']}: {result['error']}")
+        results.append(result)
+
+    # report the jobs in the order they were given
+    order = {job["input"]: i for i, job in enumerate(jobs)}
+    results.sort(key=lambda r: order[r["input"]])
+
+    summary = {
+        "totals": summarize(results, time.time() - tic),
+        "jobs": results,
+    }
+    os.makedirs(output_path, exist_ok=True)
+    with open(Path(output_path) / SUMMARY_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4)
+    return summary
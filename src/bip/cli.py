@@ -5,12 +5,12 @@ import sys
 import logging
 
 from pathlib import Path
-from functools import reduce
+from functools import reduce, partial
 
 from bip.__version__ import __version__ as version
 from bip.parse import parse_bin
-from bip.recorder.parquet.pqwriter import PQWriter
-from bip.recorder.partitioned_parquet.partitioned_pqwriter import new_partitioned_parquet_writer
+from bip import batch
+from bip.common import iq_layout
 import bip.plugins
 
 
@@ -33,7 +33,8 @@ def main():
         "-i", "--input",
         required=True,
         default=None,
-        help="[INPUT_FILENAME] complete path to .BIN file to parse")
+        help="[INPUT_FILENAME] complete path to .BIN file to parse, or a directory, "
+             "glob or .json job manifest of files to parse as a batch")
     argparser.add_argument(
         "-o", "--output",
         required=True,
@@ -73,6 +74,73 @@ def main():
         action= "store_true",
         required=False,
         help="clean DEADBEEF from data")
+    argparser.add_argument(
+        "--dump-bad-packets",
+        action="store_true",
+        required=False,
+        help="also write the bytes of bad and unknown packets to a raw side file "
+             "next to their tables. Only implemented for Tango.")
+    argparser.add_argument(
+        "--gps-nav",
+        action="store_true",
+        required=False,
+        help="write the navigation records of GPS context packets to a gps_nav "
+             "table, one row per record, rather than as list columns. Only implemented for Tango.")
+    argparser.add_argument(
+        "--heartbeat-lists",
+        action="store_true",
+        required=False,
+        help="write the 16 word blocks of heartbeat context packets as fixed size "
+             "list columns rather than a column per word. Only implemented for Tango.")
+    argparser.add_argument(
+        "--mmap",
+        action="store_true",
+        required=False,
+        help="memory map the input file and parse frames in place.")
+    argparser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        required=False,
+        help="number of processes to parse the input file with. Implies --mmap. Only implemented for Tango and Juliet.")
+    argparser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        required=False,
+        help="number of files of a batch to parse at once.")
+    argparser.add_argument(
+        "--background-writes",
+        action="store_true",
+        required=False,
+        help="encode and write the outputs on background threads while parsing.")
+    argparser.add_argument(
+        "--batch-bytes",
+        type=int,
+        default=batch.DEFAULT_OPTIONS["batch_bytes"],
+        required=False,
+        help="target size in bytes (uncompressed) of the row groups of the outputs; "
+             "0 writes a row group per fixed number of records instead.")
+    argparser.add_argument(
+        "--min-batch-rows",
+        type=int,
+        default=None,
+        required=False,
+        help="least number of records in a row group when batching by size.")
+    argparser.add_argument(
+        "--max-batch-rows",
+        type=int,
+        default=None,
+        required=False,
+        help="most number of records in a row group when batching by size.")
+    argparser.add_argument(
+        "--iq-layout",
+        default=iq_layout.SPLIT,
+        required=False,
+        choices=iq_layout.LAYOUTS,
+        help="how to store the IQ samples of signal data: separate I and Q list columns (split), "
+             "a single list alternating I and Q (interleaved), a list of (I, Q) pairs (fixed_size_list) "
+             "or the interleaved samples as raw bytes (binary).")
     argparser.add_argument(
         "--partition-data",
         action="store_true",
@@ -90,6 +158,12 @@ def main():
         default="ORPHAN_DATA",
         required = False
     )
+    argparser.add_argument(
+        "--partition-max-open-files",
+        type=int,
+        default=64,
+        required=False,
+        help="number of partitions of the data output to keep open at once.")
     argparser.add_argument(
         "--log-level",
         required=False,
@@ -103,13 +177,14 @@ def main():
     output_directory = args.output
 
     input_path = Path(input_file)
-    if not input_path.exists():
+    is_batch = batch.is_batch_input(input_file)
+    if not is_batch and not input_path.exists():
         print(f"{input_file} not found")
         sys.exit(1)
 
     output_path = Path(output_directory)
     if not output_path.exists():
-        if args.force:
+        if args.force or is_batch:
             output_path.mkdir(exist_ok=True, parents=True)
             assert output_path.exists()
         else:
@@ -120,43 +195,54 @@ def main():
         print(f"{output_directory} is not a directory")
         sys.exit(1)
 
-    recorder_opts = {}
-    if args.compression_level is not None:
-        if args.compression is None:
-            print("compression level specified with no compression codec")
-            sys.exit(1)
-        recorder_opts["compression_level"] = args.compression_level
+    if args.compression_level is not None and args.compression is None:
+        print("compression level specified with no compression codec")
+        sys.exit(1)
 
-    if args.compression is not None:
-        recorder_opts["compression"] = args.compression.upper()
+    options = {
+        "compression": args.compression,
+        "compression_level": args.compression_level,
+        "clean": args.clean,
+        "dump_bad_packets": args.dump_bad_packets,
+        "gps_nav": args.gps_nav,
+        "heartbeat_lists": args.heartbeat_lists,
+        "mmap": args.mmap,
+        "workers": args.workers,
+        "iq_layout": args.iq_layout,
+        "batch_bytes": args.batch_bytes or None,
+        "min_batch_rows": args.min_batch_rows,
+        "max_batch_rows": args.max_batch_rows,
+        "background_writes": args.background_writes,
+        "partition_data": args.partition_data,
+        "partition_key_prefix": args.partition_key_prefix,
+        "partition_orphan_key": args.partition_orphan_key,
+        "partition_max_open_files": args.partition_max_open_files,
+        "log_level": args.log_level,
+    }
+
+    if is_batch:
+        jobs = batch.find_jobs(input_file, output_path, args.parser, options)
+        if len(jobs) == 0:
+            print(f"no files found for {input_file}")
+            sys.exit(1)
+        summary = batch.run_batch(jobs, output_path, args.jobs)
+        totals = summary["totals"]
+        print(f"parsed: {totals['succeeded']} of {totals['files']} files, "
+              f"{totals['packets']} packets, {totals['bad_packets']} bad packets "
+              f"[{totals['bytes_per_second']/1e6:.1f} MB/second]")
+        if totals["failed"] > 0:
+            sys.exit(1)
+        return
 
-    plugin = plugins[f"bip.plugins.{args.parser}"]
-    data_recorder = (
-        new_partitioned_parquet_writer(['data_key']) 
-        if args.partition_data 
-        else PQWriter
-    )
-    
-    log_level = getattr(logging, args.log_level.upper())
-    
     try:
-        parser = plugin.Parser(
-                input_path,
-                output_path,
-                PQWriter,
-                log_level,
-                recorder_opts=recorder_opts,
-                data_recorder=data_recorder,
-                clean = args.clean,
-                orphan_context_key=args.partition_orphan_key,
-                context_key_function=lambda k: f"{args.partition_key_prefix}{k}"
-                )
+        parser = batch.new_parser(args.parser, input_path, output_path, options)
     except Exception as e:
         raise RuntimeError(f"invalid plugin {args.parser}: {str(e)}")
 
     parse_bin(parser, input_path, output_path)
+    if hasattr(parser, "close"):
+        parser.close()
 
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,87 @@
+import numpy as np
+import pyarrow as pa
+
+
+def offsets(lengths) -> np.ndarray:
+    """
+    The list offsets (one more than there are lists) of lists of `lengths`.
+    """
+    result = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, dtype=np.int64, out=result[1:])
+    return int32_offsets(result)
+
+
+def int32_offsets(offsets: np.ndarray) -> np.ndarray:
+    """
+    `offsets` as the int32 offsets arrow lists and binaries use.  Raises a
+    ValueError rather than letting a batch too large for them wrap around.
+    """
+    if len(offsets) and offsets[-1] > np.iinfo(np.int32).max:
+        raise ValueError(f"list offset {offsets[-1]} does not fit in int32, "
+                         "use a smaller batch size")
+    return offsets.astype(np.int32, copy=False)
+
+
+def list_array(values: np.ndarray, offsets: np.ndarray, type_: pa.DataType = None) -> pa.ListArray:
+    """
+    Builds a list array over the contiguous `values`, the i-th list running
+    from `offsets[i]` to `offsets[i+1]`.  Neither buffer is copied when
+    `values` already has the value type.
+    """
+    if type_ is not None:
+        values = pa.array(values, type=type_.value_type)
+    return pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), values, type=type_)
+
+
+def is_fixed_width(type_: pa.DataType) -> bool:
+    """
+    Whether values of `type_` are numbers (or booleans) that fit a numpy array.
+    """
+    return (pa.types.is_integer(type_) or pa.types.is_floating(type_)
+            or pa.types.is_boolean(type_))
+
+
+def is_numeric_list(type_: pa.DataType) -> bool:
+    """
+    Whether `type_` is a list of numbers, or of fixed size lists of numbers.
+    """
+    if not pa.types.is_list(type_):
+        return False
+    value_type = type_.value_type
+    if pa.types.is_fixed_size_list(value_type):
+        value_type = value_type.value_type
+    return is_fixed_width(value_type)
+
+
+def concatenate_lists(lists: list, type_: pa.DataType) -> pa.ListArray:
+    """
+    Builds a list array from a sequence of arrays (e.g. strided views) with
+    a single gather into one contiguous buffer, rather than converting the
+    arrays one at a time.  For lists of fixed size lists the arrays are
+    2 dimensional, with a row per fixed size list.
+    """
+    value_type = type_.value_type
+    lengths = np.fromiter((len(l) for l in lists), dtype=np.int64, count=len(lists))
+    if pa.types.is_fixed_size_list(value_type):
+        flat_type = value_type.value_type
+    else:
+        flat_type = value_type
+
+    if len(lists) == 0:
+        values = np.zeros(0, dtype=flat_type.to_pandas_dtype())
+    else:
+        values = np.concatenate(lists).reshape(-1)
+    values = pa.array(values, type=flat_type)
+
+    if pa.types.is_fixed_size_list(value_type):
+        values = pa.FixedSizeListArray.from_arrays(values, value_type.list_size)
+    return list_array(values, offsets(lengths))
+
+
+def to_array(values, type_: pa.DataType) -> pa.Array:
+    """
+    Converts a column of a batch of records to an arrow array of `type_`.
+    """
+    if isinstance(values, pa.Array):
+        return values if values.type == type_ else values.cast(type_)
+    return pa.array(values, type=type_)
@@ -1,60 +1,74 @@
 import numpy as np
-import numba
 
 """ common value extractions that multiple parsers can implement.
     do consider the payload endianness, and if/when it may be
-    converted when using these, little endian is currently assumed """
+    converted when using these, little endian is currently assumed
+
+    each value has an array version, e.g. `frequencies`, that takes whole
+    columns of words from a batch of packets, and a scalar version, e.g.
+    `frequency`, for a single packet """
+
+def join_words(word1, word2):
+    """ the 64 bit values of (high, low) pairs of words """
+    return (np.uint64(word1) << np.uint64(32)) | np.uint64(word2)
 
 #Current Juliet Implementations
-@numba.jit(nopython=True)
+def bandwidths(word1, word2):
+    return join_words(word1, word2) * (10**-6) * (2**-20)
+
+def dwells(word1, word2):
+    # data comes in femtoseconds -9 converts to microseconds
+    return join_words(word1, word2) * (10**-9)
+
+def frequencies(word1, word2):
+    return join_words(word1, word2) * (10**-9) * (2**-20)
+
+def gains(word1): # needs work, but not implemented in juliet yet
+    return word1
+
+def offsets(word1, word2):
+    return join_words(word1, word2) * (10**-6) * (2**-20)
+
+def pointing_vectors(word):
+    word = np.uint32(word)
+
+    el = (word >> 16).astype(np.int64)
+    #sign bit present, take 2's complement
+    el = (el - 0x10000 * (el >= 0x8000)) * (2**-7)
+
+    az = (word & 0xFFFF) * (2**-7)
+    az = az - 360 * (az >= 280)
+
+    return az, el
+
+def sample_rates(word1, word2):
+    return (join_words(word1, word2) * (10**-6) * (2**-20)).astype(np.uint32)
+
+def times(tsi, tsf0, tsf1):
+    return np.uint64(tsi) + join_words(tsf0, tsf1) * (10**-12)
+
+
 def bandwidth(word1, word2):
-    raw_data = (np.uint64(word1) << 32) | np.uint64(word2)
-    return np.float64(raw_data * (10**-6) * (2**-20))
+    return np.float64(bandwidths(word1, word2))
 
-@numba.jit(nopython=True)
 def dwell(word1, word2):
-    raw_data = (np.uint64(word1) << 32) | np.uint64(word2)
-    # data comes in femtoseconds -9 converts to microseconds
-    return np.float64(raw_data * (10**-9))
+    return np.float64(dwells(word1, word2))
 
-@numba.jit(nopython=True)
 def frequency(word1, word2):
-    raw_data = (np.uint64(word1) << 32) | np.uint64(word2)
-    return np.float64(raw_data * (10**-9) * (2**-20))
+    return np.float64(frequencies(word1, word2))
 
-@numba.jit(nopython=True)
-def gain(word1): # needs work, but not implemented in juliet yet
+def gain(word1):
     return word1
 
-@numba.jit(nopython=True)
 def offset(word1, word2):
-    raw_data = (np.uint64(word1) << 32) | np.uint64(word2)
-    return np.float64(raw_data * (10**-6) * (2**-20))
+    return np.float64(offsets(word1, word2))
 
-@numba.jit(nopython=True)
 def pointing_vector(word):
-    el = (word >> 16)
-    if el >= 0x8000: #sign bit present, take 2's complement
-        msb = el & 0x8000
-        el_out = (0-msb) + (el-msb)
-        el_out = el_out * (2**-7)
-    else:
-        el_out = el * (2**-7)
+    az, el = pointing_vectors(word)
+    return np.float64(az), np.float64(el)
 
-    az = (word & 0xFFFF) * (2**-7)
-    if az >= 280:
-        az = az - 360
-
-    return az, el_out
-
-@numba.jit(nopython=True)
 def sample_rate(word1, word2):
-    raw_data = (np.uint64(word1) << 32) | np.uint64(word2)
-    return np.uint32(raw_data * (10**-6) * (2**-20))
+    return np.uint32(sample_rates(word1, word2))
 
-@numba.jit(nopython=True)
 def time(tsi, tsf0, tsf1):
-    return np.float64(np.uint64(tsi) +\
-                    ((np.uint64(tsf0) << 32) + np.uint64(tsf1)) * (10**-12))
-
-
+    return np.float64(times(tsi, tsf0, tsf1))
@@ -0,0 +1,107 @@
+import numpy as np
+import pyarrow as pa
+
+from bip.common import arrow_manipulation
+
+""" how the IQ samples of signal data tables are laid out in the output.
+
+    split            - `samples_i` and `samples_q` list<int16> columns
+    interleaved      - a `samples` list<int16> column, I and Q alternating
+    fixed_size_list  - a `samples` list<fixed_size_list<int16, 2>> column of
+                       (I, Q) pairs
+    binary           - a `samples` binary column of the interleaved samples
+                       as little endian int16 """
+
+SPLIT = "split"
+INTERLEAVED = "interleaved"
+FIXED_SIZE_LIST = "fixed_size_list"
+BINARY = "binary"
+
+LAYOUTS = (SPLIT, INTERLEAVED, FIXED_SIZE_LIST, BINARY)
+
+_types = {
+    INTERLEAVED: pa.list_(pa.int16(), -1),
+    FIXED_SIZE_LIST: pa.list_(pa.list_(pa.int16(), 2), -1),
+    BINARY: pa.binary(),
+}
+
+
+def check(layout: str) -> str:
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown IQ layout {layout}, expected one of {', '.join(LAYOUTS)}")
+    return layout
+
+
+def fields(layout: str, suffix: str = "") -> list:
+    """
+    The schema entries holding the samples, e.g. `samples_i_left` and
+    `samples_q_left` (or `samples_left`) for `suffix` "_left".
+    """
+    if check(layout) == SPLIT:
+        return [
+            (f"samples_i{suffix}", pa.list_(pa.int16(), -1)),
+            (f"samples_q{suffix}", pa.list_(pa.int16(), -1)),
+        ]
+    return [(f"samples{suffix}", _types[layout])]
+
+
+def schema(entries: list, layout: str) -> list:
+    """
+    Replaces the `samples_i*`/`samples_q*` pairs of a list of split layout
+    schema entries with the entries of `layout`.
+    """
+    result = []
+    for entry in entries:
+        name = entry[0]
+        if name.startswith("samples_i"):
+            result += fields(layout, name[len("samples_i"):])
+        elif not name.startswith("samples_q"):
+            result.append(entry)
+    return result
+
+
+def record(data: np.ndarray, layout: str, suffix: str = "") -> dict:
+    """
+    The sample fields of one record, given its samples as an (n, 2) array
+    of I, Q pairs.
+    """
+    if layout == SPLIT:
+        return {
+            f"samples_i{suffix}": data[:, 0],
+            f"samples_q{suffix}": data[:, 1],
+        }
+    if layout == INTERLEAVED:
+        value = data.reshape(-1)
+    elif layout == FIXED_SIZE_LIST:
+        value = data
+    else:
+        value = data.tobytes()
+    return {f"samples{suffix}": value}
+
+
+def columns(samples: np.ndarray, offsets: np.ndarray, layout: str, suffix: str = "") -> dict:
+    """
+    The sample columns of a batch of records, given the interleaved samples
+    of every record back to back and the offsets (in I, Q pairs) of each
+    record's samples.  Only the split layout has to de-interleave them.
+    """
+    if layout == SPLIT:
+        iq = samples.reshape((-1, 2)).T.copy()
+        return {
+            f"samples_i{suffix}": arrow_manipulation.list_array(iq[0], offsets),
+            f"samples_q{suffix}": arrow_manipulation.list_array(iq[1], offsets),
+        }
+    if layout == INTERLEAVED:
+        value = arrow_manipulation.list_array(samples, _scaled(offsets, 2))
+    elif layout == FIXED_SIZE_LIST:
+        value = arrow_manipulation.list_array(
+                pa.FixedSizeListArray.from_arrays(samples, 2), offsets)
+    else:
+        value = pa.Array.from_buffers(pa.binary(), len(offsets) - 1,
+                [None, pa.py_buffer(_scaled(offsets, 4)), pa.py_buffer(samples)])
+    return {f"samples{suffix}": value}
+
+
+def _scaled(offsets: np.ndarray, factor: int) -> np.ndarray:
+    """ offsets in I, Q pairs as offsets in int16s (2) or bytes (4) """
+    return arrow_manipulation.int32_offsets(factor*offsets.astype(np.int64))
@@ -0,0 +1,93 @@
+import io
+import mmap
+import os
+
+
+class MappedStream(io.BufferedIOBase):
+    """
+    Read only, seekable stream over an in-memory buffer, usually a memory
+    mapped file.
+
+    `read` returns `memoryview` slices of the buffer rather than copies, so
+    payloads handed to `np.frombuffer` end up as views over the mapping.  The
+    mapping is released when the stream and every view taken from it have been
+    garbage collected.
+    """
+
+    def __init__(self, buffer, position: int = 0):
+        self._buffer = buffer
+        self._view = memoryview(buffer).cast("B")
+        self._position = position
+
+    @classmethod
+    def from_stream(cls, stream: io.IOBase):
+        """
+        Maps the file behind `stream`, keeping the current stream position.
+
+        Streams that are not backed by a file (e.g. `io.BytesIO`) are read
+        into memory instead.
+        """
+        position = stream.tell()
+        try:
+            fileno = stream.fileno()
+        except (AttributeError, OSError):
+            fileno = None
+
+        if fileno is not None and os.fstat(fileno).st_size > 0:
+            return cls(mmap.mmap(fileno, 0, access=mmap.ACCESS_READ), position)
+
+        stream.seek(0, os.SEEK_SET)
+        buffer = stream.read()
+        stream.seek(position, os.SEEK_SET)
+        return cls(buffer, position)
+
+    @property
+    def buffer(self) -> memoryview:
+        """
+        The whole underlying buffer, independent of the stream position.
+        """
+        return self._view
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> memoryview:
+        start = self._position
+        if size is None or size < 0:
+            end = len(self._view)
+        else:
+            end = min(start + size, len(self._view))
+        self._position = max(start, end)
+        return self._view[start:self._position]
+
+    read1 = read
+
+    def readinto(self, b) -> int:
+        target = memoryview(b).cast("B")
+        data = self.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+
+        if position < 0:
+            raise ValueError(f"negative seek position {position}")
+        self._position = position
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
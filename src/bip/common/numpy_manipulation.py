@@ -42,3 +42,119 @@ def find_subarray_indexes_numba(array, subarray):
     return None
 
 find_subarray_indexes = find_subarray_indexes_numba
+
+
+def _failure_table(pattern: np.ndarray) -> np.ndarray:
+    """
+    Knuth-Morris-Pratt failure table: the length of the longest proper
+    prefix of `pattern[:i+1]` that is also a suffix of it.
+    """
+    failure = np.zeros(len(pattern), dtype=np.int64)
+    k = 0
+    for i in range(1, len(pattern)):
+        while k > 0 and pattern[i] != pattern[k]:
+            k = failure[k - 1]
+        if pattern[i] == pattern[k]:
+            k += 1
+        failure[i] = k
+    return failure
+
+
+@numba.jit(nopython=True)
+def _find_markers(symbols, patterns, starts, lengths, failure):
+    """
+    Runs one Knuth-Morris-Pratt matcher per pattern over `symbols` in a
+    single pass, returning the symbol index of every match and the number
+    of matches per pattern.
+    """
+    n_patterns = len(starts)
+    counts = np.zeros(n_patterns, dtype=np.int64)
+    state = np.zeros(n_patterns, dtype=np.int64)
+    matches = np.zeros((n_patterns, 16), dtype=np.int64)
+
+    for i in range(len(symbols)):
+        symbol = symbols[i]
+        for p in range(n_patterns):
+            base = starts[p]
+            q = state[p]
+            if q == 0 and patterns[base] != symbol:
+                continue
+            while q > 0 and patterns[base + q] != symbol:
+                q = failure[base + q - 1]
+            if patterns[base + q] == symbol:
+                q += 1
+            if q == lengths[p]:
+                if counts[p] == matches.shape[1]:
+                    grown = np.zeros((n_patterns, 2 * matches.shape[1]), dtype=np.int64)
+                    grown[:, :matches.shape[1]] = matches
+                    matches = grown
+                matches[p, counts[p]] = i - lengths[p] + 1
+                counts[p] += 1
+                q = failure[base + q - 1]
+            state[p] = q
+
+    return matches, counts
+
+
+_symbol_types = { 1: np.uint8, 2: np.uint16, 4: np.uint32, 8: np.uint64 }
+
+def find_markers(buffer, patterns, alignment: int = 1) -> list:
+    """
+    Finds every occurrence of each of `patterns` (bytes-like) in `buffer`
+    (bytes, a memoryview, an mmap or a contiguous numpy array) in a single
+    linear pass, without copying the buffer.
+
+    With an `alignment` of 2, 4 or 8 only matches starting on a multiple of
+    `alignment` bytes are reported and the patterns are compared a word at
+    a time; their lengths must be multiples of `alignment`.  Overlapping
+    matches are all reported.
+
+    Returns one sorted `int64` array of byte offsets per pattern.
+    """
+    if alignment not in _symbol_types:
+        raise ValueError(f"unsupported alignment: {alignment}")
+    symbol_type = _symbol_types[alignment]
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    symbols = data[:len(data) - len(data) % alignment].view(symbol_type)
+
+    words = []
+    for pattern in patterns:
+        pattern = np.frombuffer(bytes(pattern), dtype=np.uint8)
+        if len(pattern) == 0 or len(pattern) % alignment != 0:
+            raise ValueError(f"pattern length {len(pattern)} is not a multiple of {alignment}")
+        words.append(pattern.view(symbol_type))
+
+    if len(words) == 0:
+        return []
+
+    lengths = np.array([len(w) for w in words], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    concatenated = np.concatenate(words)
+    failure = np.concatenate([_failure_table(w) for w in words])
+
+    matches, counts = _find_markers(symbols, concatenated, starts, lengths, failure)
+
+    return [alignment * matches[p, :counts[p]] for p in range(len(words))]
+
+
+def deinterleave(frames: list, channels: int):
+    """
+    Splits the rows of each of `frames`, row i of a frame belonging to
+    channel `i % channels`, into one contiguous array per channel holding
+    the rows of every frame back to back.
+
+    Returns those arrays and, for each channel, the number of rows each
+    frame contributed to it.  When every frame holds a whole number of rows
+    per channel this is a single reshape and transpose of all the frames.
+    """
+    lengths = np.array([len(frame) for frame in frames], dtype=np.int64)
+    counts = (lengths + (channels - 1 - np.arange(channels))[:, None]) // channels
+    rows = np.concatenate(frames)
+
+    if np.all(lengths % channels == 0):
+        split = rows.reshape((-1, channels) + rows.shape[1:]).swapaxes(0, 1)
+        return list(np.ascontiguousarray(split)), counts
+
+    return [np.concatenate([frame[c::channels] for frame in frames])
+            for c in range(channels)], counts
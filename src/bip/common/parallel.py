@@ -0,0 +1,107 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Tuple
+
+import numpy as np
+
+from bip.recorder.parquet.merge import concatenate_parquet
+
+
+PARTS_DIRECTORY = "_parts"
+
+
+def split_rows(sizes: np.ndarray, n_chunks: int) -> List[Tuple[int, int]]:
+    """
+    Splits the rows of a table into at most `n_chunks` contiguous
+    `(start, end)` row ranges holding roughly the same number of bytes,
+    given the size of every row.
+    """
+    if len(sizes) == 0:
+        return []
+
+    n_chunks = max(1, min(n_chunks, len(sizes)))
+    total = np.cumsum(sizes, dtype=np.float64)
+    targets = total[-1] * np.arange(1, n_chunks) / n_chunks
+    bounds = np.searchsorted(total, targets, side="left") + 1
+    bounds = np.unique(np.concatenate([[0], bounds, [len(sizes)]]))
+    return [(int(s), int(e)) for s, e in zip(bounds[:-1], bounds[1:]) if e > s]
+
+
+def part_directory(output_path: Path, index: int) -> Path:
+    """
+    The directory a worker writes its part of the outputs to.
+    """
+    return output_path / PARTS_DIRECTORY / f"part-{index:04d}"
+
+
+def run_parts(function: Callable, arguments: Iterable[tuple], workers: int):
+    """
+    Calls `function(*args)` for each of `arguments` in a pool of `workers`
+    processes, yielding the results in order as they become available.
+
+    `function` and the arguments have to be picklable.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(function, *args) for args in arguments]
+        for future in futures:
+            yield future.result()
+
+
+def merge_parts(part_directories: List[Path], output_path: Path, options: dict = None):
+    """
+    Merges the outputs the workers wrote to `part_directories` into
+    `output_path`, then removes the parts.
+
+    Directories are merged recursively.  A file found in a single part is
+    moved into place (e.g. the files of a partitioned dataset); parquet
+    and raw (`.bin`) files found in several parts are concatenated in part
+    order, and any other files are moved with the part name prefixed.
+    """
+    part_directories = [Path(p) for p in part_directories]
+    _merge_directories(part_directories, [p.name for p in part_directories],
+            Path(output_path), options or {})
+    for part in part_directories:
+        shutil.rmtree(part, ignore_errors=True)
+    parts_root = Path(output_path) / PARTS_DIRECTORY
+    if parts_root.exists() and not any(parts_root.iterdir()):
+        parts_root.rmdir()
+
+
+def _concatenate_files(sources: List[Path], destination: Path):
+    with open(destination, "ab") as out:
+        for source in sources:
+            with open(source, "rb") as f:
+                shutil.copyfileobj(f, out)
+            os.remove(source)
+
+
+def _merge_directories(part_directories: List[Path], part_names: List[str],
+        output_path: Path, options: dict):
+    names = []
+    for part in part_directories:
+        if part.is_dir():
+            names += [n for n in sorted(os.listdir(part)) if n not in names]
+
+    for name in names:
+        found = [(part / name, part_name)
+                 for part, part_name in zip(part_directories, part_names)
+                 if (part / name).exists()]
+        sources = [source for source, _ in found]
+        destination = output_path / name
+
+        if all(s.is_dir() for s in sources):
+            destination.mkdir(parents=True, exist_ok=True)
+            _merge_directories(sources, [part_name for _, part_name in found],
+                    destination, options)
+        elif len(sources) == 1 and not destination.exists():
+            shutil.move(sources[0], destination)
+        elif destination.suffix == ".parquet":
+            concatenate_parquet(sources, destination, options)
+        elif destination.suffix == ".bin":
+            _concatenate_files(sources, destination)
+        else:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            for source, part_name in found:
+                shutil.move(source, destination.parent / f"{part_name}-{source.name}")
@@ -1,6 +1,147 @@
 import numpy as np
 import uuid
 
+# the bit fields of the MBLB headers, as (word, mask, shift), for decoding
+# the headers of many messages or packets at once.  They match the
+# properties of `MblbSOM`, `MblbPacket` and `MblbEOM`.
+
+SOM_FIELDS = {
+    "lane1_id": (0, 0xFF00000000000000, 56),
+    "lane2_id": (1, 0xFF00000000000000, 56),
+    "lane3_id": (2, 0xFF00000000000000, 56),
+    "ci_number": (0, 0x00000000FFFFFFFF, 0),
+    "message_number": (3, 0x000000000000FF00, 8),
+    "si_number": (3, 0x00000000000000FF, 0),
+    "path_id": (9, 0x00FF000000000000, 48),
+    "path_width": (9, 0x0000FF0000000000, 40),
+    "subpath_id": (9, 0x000000F000000000, 36),
+    "subpath_width": (9, 0x0000000F00000000, 32),
+    "be": (9, 0x0000000080000000, 31),
+    "beam_select": (9, 0x0000000060000000, 29),
+    "afs_mode": (9, 0x000000001E000000, 25),
+    "sched_num": (12, 0x00000000FFFF0000, 16),
+    "si_in_sched_num": (12, 0x000000000000FFFF, 0),
+    "high_gain": (12, 0xFFFFFFFF00000000, 32),
+}
+SOM_WORDS = 16
+
+PACKET_FIELDS = {
+    "packet_number": (0, 0xFFFF000000000000, 48),
+    "mode_tag": (0, 0x0000FFFF00000000, 32),
+    "ci_number": (0, 0x00000000FFFFFFFF, 0),
+    "packet_size": (3, 0xFFFFFFFF00000000, 32),
+    "data_fmt": (3, 0x00000000FF000000, 24),
+    "event_id": (3, 0x0000000000FF0000, 16),
+    "message_number": (3, 0x000000000000FF00, 8),
+    "sub_cci_number": (3, 0x00000000000000FF, 0),
+    "bti_number": (6, 0xFFFF000000000000, 48),
+    "rf": (6, 0x0000FFC000000000, 38),
+    "cagc": (6, 0x0000003F00000000, 28),
+    "rx_beam_id": (6, 0x00000000FF000000, 24),
+    "rx_config": (6, 0x0000000000FC0000, 18),
+    "channelizer_chan": (6, 0x000000000003F000, 12),
+    "dbf": (6, 0x0000000000000F00, 8),
+    "routing_index": (6, 0x00000000000000FF, 0),
+    "lane1_id": (9, 0xFF00000000000000, 56),
+    "lane2_id": (10, 0xFF00000000000000, 56),
+    "lane3_id": (11, 0xFF00000000000000, 56),
+    "path_id": (9, 0x00FF000000000000, 48),
+    "path_width": (9, 0x0000FF0000000000, 40),
+    "subpath_id": (9, 0x000000F000000000, 36),
+    "subpath_width": (9, 0x0000000F00000000, 32),
+    "dv": (9, 0x0000000080000000, 31),
+    "rs": (9, 0x0000000060000000, 30),
+    "valid_channels_beams": (9, 0x000000000000FF00, 8),
+    "channels_beams_per_subpath": (9, 0x00000000000000FF, 0),
+}
+PACKET_WORDS = 12
+
+EOM_FIELDS = {
+    "packet_count": (0, 0xFFFF000000000000, 48),
+    "ci_number": (0, 0x00000000FFFFFFFF, 0),
+    "error_status": (1, 0xFFFFFFFFFFFF0000, 16),
+    "message_number": (1, 0x000000000000FF00, 8),
+    "sub_cci_number": (1, 0x00000000000000FF, 0),
+    "crc": (2, 0xFFFFFFFFFFFFFFFF, 0),
+    "lane1_id": (9, 0xFF00000000000000, 56),
+    "lane2_id": (10, 0xFF00000000000000, 56),
+    "lane3_id": (11, 0xFF00000000000000, 56),
+    "path_id": (9, 0x00FF000000000000, 48),
+    "path_width": (9, 0x0000FF0000000000, 40),
+    "subpath_id": (9, 0x000000F000000000, 36),
+    "subpath_width": (9, 0x0000000F00000000, 32),
+}
+EOM_WORDS = 12
+
+
+def stack_words(payloads: list, word_count: int) -> np.ndarray:
+    """
+    The first `word_count` 64 bit words of each of `payloads` as the rows
+    of a single matrix.
+    """
+    size = 8 * word_count
+    joined = b"".join(bytes(payload[:size]) for payload in payloads)
+    return np.frombuffer(joined, dtype=np.uint64).reshape((-1, word_count))
+
+
+def decode_fields(words: np.ndarray, fields: dict) -> dict:
+    """
+    Extracts every bit field of `fields` from the matrix `words`, a row per
+    header, into a column per field.
+    """
+    return {
+        name: (words[:, word] & np.uint64(mask)) >> np.uint64(shift)
+        for name, (word, mask, shift) in fields.items()
+    }
+
+
+def decode_som(words: np.ndarray, timestamp=0) -> dict:
+    """
+    The fields of a matrix of start of message headers (see `MblbSOM`),
+    with `timestamp` the timestamp (per message, or of all of them) the
+    event start times are relative to.
+    """
+    columns = decode_fields(words, SOM_FIELDS)
+
+    start_time = words[:, 13]
+    back_half = (start_time & np.uint64(0x00000000FFFFFFFF)) << np.uint64(32)
+    front_half = (start_time & np.uint64(0xFFFFFFFF00000000)) >> np.uint64(32)
+    columns["event_start_time_us"] = (back_half + front_half) / MblbSOM.clocks_per_us
+    columns["time_since_epoch_us"] = columns["event_start_time_us"] + timestamp
+    columns["bti_length"] = ((words[:, 14] & np.uint64(0xFFFFFFFF00000000)) >> np.uint64(32)) / MblbSOM.clocks_per_us
+    columns["dwell"] = (words[:, 14] & np.uint64(0x00000000FFFFFFFF)) / MblbSOM.clocks_per_us
+
+    fs              = 2560*16 #MHz
+    fine_tune_lsb_mhz = 0.625   #MHz
+    ct_step          = fs/128  #320 MHz
+
+    ct = (words[:, 15] & np.uint64(0x00000000FFFFFFFF)).astype(np.int64)
+    ft = ((words[:, 15] & np.uint64(0xFFFFFFFF00000000)) >> np.uint64(32)).astype(np.int64)
+
+    fine_tune_mhz = ft * fine_tune_lsb_mhz
+
+    ctf            = (2**7 - ct)
+    cal_ct         = (ctf + 1)/3
+    coarse_tune_mhz = cal_ct*ct_step*3 - ct_step
+
+    columns["freq_ghz"] = (coarse_tune_mhz + fine_tune_mhz) / 1000
+    return columns
+
+
+def decode_packets(words: np.ndarray) -> dict:
+    """
+    The fields of a matrix of start of packet headers (see `MblbPacket`).
+    """
+    return decode_fields(words, PACKET_FIELDS)
+
+
+def decode_eom(words: np.ndarray) -> dict:
+    """
+    The fields of a matrix of end of message trailers (see `MblbEOM`).
+    """
+    return decode_fields(words, EOM_FIELDS)
+
+
 class MblbSOM:
 
     clocks_per_us = 160 #hardcoded, source unknown
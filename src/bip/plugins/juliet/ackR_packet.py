@@ -4,6 +4,7 @@ import pyarrow as pa
 import numpy as np
 
 from bip.vita import ExtensionCommandPacket as VitaExtensionCommandPacket
+from bip.vita.vrt_packet import decode_vrt_packets
 from bip.common import bit_manipulation
 from typing import Optional
 
@@ -50,6 +51,30 @@ def _schema_elt(e: tuple) -> dict:
 
 schema = [ _schema_elt(e) for e in _schema ]
 
+ACKR_WORDS = 15
+
+# the words after the timestamps, as (column, word)
+_ackr_words = [
+    ("cam", 7),
+    ("message_id", 8),
+    ("cif0", 9),
+    ("cif2", 10),
+    ("cif4", 11),
+    ("cited_SID", 12),
+    ("reject_reason", 13),
+    ("data_addr_index", 14),
+]
+
+
+def decode_ackrs(words: np.ndarray) -> dict:
+    """
+    The fields of a matrix of AckR packets, a row of `ACKR_WORDS` words
+    per packet.
+    """
+    return decode_vrt_packets(words) | {
+        name: words[:, word] for name, word in _ackr_words
+    }
+
 
 #TODO: cancellation and acknowledgement flags aren't handled or stored
 class _ExtensionCommandPacket(VitaExtensionCommandPacket):
@@ -87,53 +112,62 @@ class AckR_Packet:
                 options=recorder_opts,
                 batch_size=batch_size)
 
+        self.batch_size = batch_size
         self.packet_id = 0
-
-    def __add_record(self,
-            packet: _ExtensionCommandPacket,
-            *,
-            frame_index: int,
-            packet_index: int
-            ):
-        assert isinstance(packet, _ExtensionCommandPacket)
-        header = packet.packet_header
-
-
-        self.recorder.add_record({
-            "packet_id": np.uint32(self.packet_id),
-            "packet_size": np.uint16(header.packet_size),
-            "packet_count": np.uint16(header.packet_count),
-            "tsfd": np.uint8(header.tsf),
-            "tsid": np.uint8(header.tsi),
-            "indicators": np.uint8(header.indicators),
-            "packet_type": np.uint8(header.packet_type),
-            "stream_id": np.uint32(packet.stream_id),
-            "classId0": np.uint32(packet.classId0),
-            "classId1": np.uint32(packet.classId1),
-            "tsi": np.uint32(packet.integer_timestamp),
-            "tsf0": np.uint32(packet.fractional_timestamp[0]),
-            "tsf1": np.uint32(packet.fractional_timestamp[1]),
-            "time": np.float64(packet.time),
-            "cam": np.uint32(packet.cam),
-            "message_id": np.uint32(packet.message_id),
-            "cif0": np.uint32(packet.cif0),
-            "cif2": np.uint32(packet.cif2),
-            "cif4": np.uint32(packet.cif4),
-            "cited_SID": np.uint32(packet.cited_sid),
-            "reject_reason": np.uint32(packet.reject_reason),
-            "data_addr_index": np.uint32(packet.data_addr_index),
-            "frame_index": np.uint32(frame_index),
-            "packet_index": np.uint32(packet_index),
-        })
+        self._pending = []
 
     def process(self, payload: bytes,
             *,
             frame_index: int,
             packet_index: int):
-        self.__add_record(_ExtensionCommandPacket(payload),
-                frame_index=frame_index,
-                packet_index=packet_index)
+        if len(payload) < 4*ACKR_WORDS:
+            raise ValueError(f"AckR packet of {len(payload)} bytes, "
+                             f"expected at least {4*ACKR_WORDS}")
+
+        # the packet is decoded along with the rest of its batch
+        self._pending.append((payload[:4*ACKR_WORDS], frame_index, packet_index, self.packet_id))
         self.packet_id += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Decodes the pending packets in one go and hands them to the recorder
+        as a batch.
+        """
+        if len(self._pending) == 0:
+            return
+
+        payloads, frame_index, packet_index, packet_id = zip(*self._pending)
+        self._pending = []
+
+        words = np.frombuffer(b"".join(payloads), dtype=np.uint32).reshape((-1, ACKR_WORDS))
+        packets = decode_ackrs(words)
+        self.recorder.add_batch({
+            "packet_id": np.array(packet_id, dtype=np.uint32),
+            "packet_size": packets["packet_size"],
+            "packet_count": packets["packet_count"],
+            "tsfd": packets["tsf"],
+            "tsid": packets["tsi"],
+            "indicators": packets["indicators"],
+            "packet_type": packets["packet_type"],
+            "stream_id": packets["stream_id"],
+            "classId0": packets["class_id"][:, 0],
+            "classId1": packets["class_id"][:, 1],
+            "tsi": packets["integer_timestamp"],
+            "tsf0": packets["fractional_timestamp"][:, 0],
+            "tsf1": packets["fractional_timestamp"][:, 1],
+            "time": packets["time"],
+        } | {
+            name: packets[name] for name, _ in _ackr_words
+        } | {
+            "frame_index": np.array(frame_index, dtype=np.uint32),
+            "packet_index": np.array(packet_index, dtype=np.uint32),
+        })
+
+    def close(self):
+        self.flush()
+        self.recorder.close()
 
     @property
     def metadata(self)->dict :
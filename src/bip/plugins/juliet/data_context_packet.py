@@ -4,6 +4,7 @@ import pyarrow as pa
 import numpy as np
 
 from bip.vita import ExtensionCommandPacket as VitaExtensionCommandPacket
+from bip.vita.vrt_packet import decode_vrt_packets
 from bip.common import bit_manipulation
 from typing import Optional
 
@@ -65,6 +66,54 @@ def _schema_elt(e: tuple) -> dict:
 
 schema = [ _schema_elt(e) for e in _schema ]
 
+# the words of a data context packet that are decoded, up to the
+# TxDigitalInputPower
+DATA_CONTEXT_WORDS = 34
+
+# the words passed through as they are, as (column, word)
+_data_context_words = [
+    ("cif0", 7),
+    ("cif1", 8),
+    ("cif2", 9),
+    ("cif3", 10),
+    ("cif4", 11),
+    ("dataFormat0", 21),
+    ("dataFormat1", 22),
+    ("polarization", 23),
+    ("beamwidth", 25),
+    ("cited_SID", 26),
+    ("functionPriorityId", 27),
+    ("requested_input_GT", 30),
+    ("reject_reason", 31),
+    ("data_addr_index", 32),
+    ("TxDigitalInputPower", 33),
+]
+
+
+def decode_data_contexts(words: np.ndarray) -> dict:
+    """
+    The fields of a matrix of data context packets, a row of
+    `DATA_CONTEXT_WORDS` words per packet, using the array versions of
+    the `bit_manipulation` functions `_DataContextPacket` uses.
+    """
+    azimuth, elevation = bit_manipulation.pointing_vectors(words[:, 24])
+
+    packets = decode_vrt_packets(words)
+    # Juliet time is from the Jan 1 2019 epoch
+    packets["time"] = packets["time"] + 1546300800
+    return packets | {
+        "bandwidth": bit_manipulation.bandwidths(words[:, 12], words[:, 13]),
+        "freq": bit_manipulation.frequencies(words[:, 14], words[:, 15]),
+        "rfFreqOffset": bit_manipulation.frequencies(words[:, 16], words[:, 17]),
+        "gain": bit_manipulation.gains(words[:, 18]),
+        "sampling_rate": bit_manipulation.sample_rates(words[:, 19], words[:, 20]),
+        "dwell": bit_manipulation.dwells(words[:, 28], words[:, 29]),
+        "azimuth": azimuth,
+        "elevation": elevation,
+    } | {
+        name: words[:, word] for name, word in _data_context_words
+    }
+
 
 #TODO: cancellation and acknowledgement flags aren't handled or stored
 class _DataContextPacket(VitaExtensionCommandPacket):
@@ -122,68 +171,63 @@ class DataContext:
                 options=recorder_opts,
                 batch_size=batch_size)
 
+        self.batch_size = batch_size
         self.packet_id = 0
-
-    def __add_record(self,
-            packet: _DataContextPacket,
-            *,
-            frame_index: int,
-            packet_index: int
-            ):
-        assert isinstance(packet, _DataContextPacket)
-        header = packet.packet_header
-
-
-        self.recorder.add_record({
-            "packet_id": np.uint32(self.packet_id),
-            "packet_size": np.uint16(header.packet_size),
-            "packet_count": np.uint16(header.packet_count),
-            "tsfd": np.uint8(header.tsf),
-            "tsid": np.uint8(header.tsi),
-            "indicators": np.uint8(header.indicators),
-            "packet_type": np.uint8(header.packet_type),
-            "tsi": np.uint32(packet.integer_timestamp),
-            "tsf0": np.uint32(packet.fractional_timestamp[0]),
-            "tsf1": np.uint32(packet.fractional_timestamp[1]),
-            "time": np.double(packet.time),
-            "stream_id": np.uint32(packet.stream_id),
-            "classId0": np.uint32(packet.classId0),
-            "classId1":np.uint32(packet.classId1),
-            "cif0": np.uint32(packet.cif0),
-            "cif1": np.uint32(packet.cif1),
-            "cif2": np.uint32(packet.cif2),
-            "cif3": np.uint32(packet.cif3),
-            "cif4": np.uint32(packet.cif4),
-            "bandwidth": np.double(packet.bandwidth),
-            "freq": np.double(packet.freq),
-            "rfFreqOffset": np.double(packet.rfFreqOffset),
-            "gain": np.uint32(packet.gain),
-            "sampling_rate": np.double(packet.sampling_rate),
-            "dwell": np.double(packet.dwell),
-            "dataFormat0": np.uint32(packet.dataFormat0),
-            "dataFormat1": np.uint32(packet.dataFormat1),
-            "polarization": np.uint32(packet.polarization),
-            "azimuth": np.float32(packet.azimuth),
-            "elevation": np.float32(packet.elevation),
-            "beamwidth": np.uint32(packet.beamWidth),
-            "cited_SID": np.uint32(packet.cited_SID),
-            "functionPriorityId": np.uint32(packet.functionPriorityId),
-            "requested_input_GT": np.uint32(packet.requested_input_GT),
-            "reject_reason": np.uint32(packet.reject_reason),
-            "data_addr_index": np.uint32(packet.data_addr_index),
-            "TxDigitalInputPower": np.uint32(packet.TxDigitalInputPower),
-            "frame_index": np.uint32(frame_index),
-            "packet_index": np.uint32(packet_index),
-        })
+        self._pending = []
 
     def process(self, payload: bytes,
             *,
             frame_index: int,
             packet_index: int):
-        self.__add_record(_DataContextPacket(payload),
-                frame_index=frame_index,
-                packet_index=packet_index)
+        if len(payload) < 4*DATA_CONTEXT_WORDS:
+            raise ValueError(f"data context packet of {len(payload)} bytes, "
+                             f"expected at least {4*DATA_CONTEXT_WORDS}")
+
+        # the packet is decoded along with the rest of its batch
+        self._pending.append((payload[:4*DATA_CONTEXT_WORDS], frame_index, packet_index, self.packet_id))
         self.packet_id += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Decodes the pending packets in one go and hands them to the recorder
+        as a batch.
+        """
+        if len(self._pending) == 0:
+            return
+
+        payloads, frame_index, packet_index, packet_id = zip(*self._pending)
+        self._pending = []
+
+        words = np.frombuffer(b"".join(payloads), dtype=np.uint32).reshape((-1, DATA_CONTEXT_WORDS))
+        packets = decode_data_contexts(words)
+        columns = {
+            "packet_id": np.array(packet_id, dtype=np.uint32),
+            "packet_size": packets["packet_size"],
+            "packet_count": packets["packet_count"],
+            "tsfd": packets["tsf"],
+            "tsid": packets["tsi"],
+            "indicators": packets["indicators"],
+            "packet_type": packets["packet_type"],
+            "tsi": packets["integer_timestamp"],
+            "tsf0": packets["fractional_timestamp"][:, 0],
+            "tsf1": packets["fractional_timestamp"][:, 1],
+            "time": packets["time"],
+            "stream_id": packets["stream_id"],
+            "classId0": packets["class_id"][:, 0],
+            "classId1": packets["class_id"][:, 1],
+            "frame_index": np.array(frame_index, dtype=np.uint32),
+            "packet_index": np.array(packet_index, dtype=np.uint32),
+        }
+        for name, type_, *_ in _schema:
+            if name not in columns:
+                columns[name] = packets[name].astype(type_.to_pandas_dtype())
+        self.recorder.add_batch(columns)
+
+    def close(self):
+        self.flush()
+        self.recorder.close()
 
     @property
     def metadata(self)->dict :
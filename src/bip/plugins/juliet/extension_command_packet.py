@@ -5,6 +5,7 @@ import pyarrow as pa
 import numpy as np
 
 from bip.vita import ExtensionCommandPacket as VitaExtensionCommandPacket
+from bip.vita.vrt_packet import decode_vrt_packets
 from bip.common import bit_manipulation
 from typing import Optional
 
@@ -52,6 +53,27 @@ def _schema_elt(e: tuple) -> dict:
 
 schema = [ _schema_elt(e) for e in _schema ]
 
+# the words of an extension command packet that are decoded, up to the dwell
+EXTENSION_COMMAND_WORDS = 30
+
+
+def decode_extension_commands(words: np.ndarray) -> dict:
+    """
+    The fields of a matrix of extension command packets, a row of
+    `EXTENSION_COMMAND_WORDS` words per packet, using the array versions of
+    the `bit_manipulation` functions `_ExtensionCommandPacket` uses.
+    """
+    az, el = bit_manipulation.pointing_vectors(words[:, 25])
+    return decode_vrt_packets(words) | {
+        "cited_sid": words[:, 26],
+        "freq": bit_manipulation.frequencies(words[:, 16], words[:, 17]),
+        "offset": bit_manipulation.offsets(words[:, 18], words[:, 19]),
+        "sampling_rate": bit_manipulation.sample_rates(words[:, 21], words[:, 22]),
+        "dwell": bit_manipulation.dwells(words[:, 28], words[:, 29]),
+        "az": az,
+        "el": el,
+    }
+
 
 #TODO: cancellation and acknowledgement flags aren't handled or stored
 class _ExtensionCommandPacket(VitaExtensionCommandPacket):
@@ -86,54 +108,69 @@ class ExtensionCommand:
                 options=recorder_opts,
                 batch_size=batch_size)
 
+        self.batch_size = batch_size
         self.packet_id = 0
-
-    def add_record(self,
-            packet: _ExtensionCommandPacket,
-            *,
-            frame_index: int,
-            packet_index: int
-            ):
-        assert isinstance(packet, _ExtensionCommandPacket)
-        header = packet.packet_header
-
-        self.recorder.add_record({
-            "packet_id": np.uint32(self.packet_id),
-            "packet_size": np.uint16(header.packet_size),
-            "packet_count": np.uint16(header.packet_count),
-            "tsfd": np.uint8(header.tsf),
-            "tsid": np.uint8(header.tsi),
-            "indicators": np.uint8(header.indicators),
-            "packet_type": np.uint8(header.packet_type),
-
-            "tsi": np.uint32(packet.integer_timestamp),
-            "tsf0": np.uint32(packet.fractional_timestamp[0]),
-            "tsf1": np.uint32(packet.fractional_timestamp[1]),
-            "time": np.float64(packet.time),
-
-            "stream_id": np.uint32(packet.stream_id),
-            "classId0": np.uint32(packet.classId0),
-            "classId1":np.uint32(packet.classId1),
-            "cited_sid": np.uint32(packet.cited_sid),
-            "freq": np.float64(packet.freq),
-            "offset": np.float64(packet.offset),
-            "sampling_rate": np.float64(packet.sampling_rate),
-            "dwell": np.float64(packet.dwell),
-            "az": np.float32(packet.az),
-            "el": np.float32(packet.el),
-
-            "frame_index": np.uint32(frame_index),
-            "packet_index": np.uint32(packet_index),
-        })
+        self._pending = []
 
     def process(self, payload: bytes,
             *,
             frame_index: int,
             packet_index: int):
-        self.add_record(_ExtensionCommandPacket(payload),
-                frame_index=frame_index,
-                packet_index=packet_index)
+        if len(payload) < 4*EXTENSION_COMMAND_WORDS:
+            raise ValueError(f"extension command packet of {len(payload)} bytes, "
+                             f"expected at least {4*EXTENSION_COMMAND_WORDS}")
+
+        # the packet is decoded along with the rest of its batch
+        self._pending.append((payload[:4*EXTENSION_COMMAND_WORDS], frame_index, packet_index, self.packet_id))
         self.packet_id += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Decodes the pending packets in one go and hands them to the recorder
+        as a batch.
+        """
+        if len(self._pending) == 0:
+            return
+
+        payloads, frame_index, packet_index, packet_id = zip(*self._pending)
+        self._pending = []
+
+        words = np.frombuffer(b"".join(payloads), dtype=np.uint32).reshape((-1, EXTENSION_COMMAND_WORDS))
+        packets = decode_extension_commands(words)
+        self.recorder.add_batch({
+            "packet_id": np.array(packet_id, dtype=np.uint32),
+            "packet_size": packets["packet_size"],
+            "packet_count": packets["packet_count"],
+            "tsfd": packets["tsf"],
+            "tsid": packets["tsi"],
+            "indicators": packets["indicators"],
+            "packet_type": packets["packet_type"],
+
+            "tsi": packets["integer_timestamp"],
+            "tsf0": packets["fractional_timestamp"][:, 0],
+            "tsf1": packets["fractional_timestamp"][:, 1],
+            "time": packets["time"],
+
+            "stream_id": packets["stream_id"],
+            "classId0": packets["class_id"][:, 0],
+            "classId1": packets["class_id"][:, 1],
+            "cited_sid": packets["cited_sid"],
+            "freq": packets["freq"],
+            "offset": packets["offset"],
+            "sampling_rate": packets["sampling_rate"].astype(np.float64),
+            "dwell": packets["dwell"],
+            "az": packets["az"].astype(np.float32),
+            "el": packets["el"].astype(np.float32),
+
+            "frame_index": np.array(frame_index, dtype=np.uint32),
+            "packet_index": np.array(packet_index, dtype=np.uint32),
+        })
+
+    def close(self):
+        self.flush()
+        self.recorder.close()
 
     @property
     def metadata(self)->dict :
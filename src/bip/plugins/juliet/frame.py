@@ -2,6 +2,8 @@ import struct
 from io import RawIOBase
 from typing import Tuple
 
+import numba
+import numpy as np
 import pyarrow as pa
 
 header_fmt = "<III" #https://docs.python.org/3/library/struct.html
@@ -11,6 +13,14 @@ schema = pa.schema([
     ("word_count", pa.uint32())
 ])
 
+index_dtype = np.dtype([
+    ("offset", np.uint64),      # byte offset of the frame header
+    ("time_ns", np.uint64),
+    ("word_count", np.uint32),
+    ("packet_type", np.uint8),
+    ("indicators", np.uint8),
+])
+
 def unpack_header(header_bytes: bytes):
     time_msw, time_lsw, word_cnt = struct.unpack(header_fmt, header_bytes)
     return (time_msw << 32) | time_lsw, word_cnt
@@ -24,3 +34,55 @@ def read_header(buf: RawIOBase) -> Tuple[int, Tuple[int, int]]:
         raise RuntimeError("incomplete read of header")
     return bytes_read, unpack_header(header_bytes)
 
+
+@numba.jit(nopython=True)
+def _walk_packets(words, packets):
+    """
+    Follows the word_count chain through `words`, filling `packets` (when
+    it is large enough) and returning the number of complete packets.
+    """
+    header_words = header_size // 4
+    n_words = len(words)
+    n_packets = 0
+    position = 0
+    while position + header_words < n_words:
+        word_count = words[position + 2]
+        if word_count == 0:
+            break
+        end = position + header_words + np.int64(word_count)
+        if end > n_words:
+            break
+
+        if n_packets < len(packets):
+            packet = packets[n_packets]
+            packet.offset = 4 * position
+            packet.time_ns = (np.uint64(words[position]) << 32) | np.uint64(words[position + 1])
+            packet.word_count = word_count
+            # the payload is big endian, so the VRT header fields are in the
+            # first byte of the payload
+            first_byte = words[position + header_words] & 0xFF
+            packet.packet_type = first_byte >> 4
+            packet.indicators = first_byte & 0x7
+
+        n_packets += 1
+        position = end
+
+    return n_packets
+
+
+def index_packets(buffer) -> np.ndarray:
+    """
+    Builds a table of every complete packet in `buffer` (e.g. a memory
+    mapped file) by following the `word_count` chain from the start of the
+    buffer.
+
+    The walk stops at the first header that is incomplete, has a zero word
+    count, or describes a payload running past the end of the buffer;
+    whatever follows the last packet in the table is left to `read_header`.
+    """
+    words = np.frombuffer(buffer, dtype=np.uint32, count=len(buffer) // 4)
+    packets = np.zeros(0, dtype=index_dtype)
+    n_packets = _walk_packets(words, packets)
+    packets = np.zeros(n_packets, dtype=index_dtype)
+    _walk_packets(words, packets)
+    return packets
@@ -8,6 +8,9 @@ import pyarrow as pa
 
 
 from bip import vita
+from bip.common import iq_layout as iq_layouts
+from bip.common import parallel
+from bip.common.mapped_stream import MappedStream
 from . __version__ import __version__ as version
 from . import frame
 from . signal_data_packet import SignalData
@@ -32,6 +35,9 @@ COMMAND_PACKET = 0b0111
 EXTENSION_COMMAND_PACKET = 0b0000
 ACK_DATA_PACKET = 0b0100
 
+# mapped files are byteswapped this many bytes at a time
+READ_AHEAD_BYTES = 1 << 24
+
 bad_packets_schema = pa.schema([
     ("start_bytes", pa.uint64()),
     ("bytes", pa.list_(pa.uint32(), -1)),
@@ -62,10 +68,29 @@ class Parser:
         if recorder_opts is None:
             recorder_opts = {}
 
+        # everything a worker process needs to build its own parser
+        self._parser_args = {
+                "input_path": input_path,
+                "output_path": output_path,
+                "Recorder": Recorder,
+                "log_level": log_level,
+                "data_recorder": data_recorder,
+                "recorder_opts": recorder_opts,
+                "context_key_function": context_key_function,
+                "orphan_context_key": orphan_context_key,
+        } | kwargs
+
         self.options = kwargs
         self.clean = False
         if kwargs.get("clean") == True:
             self.clean = True
+        self.use_mmap = False
+        if kwargs.get("mmap") == True:
+            self.use_mmap = True
+        self.workers = int(kwargs.get("workers") or 1)
+        self.iq_layout = kwargs.get("iq_layout") or iq_layouts.SPLIT
+        self._output_path = output_path
+        self._recorder_options = recorder_opts
         self._bytes_read = 0
         self._packets_read = 0
 
@@ -109,6 +134,7 @@ class Parser:
                 Recorder,
                 recorder_opts,
                 batch_size = 1000,
+                iq_layout = self.iq_layout,
                 clean = self.clean)
         self.options["signal_data"] = {
                 "filename": signal_data_filename,
@@ -173,14 +199,28 @@ class Parser:
     def unknown_packets(self) -> int:
         return self._unknown_packets
 
+    def close(self):
+        """
+        Closes every recorder, writing out whatever is left in their batches.
+        """
+        for packets in (self.signal_data,
+                        self.extension_command_data,
+                        self.ackr_data,
+                        self.context_data):
+            packets.close()
+        for recorder in (self.recorder,
+                         self.bad_packets_recorder,
+                         self.unknown_packets_recorder):
+            recorder.close()
+
     def read_packet(self, buf: RawIOBase):
         bytes_read, header = frame.read_header(buf)
         if bytes_read == 0:
-            if self.recorder.writer != None:
+            if self.recorder.writer is not None:
                 self.recorder.close()
             return None
         if header[0] == 0 and header[1] == 0:
-            if self.recorder.writer != None:
+            if self.recorder.writer is not None:
                 self.recorder.close()
             return None
 
@@ -261,11 +301,105 @@ class Parser:
             print(f"unexpected packet type {packet_type:#06b}")
 
 
-    def parse_stream(self, stream: RawIOBase, progress_bar=None):
-        if progress_bar is not None:
-            last_read = 0
+    def _tables(self, packets: np.ndarray) -> dict:
+        """
+        Which rows of the packet index go to each table, by the name of the
+        table's attribute.
+        """
+        packet_types = packets["packet_type"]
+        indicators = packets["indicators"]
+        command = packet_types == COMMAND_PACKET
+        return {
+            "signal_data": packet_types == SIGNAL_DATA_PACKET,
+            "extension_command_data": command & (indicators == EXTENSION_COMMAND_PACKET),
+            "ackr_data": command & (indicators == ACK_DATA_PACKET) & (packets["word_count"] == 15),
+            "context_data": packet_types == CONTEXT_DATA_PACKET,
+        }
 
-        vita_payload = self.read_packet(stream)
+    def _known_packets(self, packets: np.ndarray) -> np.ndarray:
+        return np.logical_or.reduce(list(self._tables(packets).values()))
+
+    def parse_packets(self, stream: MappedStream, progress_bar=None, packets: np.ndarray=None) -> int:
+        """
+        Parses the complete packets of a mapped file by walking its packet
+        index (see `frame.index_packets`), leaving `stream` positioned after
+        the last of them.  `packets` restricts the walk to some of the rows
+        of the index.
+
+        The big endian payloads are byteswapped a block of `READ_AHEAD_BYTES`
+        at a time, and each packet is handed on as a view into its block.
+
+        Returns the number of bytes read, for progress reporting.
+        """
+        buffer = stream.buffer
+        if packets is None:
+            packets = frame.index_packets(buffer)
+
+        packet_types = packets["packet_type"]
+        indicators = packets["indicators"]
+        known = self._known_packets(packets)
+
+        words = np.frombuffer(buffer, dtype=np.uint32, count=len(buffer) // 4)
+        ends = packets["offset"] + frame.header_size + 4 * packets["word_count"].astype(np.uint64)
+
+        last_read = self._bytes_read
+        first_row = 0
+        while first_row < len(packets):
+            # swap (a copy of) every packet that ends inside the block in one go,
+            # the little endian frame headers in between are swapped along with them
+            block_start = int(packets["offset"][first_row])
+            last_row = max(first_row + 1,
+                    int(np.searchsorted(ends, block_start + READ_AHEAD_BYTES, side="right")))
+            block_end = int(ends[last_row - 1])
+            block = memoryview(words[block_start // 4:block_end // 4].byteswap()).cast("B")
+
+            rows = slice(first_row, last_row)
+            for offset, time_ns, word_count, packet_type, indicator, is_known in zip(
+                    packets["offset"][rows].tolist(),
+                    packets["time_ns"][rows].tolist(),
+                    packets["word_count"][rows].tolist(),
+                    packet_types[rows].tolist(),
+                    indicators[rows].tolist(),
+                    known[rows].tolist()):
+                start = offset + frame.header_size
+                end = start + 4 * word_count
+                payload = block[start - block_start:end - block_start]
+
+                if is_known:
+                    self.recorder.add_record({
+                        "time_ns": np.uint64(time_ns),
+                        "word_count": np.uint32(word_count),
+                    })
+                else:
+                    print(f"unexpected packet type - {packet_type}:{indicator}:{len(payload)}")
+                    self.unknown_packets_recorder.add_record({
+                        "start_bytes": np.uint64(start),
+                        "bytes": np.frombuffer(payload, count = -1, dtype=np.uint32),
+                    })
+                    self._unknown_packets += 1
+                self._packets_read += 1
+                self._bytes_read = end
+
+                self.process_packet(packet_type, indicator, payload)
+                if progress_bar is not None:
+                    progress_bar.update(self.bytes_read - last_read)
+                    last_read = self.bytes_read
+
+            first_row = last_row
+
+        stream.seek(self._bytes_read)
+        return last_read
+
+    def read_packets(self, stream: RawIOBase, progress_bar=None, last_read: int = 0):
+        """
+        Reads and processes packets one at a time until the end of the
+        stream, or the first packet that can't be read.
+        """
+        try:
+            vita_payload = self.read_packet(stream)
+        except:
+            print(traceback.format_exc())
+            vita_payload = None
         while vita_payload:
             header = vita.vrt_header(vita_payload)
             self.process_packet(header.packet_type, header.indicators, vita_payload)
@@ -277,4 +411,101 @@ class Parser:
                 vita_payload = self.read_packet(stream)
             except:
                 print(traceback.format_exc())
-                vita_payload = None
\ No newline at end of file
+                vita_payload = None
+
+    def _plan_chunks(self, packets: np.ndarray) -> list:
+        """
+        Splits the packet index into a chunk per worker, working out from the
+        index where each chunk's packet index and packet ids start.
+        """
+        packets_before = {
+            name: np.concatenate([[0], np.cumsum(mask)])
+            for name, mask in self._tables(packets).items()
+        }
+
+        sizes = frame.header_size + 4 * packets["word_count"].astype(np.uint64)
+        rows = parallel.split_rows(sizes, self.workers)
+        return [{
+            "packets": packets[start:end],
+            "packet_index": start,
+            "packet_ids": {
+                name: int(counts[start]) for name, counts in packets_before.items()
+            },
+            # whatever follows the last complete packet is read by the last worker
+            "tail": end == len(packets),
+        } for start, end in rows]
+
+    def _start_chunk(self, chunk: dict):
+        self._packets_read = chunk["packet_index"]
+        for name, packet_id in chunk["packet_ids"].items():
+            getattr(self, name).packet_id = packet_id
+
+    def parse_parallel(self, stream: MappedStream, progress_bar=None):
+        """
+        Parses a mapped file in `workers` processes.
+
+        The `word_count` chain is walked once, then the packet index is split
+        into byte balanced chunks that the workers decode into directories
+        of their own.  The parts are then merged into the usual outputs.
+        """
+        packets = frame.index_packets(stream.buffer)
+        if len(packets) == 0:
+            self.read_packets(stream, progress_bar)
+            return
+
+        chunks = self._plan_chunks(packets)
+        part_paths = [parallel.part_directory(self._output_path, i) for i in range(len(chunks))]
+
+        last_read = 0
+        for result in parallel.run_parts(_parse_part,
+                [(self._parser_args, part_path, chunk) for part_path, chunk in zip(part_paths, chunks)],
+                self.workers):
+            self._bytes_read = result["bytes_read"]
+            self._packets_read = result["packets_read"]
+            self._bad_packets += result["bad_packets"]
+            self._unknown_packets += result["unknown_packets"]
+            if progress_bar is not None:
+                progress_bar.update(self.bytes_read - last_read)
+                last_read = self.bytes_read
+
+        parallel.merge_parts(part_paths, self._output_path, self._recorder_options)
+
+    def parse_stream(self, stream: RawIOBase, progress_bar=None):
+        last_read = 0
+
+        if self.use_mmap or self.workers > 1:
+            stream = MappedStream.from_stream(stream)
+
+        if isinstance(stream, MappedStream):
+            if self.workers > 1:
+                self.parse_parallel(stream, progress_bar)
+                self.close()
+                return
+            # anything after the last complete packet (an incomplete packet
+            # or the end of the file) is handled by read_packet below
+            last_read = self.parse_packets(stream, progress_bar)
+
+        self.read_packets(stream, progress_bar, last_read)
+        self.close()
+
+
+def _parse_part(parser_args: dict, part_path: Path, chunk: dict) -> dict:
+    """
+    Worker side of `Parser.parse_parallel`: decodes one chunk of the packet
+    index into `part_path`.
+    """
+    part_path.mkdir(parents=True, exist_ok=True)
+    parser = Parser(**(parser_args | {"output_path": part_path, "workers": 1}))
+    with open(parser_args["input_path"], "rb") as f:
+        stream = MappedStream.from_stream(f)
+    parser._start_chunk(chunk)
+    parser.parse_packets(stream, packets=chunk["packets"])
+    if chunk["tail"]:
+        parser.read_packets(stream)
+    parser.close()
+    return {
+        "bytes_read": parser.bytes_read,
+        "packets_read": parser.packets_read,
+        "bad_packets": parser.bad_packets,
+        "unknown_packets": parser.unknown_packets,
+    }
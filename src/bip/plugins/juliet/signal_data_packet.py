@@ -4,6 +4,8 @@ import pyarrow as pa
 import numpy as np
 
 from bip.vita import SignalDataPacket
+from bip.vita.signal_data_packet import decode_signal_data
+from bip.common import iq_layout as iq_layouts
 from bip.common import bit_manipulation
 
 _schema = [
@@ -64,18 +66,23 @@ class SignalData:
             Recorder: type,
             recorder_opts: dict = None,
             batch_size: int = 1000,
+            iq_layout: str = iq_layouts.SPLIT,
             **kwargs):
         if recorder_opts is None:
             recorder_opts = {}
 
         self.options = kwargs
+        self.iq_layout = iq_layouts.check(iq_layout)
+        self._schema = iq_layouts.schema(_schema, self.iq_layout)
         self.recorder = Recorder(
                 output_path,
-                schema=pa.schema([(e[0], e[1]) for e in _schema]),
+                schema=pa.schema([(e[0], e[1]) for e in self._schema]),
                 options=recorder_opts,
                 batch_size=batch_size)
         self.data = 0
+        self.batch_size = batch_size
         self.packet_id = 0
+        self._pending = []
 
     def add_record(self,
             packet: _SignalDataPacket,
@@ -105,9 +112,7 @@ class SignalData:
             "trailer": np.uint32(packet.trailer),
             "frame_index": np.uint32(frame_index),
             "packet_index": np.uint32(packet_index),
-            "samples_i": packet.data[:,0],
-            "samples_q": packet.data[:,1]
-        })
+        } | iq_layouts.record(packet.data, self.iq_layout))
 
     def process(self,
             payload: bytes,
@@ -115,12 +120,53 @@ class SignalData:
             frame_index: int,
             packet_index: int
             ):
-        self.add_record(_SignalDataPacket(payload),
-                frame_index=frame_index,
-                packet_index=packet_index)
+        # the packet is decoded along with the rest of its batch
+        self._pending.append((payload, frame_index, packet_index, self.packet_id))
         self.packet_id += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Decodes the pending packets in one go and hands them to the recorder
+        as a batch.
+        """
+        if len(self._pending) == 0:
+            return
+
+        payloads, frame_index, packet_index, packet_id = zip(*self._pending)
+        self._pending = []
+
+        packets = decode_signal_data(payloads, trailer_words=1)
+        self.recorder.add_batch({
+            "packet_id": np.array(packet_id, dtype=np.uint32),
+            "packet_size": packets["packet_size"],
+            "packet_count": packets["packet_count"],
+            "tsfd": packets["tsf"],
+            "tsid": packets["tsi"],
+            "indicators": packets["indicators"],
+            "packet_type": packets["packet_type"],
+            "tsi": packets["integer_timestamp"],
+            "tsf0": packets["fractional_timestamp"][:, 0],
+            "tsf1": packets["fractional_timestamp"][:, 1],
+            "time": packets["time"] + 1546300800,
+            "stream_id": packets["stream_id"],
+            "classId0": packets["class_id"][:, 0],
+            "classId1": packets["class_id"][:, 1],
+            "sample_count": packets["sample_count"],
+            "trailer": packets["trailer"][:, 0],
+            "frame_index": np.array(frame_index, dtype=np.uint32),
+            "packet_index": np.array(packet_index, dtype=np.uint32),
+        } | iq_layouts.columns(packets["samples"], packets["sample_offsets"], self.iq_layout))
+
+    def close(self):
+        self.flush()
+        self.recorder.close()
 
     @property
     def metadata(self) -> dict:
-        return self.recorder.metadata | {"schema": schema}
+        return self.recorder.metadata | {
+                "schema": [ _schema_elt(e) for e in self._schema ],
+                "iq_layout": self.iq_layout,
+        }
 
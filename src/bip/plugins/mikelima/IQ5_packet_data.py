@@ -1,5 +1,7 @@
 from pathlib import Path
 from bip.non_vita import mblb
+from bip.common import iq_layout as iq_layouts
+from . packet_columns import message_columns
 
 import pyarrow as pa
 import numpy as np
@@ -9,6 +11,7 @@ BEAMS = 3
 LANES = 3
 MARKER_BYTES = 8
 HEADER_BYTES = 32
+BEAM_SUFFIXES = ("_left", "_right", "_center")
 
 _IQ5_packet_schema = [
     ("IQ_type", pa.uint8()),
@@ -74,15 +77,18 @@ class ProcessIq5Packet():
             Recorder: type,
             recorder_opts: dict = None,
             batch_size: int = 10,
+            iq_layout: str = iq_layouts.SPLIT,
             **kwargs):
         if recorder_opts is None:
             recorder_opts = {}
 
         self.options = kwargs
 
+        self.iq_layout = iq_layouts.check(iq_layout)
+        self._schema = iq_layouts.schema(_IQ5_packet_schema, self.iq_layout)
         self.packet_recorder = Recorder(
                 output_path,
-                schema=pa.schema([(e[0], e[1]) for e in _IQ5_packet_schema]),
+                schema=pa.schema([(e[0], e[1]) for e in self._schema]),
                 options=recorder_opts,
                 batch_size=batch_size)
 
@@ -141,17 +147,17 @@ class ProcessIq5Packet():
             "SchedNum": np.float32(self.sched_num),
             "SIinSchedNum": np.float32(self.si_in_sched_num),
             "time": np.float64(self.time / 1000000), #us to s
-            "samples_i_left": left_data[:,0],
-            "samples_q_left": left_data[:,1],
-            "samples_i_right": right_data[:,0],
-            "samples_q_right": right_data[:,1],
-            "samples_i_center": center_data[:,0],
-            "samples_q_center": center_data[:,1]
-        })
+        }
+        | iq_layouts.record(left_data, self.iq_layout, "_left")
+        | iq_layouts.record(right_data, self.iq_layout, "_right")
+        | iq_layouts.record(center_data, self.iq_layout, "_center"))
 
     @property
     def metadata(self) -> dict :
-        return self.packet_recorder.metadata | {"schema": IQ5_schema}
+        return self.packet_recorder.metadata | {
+                "schema": [ _schema_elt(e) for e in self._schema ],
+                "iq_layout": self.iq_layout,
+        }
 
     def process_orphan_packet(self, packet: bytearray, sop_obj, iq_type: int, session_id: int, increment: int, timestamp_from_filename: int):
         data = np.frombuffer(packet,
@@ -172,32 +178,10 @@ class ProcessIq5Packet():
         self.si_in_sched_num = np.nan
         self.__add_record(sop_obj, self.left_data, self.right_data, self.center_data)
 
-    def process_packet(self, stream: bytearray, packet, som_obj, packet_list_index):
+    def process_packets(self, packet_list: list, packets: dict, som_obj):
         '''
-        the packet is passed in, now we stream the data (I/Q) into a
-        1 dimensional array of 2 values per element (I/Q)
-        The format in the word is IB QB IA QA, laid out across 64 bits with
-        B the later sample and A being the earlier sample.
-
-        we know that bytearray starts at SOP and ends
-        right before the next SOP or EOM
+        Records all the packets of a message at once, given the fields of
+        their SOP headers as decoded by `mblb.decode_packets`.
         '''
-        self.sample_rate = 1280/(2**packet.rx_config)
-        data_word_count = np.uint64(2*som_obj.dwell*BEAMS*self.sample_rate)
-        data = np.frombuffer(stream,
-                            offset=np.uint64(LANES*(MARKER_BYTES+HEADER_BYTES)),
-                            count=data_word_count,
-                            dtype = np.int16).reshape((-1, 2))
-        self.left_data = data[::3]
-        self.right_data = data[1::3]
-        self.center_data = data[2::3]
-        self.time = som_obj.time_since_epoch_us + (packet_list_index * som_obj.dwell)
-        self.iq_type = som_obj.iq_type
-        self.session_id = som_obj.session_id
-        self.increment = som_obj.increment
-        self.timestamp_from_filename = som_obj.timestamp_from_filename
-        self.afs_mode = som_obj.afs_mode
-        self.sched_num = som_obj.sched_num
-        self.si_in_sched_num = som_obj.si_in_sched_num
-
-        self.__add_record(packet, self.left_data, self.right_data, self.center_data)
\ No newline at end of file
+        self.packet_recorder.add_batch(
+                message_columns(packet_list, packets, som_obj, BEAM_SUFFIXES, self.iq_layout))
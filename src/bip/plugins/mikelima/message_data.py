@@ -2,6 +2,7 @@ import pyarrow as pa
 import os
 from pathlib import Path
 import numpy as np
+from bip.common import iq_layout as iq_layouts
 from bip.common import numpy_manipulation
 from bip.non_vita import mblb
 from . IQ0_packet_data import ProcessIq0Packet
@@ -77,6 +78,7 @@ class ProcessMessage:
             recorder_opts: dict = None,
             batch_size: int = 100,
             iq_type:  int = 0,
+            iq_layout: str = iq_layouts.SPLIT,
             **kwargs):
         if recorder_opts is None:
             recorder_opts = {}
@@ -90,14 +92,16 @@ class ProcessMessage:
                     output_path / packet_data_filename,
                     Recorder,
                     options = recorder_opts,
-                    batch_size = 10)
+                    batch_size = 10,
+                    iq_layout = iq_layout)
         else:
             packet_data_filename = f"{IQ0_PACKET_FILENAME}.{Recorder.extension()}"
             self.packet_processor = ProcessIq0Packet(
                     output_path / packet_data_filename,
                     Recorder,
                     options = recorder_opts,
-                    batch_size = 10)
+                    batch_size = 10,
+                    iq_layout = iq_layout)
 
     def process_orphan_packets(self, orphan_packet_list: list, iq_type: int, session_id: int, increment: int, timestamp_from_filename: int):
         '''
@@ -121,7 +125,8 @@ class ProcessMessage:
         '''
         numpy_stream = np.array(stream, dtype = np.uint8())
 
-        index_list = numpy_manipulation.find_subarray_indexes(numpy_stream, START_OF_PACKET)
+        # markers sit on 8 byte lanes
+        index_list, = numpy_manipulation.find_markers(numpy_stream, [START_OF_PACKET], alignment=MARKER_BYTES)
         packet_list = np.split(numpy_stream, index_list)
 
         return packet_list[1:]
@@ -135,20 +140,29 @@ class ProcessMessage:
 
         packet_list = self.read_packets(stream) #bytearray of the whole message
 
-        for count, packet in enumerate(packet_list):
-            '''
-            count here will give us the index, thus knowing how many dwells
-            to factor into the time calculation
-            '''
-            packet = bytearray(packet)
+        return self.process_packets([bytearray(packet) for packet in packet_list], som_obj)
 
-            #SOP is 3 32-byte headers
-            sop = packet[(LANES*MARKER_BYTES):(LANES*(MARKER_BYTES+HEADER_BYTES))] #skip the start of packet
-            sop_obj = mblb.MblbPacket(sop)
+    def process_packets(self, packet_list: list, som_obj):
+        '''
+        Process the packets of a message, each one running from its SOP
+        marker to right before the next SOP or EOM marker
+        returns the length of the packet list
+        '''
+        if len(packet_list) == 0:
+            return 0
+
+        #SOP is 3 32-byte headers, decoded for all the packets at once
+        sops = [packet[(LANES*MARKER_BYTES):(LANES*(MARKER_BYTES+HEADER_BYTES))] for packet in packet_list]
+        packets = mblb.decode_packets(mblb.stack_words(sops, mblb.PACKET_WORDS))
 
-            self.packet_processor.process_packet(packet, sop_obj, som_obj, count) # read individual packet
+        # a packet's index in the message gives how many dwells to factor
+        # into its time
+        self.packet_processor.process_packets(packet_list, packets, som_obj)
         return len(packet_list)
 
+    def close(self):
+        self.packet_processor.packet_recorder.close()
+
     @property
     def metadata(self) -> dict :
         return self.packet_processor.metadata | {"schema": schema}
@@ -0,0 +1,209 @@
+import numba
+import numpy as np
+
+
+def _marker(hex_string: str) -> np.uint64:
+    return np.uint64(int.from_bytes(bytes.fromhex(hex_string), byteorder="little"))
+
+START_OF_MESSAGE_WORD = _marker('F07FFF7FFF7FFF7F')
+START_OF_PACKET_WORD = _marker('F17FFF7FFF7FFF7F')
+END_OF_MESSAGE_WORD = _marker('F27FFF7FFF7FFF7F')
+UNHANDLED_MARKER_WORDS = (
+    _marker('F37FFF7FFF7FFF7F'),
+    _marker('F77FFF7FFF7FFF7F'),
+    _marker('F87FFF7FFF7FFF7F'),
+    _marker('F97FFF7FFF7FFF7F'),
+    _marker('FA7FFF7FFF7FFF7F'),
+)
+
+LANES = 3
+MARKER_BYTES = 8
+HEADER_BYTES = 32
+SOM_BYTES = 36*8
+PACKET_HEADER_BYTES = LANES*(MARKER_BYTES + HEADER_BYTES)
+
+# Message status codes used in the message index
+MESSAGE_COMPLETE = 0
+MESSAGE_NO_EOM = 1          # file ended before the EOM marker
+MESSAGE_BROKEN_PACKET = 2   # last packet header or data is incomplete
+
+# Reasons the walk over the file stopped
+END_OF_FILE = 0
+UNHANDLED_MARKER = 1
+BAD_SOM = 2
+BAD_SOP = 3
+BAD_EOM = 4
+
+message_dtype = np.dtype([
+    ("som", np.int64),          # byte offset of the 36 word SOM header
+    ("eom", np.int64),          # byte offset of the EOM words, -1 if missing
+    ("end", np.int64),          # byte offset just past the message
+    ("status", np.uint8),
+    ("first_packet", np.int64), # index of the message's first packet
+    ("packet_count", np.int64),
+])
+
+packet_dtype = np.dtype([
+    ("start", np.int64),        # byte offset of the first SOP marker
+    ("end", np.int64),          # byte offset of the next SOP or EOM marker
+])
+
+
+@numba.jit(nopython=True)
+def _word(data, position):
+    word = np.uint64(0)
+    for i in range(8):
+        word |= np.uint64(data[position + i]) << np.uint64(8*i)
+    return word
+
+
+@numba.jit(nopython=True)
+def _is_unhandled(word):
+    for marker in UNHANDLED_MARKER_WORDS:
+        if word == marker:
+            return True
+    return False
+
+
+@numba.jit(nopython=True)
+def _walk_messages(data, position, n_beams, eom_bytes, messages, packets):
+    """
+    Walks the messages in `data` the same way `Parser.read_message` reads
+    them, filling `messages` and `packets` when they are large enough.
+
+    Returns the number of messages and packets found, the byte offset the
+    walk stopped at, and why it stopped.
+    """
+    n_bytes = len(data)
+    n_messages = 0
+    n_packets = 0
+    reason = END_OF_FILE
+
+    while True:
+        # look for the next start of message marker
+        while position + MARKER_BYTES <= n_bytes and _word(data, position) != START_OF_MESSAGE_WORD:
+            position += MARKER_BYTES
+        if position + MARKER_BYTES > n_bytes:
+            break
+
+        som = position + LANES*MARKER_BYTES
+        if (som > n_bytes
+                or _word(data, position + MARKER_BYTES) != START_OF_MESSAGE_WORD
+                or _word(data, position + 2*MARKER_BYTES) != START_OF_MESSAGE_WORD
+                or som + SOM_BYTES > n_bytes):
+            reason = BAD_SOM
+            break
+
+        end = position
+        dwell = np.float64(_word(data, som + 14*8) & np.uint64(0xFFFFFFFF)) / 160
+        first_packet = n_packets
+        packet_start = -1
+        eom = -1
+        status = MESSAGE_COMPLETE
+        position = som + SOM_BYTES
+
+        while True:
+            if position + MARKER_BYTES > n_bytes:
+                status = MESSAGE_NO_EOM
+                end = position
+                break
+
+            marker = _word(data, position)
+            if _is_unhandled(marker):
+                reason = UNHANDLED_MARKER
+                break
+
+            if marker == END_OF_MESSAGE_WORD:
+                if (position + 3*MARKER_BYTES > n_bytes
+                        or _word(data, position + MARKER_BYTES) != END_OF_MESSAGE_WORD
+                        or _word(data, position + 2*MARKER_BYTES) != END_OF_MESSAGE_WORD):
+                    reason = BAD_EOM
+                    break
+                eom = position + 3*MARKER_BYTES
+                end = min(eom + eom_bytes, n_bytes)
+                break
+
+            if marker != START_OF_PACKET_WORD:
+                # These are not the bytes we're looking for.
+                position += MARKER_BYTES
+                continue
+
+            if (position + 3*MARKER_BYTES <= n_bytes and
+                    (_word(data, position + MARKER_BYTES) != START_OF_PACKET_WORD
+                    or _word(data, position + 2*MARKER_BYTES) != START_OF_PACKET_WORD)):
+                reason = BAD_SOP
+                break
+
+            header = position + LANES*MARKER_BYTES
+            if position + PACKET_HEADER_BYTES > n_bytes:
+                status = MESSAGE_BROKEN_PACKET
+                end = n_bytes
+                break
+
+            rx_config = (_word(data, header + 6*8) & np.uint64(0x0000000000FC0000)) >> np.uint64(18)
+            packet_size = np.int64(4*(dwell*(1280/(2**rx_config))*n_beams))
+            data_end = position + PACKET_HEADER_BYTES + packet_size
+            if data_end > n_bytes:
+                status = MESSAGE_BROKEN_PACKET
+                end = n_bytes
+                break
+
+            if packet_start >= 0:
+                if n_packets <= len(packets):
+                    packets[n_packets - 1].end = position
+            if n_packets < len(packets):
+                packets[n_packets].start = position
+            packet_start = position
+            n_packets += 1
+            position = data_end
+
+        if reason != END_OF_FILE:
+            break
+
+        # the last packet runs up to the EOM marker, or the end of the message
+        if packet_start >= 0 and n_packets <= len(packets):
+            if status == MESSAGE_COMPLETE:
+                packets[n_packets - 1].end = eom - 3*MARKER_BYTES
+            elif status == MESSAGE_NO_EOM:
+                packets[n_packets - 1].end = end
+            else:
+                packets[n_packets - 1].end = position
+
+        if n_messages < len(messages):
+            message = messages[n_messages]
+            message.som = som
+            message.eom = eom
+            message.end = end
+            message.status = status
+            message.first_packet = first_packet
+            message.packet_count = n_packets - first_packet
+        n_messages += 1
+        position = end
+
+    return n_messages, n_packets, position, reason
+
+
+def index_messages(buffer, position: int, iq_type: int):
+    """
+    Builds tables of the messages and packets in `buffer` (e.g. a memory
+    mapped file), starting at byte offset `position`, without copying any
+    of the message data.
+
+    Markers are expected on 8 byte boundaries relative to `position`, as
+    they are when reading the file 8 bytes at a time.
+
+    Returns the message table, the packet table, the byte offset the walk
+    stopped at, and one of `END_OF_FILE`, `UNHANDLED_MARKER`, `BAD_SOM`,
+    `BAD_SOP` or `BAD_EOM`.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    n_beams = 3 if iq_type == 5 else 2
+    eom_bytes = 8*(21 if iq_type == 5 else 22)
+
+    n_messages, n_packets, _, _ = _walk_messages(data, position, n_beams, eom_bytes,
+            np.zeros(0, dtype=message_dtype), np.zeros(0, dtype=packet_dtype))
+
+    messages = np.zeros(n_messages, dtype=message_dtype)
+    packets = np.zeros(n_packets, dtype=packet_dtype)
+    _, _, position, reason = _walk_messages(data, position, n_beams, eom_bytes, messages, packets)
+    return messages, packets, position, reason
@@ -0,0 +1,97 @@
+import numpy as np
+
+from bip.common import arrow_manipulation
+from bip.common import iq_layout as iq_layouts
+from bip.common import numpy_manipulation
+
+LANES = 3
+MARKER_BYTES = 8
+HEADER_BYTES = 32
+
+# the packet table columns taken straight from the SOP header fields
+_header_columns = [
+    ("packet_number", "packet_number", np.uint16),
+    ("mode_tag", "mode_tag", np.uint16),
+    ("CI_number", "ci_number", np.uint32),
+    ("packet_size", "packet_size", np.uint32),
+    ("data_fmt", "data_fmt", np.uint8),
+    ("event_id", "event_id", np.uint8),
+    ("message_number", "message_number", np.uint8),
+    ("subCCI_number", "sub_cci_number", np.uint8),
+    ("BTI_number", "bti_number", np.uint16),
+    ("RF", "rf", np.uint8),
+    ("CAGC", "cagc", np.uint8),
+    ("Rx_beam_id", "rx_beam_id", np.uint8),
+    ("Rx_config", "rx_config", np.uint8),
+    ("channelizer_chan", "channelizer_chan", np.uint16),
+    ("DBF", "dbf", np.uint8),
+    ("routing_index", "routing_index", np.uint8),
+    ("packet_lane1_id", "lane1_id", np.uint8),
+    ("packet_lane2_id", "lane2_id", np.uint8),
+    ("packet_lane3_id", "lane3_id", np.uint8),
+    ("path_id", "path_id", np.uint8),
+    ("path_width", "path_width", np.uint8),
+    ("subpath_id", "subpath_id", np.uint8),
+    ("subpath_width", "subpath_width", np.uint8),
+    ("DV", "dv", np.uint8),
+    ("RS", "rs", np.uint8),
+    ("valid_channels_beams", "valid_channels_beams", np.uint8),
+    ("channels_beams_per_subpath", "channels_beams_per_subpath", np.uint8),
+]
+
+
+def packet_columns(packets: dict, som_obj, sample_rate: np.ndarray) -> dict:
+    '''
+    The columns of the packet table, but for the samples, of the packets of
+    one message given the fields of their SOP headers (as decoded by
+    `mblb.decode_packets`) and the message's SOM.
+    '''
+    count = len(sample_rate)
+    time = som_obj.time_since_epoch_us + (np.arange(count) * som_obj.dwell)
+    return {
+        "IQ_type": np.full(count, som_obj.iq_type, dtype=np.uint8),
+        "session_id": np.full(count, som_obj.session_id, dtype=np.uint8),
+        "increment": np.full(count, som_obj.increment, dtype=np.uint32),
+        "timestamp_from_filename": np.full(count, som_obj.timestamp_from_filename, dtype=np.uint64),
+        "sample_rate": sample_rate.astype(np.uint32),
+        "AFS_mode": np.full(count, som_obj.afs_mode, dtype=np.float32),
+        "SchedNum": np.full(count, som_obj.sched_num, dtype=np.float32),
+        "SIinSchedNum": np.full(count, som_obj.si_in_sched_num, dtype=np.float32),
+        "time": (time / 1000000).astype(np.float64), #us to s
+    } | {
+        column: packets[field].astype(dtype) for column, field, dtype in _header_columns
+    }
+
+
+def sample_columns(data_list: list, suffixes: tuple, iq_layout: str) -> dict:
+    '''
+    The sample columns of the packets of one message given each packet's
+    samples as an (n, 2) array of I, Q pairs with the beams, one per
+    suffix, interleaved pair by pair.  Every beam of every packet is copied
+    to one contiguous buffer per beam that the list columns are built on.
+    '''
+    beams, counts = numpy_manipulation.deinterleave(data_list, len(suffixes))
+    columns = {}
+    for suffix, samples, count in zip(suffixes, beams, counts):
+        columns |= iq_layouts.columns(samples.reshape(-1),
+                arrow_manipulation.offsets(count), iq_layout, suffix)
+    return columns
+
+
+def message_columns(packet_list: list, packets: dict, som_obj, suffixes: tuple, iq_layout: str) -> dict:
+    '''
+    The columns of the packet table of all the packets of a message, given
+    the fields of their SOP headers as decoded by `mblb.decode_packets`, for
+    a mode with a beam per suffix.
+    '''
+    sample_rate = 1280/(2**packets["rx_config"])
+    data_word_count = (2*som_obj.dwell*len(suffixes)*sample_rate).astype(np.uint64)
+
+    data_list = [np.frombuffer(stream,
+                              offset=LANES*(MARKER_BYTES+HEADER_BYTES),
+                              count=count,
+                              dtype = np.int16).reshape((-1, 2))
+                 for stream, count in zip(packet_list, data_word_count.tolist())]
+
+    return packet_columns(packets, som_obj, sample_rate) \
+            | sample_columns(data_list, suffixes, iq_layout)
@@ -6,11 +6,14 @@ import numpy as np
 import pyarrow as pa
 
 from bip import non_vita
+from bip.common import iq_layout as iq_layouts
+from bip.common.mapped_stream import MappedStream
 
 from . __version__ import __version__ as version
 from . import header
 from . message_data import ProcessMessage
 from . import message_data
+from . import message_index
 from bip.non_vita import mblb
 
 MESSAGE_FILENAME="message_content"
@@ -27,6 +30,47 @@ MARKER_BYTES = 8
 HEADER_BYTES = 32
 IQ0_EOM_BYTES = 22
 IQ5_EOM_BYTES = 21
+MESSAGE_BATCH = 100
+
+# the message table columns taken from the SOM and EOM fields
+_som_columns = [
+    ("SOM_lane1_id", "lane1_id", np.uint8),
+    ("SOM_lane2_id", "lane2_id", np.uint8),
+    ("SOM_lane3_id", "lane3_id", np.uint8),
+    ("CI_number", "ci_number", np.uint32),
+    ("SOM_message_number", "message_number", np.uint8),
+    ("SOM_SI_number", "si_number", np.uint8),
+    ("SOM_path_id", "path_id", np.uint8),
+    ("SOM_path_width", "path_width", np.uint8),
+    ("SOM_subpath_id", "subpath_id", np.uint8),
+    ("SOM_subpath_width", "subpath_width", np.uint8),
+    ("BE", "be", np.uint8),
+    ("Beam_select", "beam_select", np.uint8),
+    ("AFS_mode", "afs_mode", np.uint8),
+    ("High_gain", "high_gain", np.uint32),
+    ("Schedule_number", "sched_num", np.uint16),
+    ("SI_in_schedule_number", "si_in_sched_num", np.uint16),
+    ("Event_start_time", "event_start_time_us", np.uint64),
+    ("message_time", "time_since_epoch_us", np.uint64),
+    ("BTI_length", "bti_length", np.uint32),
+    ("Dwell", "dwell", np.uint32),
+    ("Frequency_Message", "freq_ghz", np.float32),
+]
+_eom_columns = [
+    ("Packet_Count", "packet_count", np.uint16),
+    ("EOM_CI_number", "ci_number", np.uint32),
+    ("Error_status", "error_status", np.uint64),
+    ("EOM_message_number", "message_number", np.uint16),
+    ("SubCCI_number", "sub_cci_number", np.uint16),
+    ("CRC", "crc", np.uint64),
+    ("EOM_lane1_id", "lane1_id", np.uint16),
+    ("EOM_lane2_id", "lane2_id", np.uint16),
+    ("EOM_lane3_id", "lane3_id", np.uint16),
+    ("EOM_path_id", "path_id", np.uint16),
+    ("EOM_path_width", "path_width", np.uint16),
+    ("EOM_subpath_id", "subpath_id", np.uint8),
+    ("EOM_subpath_width", "subpath_width", np.uint8),
+]
 
 class Parser:
     options: dict
@@ -53,6 +97,7 @@ class Parser:
 
 
         self.options = kwargs
+        self.use_mmap = kwargs.get("mmap", False)
         self._bytes_read = 0
         self._packets_read = 0
         self._messages_read = 0
@@ -96,7 +141,8 @@ class Parser:
                 self._recorder,
                 options = self._recorder_options,
                 batch_size = 10,
-                iq_type = iq_type)
+                iq_type = iq_type,
+                iq_layout = self.options.get("iq_layout") or iq_layouts.SPLIT)
         self.options["message_data"] = {
                 "filename": message_data_filename
         } | self.message_processor.metadata
@@ -106,10 +152,21 @@ class Parser:
             schema= pa.schema([(e[0], e[1]) for e in message_data._message_schema]),
             options=self._recorder_options,
             batch_size=10)
+        self._pending_messages = []
 
 
     def close_recorder(self):
-        if self.message_recorder != None:
+        if self.message_recorder is not None:
+            self._flush_messages()
+            self.message_recorder.close()
+
+    def close(self):
+        """
+        Closes every recorder, writing out whatever is left in their batches.
+        """
+        if hasattr(self, "message_processor"):
+            self.message_processor.close()
+            self._flush_messages()
             self.message_recorder.close()
 
 
@@ -216,56 +273,102 @@ class Parser:
         self._bytes_read += bytes_read + message_size + 16 + (eom_length*8)
         return message, som_obj
 
+    def parse_messages(self, stream: MappedStream, progress_bar=None):
+        '''
+        Process the messages of a mapped stream from the current position.
+
+        The messages are found with a single pass over the mapped file and
+        the packets are handed to the message processor as views of the
+        file, so the message body is never copied.
+        '''
+        buffer = stream.buffer
+        messages, packets, position, reason = message_index.index_messages(
+                buffer, stream.tell(), self._iq_type)
+        eom_bytes = self._eom_length*8
+        last_read = 0
+
+        for som, eom, end, status, first_packet, packet_count in messages.tolist():
+            som_obj = mblb.MblbSOM(buffer[som:som + message_index.SOM_BYTES], self._timestamp, self._iq_type, self._session_id, self._increment, self._timestamp_from_filename)
+            self._message_key = som_obj.message_key
+
+            if status == message_index.MESSAGE_NO_EOM:
+                print('Message is broken: no EOM found')
+            elif status == message_index.MESSAGE_BROKEN_PACKET:
+                print('Message is broken: the packet data is incomplete')
+
+            if eom < 0:
+                end_of_message = bytearray(eom_bytes)
+            else:
+                end_of_message = buffer[eom:eom + eom_bytes]
+                if len(end_of_message) != eom_bytes:
+                    end_of_message = bytes(end_of_message).ljust(eom_bytes, b'\0')
+            self.__add_record(som_obj, mblb.MblbEOM(end_of_message))
+
+            packet_rows = packets[first_packet:first_packet + packet_count]
+            packet_list = [buffer[start:stop] for start, stop in packet_rows.tolist()]
+            num_packets = self.message_processor.process_packets(packet_list, som_obj)
+
+            self._messages_read += 1
+            self._packets_read += num_packets
+            self._bytes_read = end
+            if progress_bar is not None:
+                progress_bar.update(self._bytes_read - last_read)
+                last_read = self._bytes_read
+
+        stream.seek(position)
+        if reason == message_index.UNHANDLED_MARKER:
+            print("This bin file contains unhandled markers")
+            return
+        if reason == message_index.BAD_SOM:
+            raise RuntimeError("unexpected SOM format")
+        if reason == message_index.BAD_SOP:
+            raise RuntimeError("unexpected SOP format")
+        if reason == message_index.BAD_EOM:
+            raise RuntimeError("unexpected EOM format")
+
+        self.close_recorder()
+
     def __add_record(self,
             message: mblb.MblbSOM,
             end: mblb.MblbEOM
             ):
         '''
-        Add a row to the message_content parquet
+        Queue a row of the message_content parquet, the rows are decoded
+        and recorded MESSAGE_BATCH messages at a time
         '''
         assert isinstance(message, mblb.MblbSOM)
         assert isinstance(end, mblb.MblbEOM)
 
-        self.message_recorder.add_record({
-            "IQ_type": np.uint8(message.iq_type),
-            "session_id": np.uint8(message.session_id),
-            "increment": np.uint32(message.increment),
-            "timestamp_from_filename": np.uint64(message.timestamp_from_filename),
-            "SOM_lane1_id": np.uint8(message.lane1_id),
-            "SOM_lane2_id": np.uint8(message.lane2_id),
-            "SOM_lane3_id": np.uint8(message.lane3_id),
-            "CI_number": np.uint32(message.ci_number),
-            "message_key": str(message.message_key),
-            "SOM_message_number": np.uint8(message.message_number),
-            "SOM_SI_number": np.uint8(message.si_number),
-            "SOM_path_id": np.uint8(message.path_id),
-            "SOM_path_width": np.uint8(message.path_width),
-            "SOM_subpath_id": np.uint8(message.subpath_id),
-            "SOM_subpath_width": np.uint8(message.subpath_width),
-            "BE": np.uint8(message.be),
-            "Beam_select": np.uint8(message.beam_select),
-            "AFS_mode": np.uint8(message.afs_mode),
-            "High_gain": np.uint32(message.high_gain),
-            "Schedule_number": np.uint16(message.sched_num),
-            "SI_in_schedule_number": np.uint16(message.si_in_sched_num),
-            "Event_start_time": np.uint64(message.event_start_time_us),
-            "message_time": np.uint64(message.time_since_epoch_us),
-            "BTI_length": np.uint32(message.bti_length),
-            "Dwell": np.uint32(message.dwell),
-            "Frequency_Message": np.float32(message.freq_ghz),
-            "Packet_Count": np.uint16(end.packet_count),
-            "EOM_CI_number": np.uint32(end.ci_number),
-            "Error_status": np.uint64(end.error_status),
-            "EOM_message_number": np.uint16(end.message_number),
-            "SubCCI_number": np.uint16(end.sub_cci_number),
-            "CRC": np.uint64(end.crc),
-            "EOM_lane1_id": np.uint16(end.lane1_id),
-            "EOM_lane2_id": np.uint16(end.lane2_id),
-            "EOM_lane3_id": np.uint16(end.lane3_id),
-            "EOM_path_id": np.uint16(end.path_id),
-            "EOM_path_width": np.uint16(end.path_width),
-            "EOM_subpath_id": np.uint8(end.subpath_id),
-            "EOM_subpath_width": np.uint8(end.subpath_width)
+        self._pending_messages.append((message, end))
+        if len(self._pending_messages) >= MESSAGE_BATCH:
+            self._flush_messages()
+
+    def _flush_messages(self):
+        '''
+        Decode the headers of the queued messages all at once and add them
+        to the message_content parquet
+        '''
+        if not self._pending_messages:
+            return
+        messages, ends = zip(*self._pending_messages)
+        self._pending_messages = []
+
+        som = mblb.decode_som(
+                mblb.stack_words([m._payload for m in messages], mblb.SOM_WORDS),
+                np.array([m._timestamp for m in messages]))
+        eom = mblb.decode_eom(
+                mblb.stack_words([e._payload for e in ends], mblb.EOM_WORDS))
+
+        self.message_recorder.add_batch({
+            "IQ_type": np.array([m.iq_type for m in messages]).astype(np.uint8),
+            "session_id": np.array([m.session_id for m in messages]).astype(np.uint8),
+            "increment": np.array([m.increment for m in messages]).astype(np.uint32),
+            "timestamp_from_filename": np.array([m.timestamp_from_filename for m in messages]).astype(np.uint64),
+            "message_key": [str(m.message_key) for m in messages],
+        } | {
+            column: som[field].astype(dtype) for column, field, dtype in _som_columns
+        } | {
+            column: eom[field].astype(dtype) for column, field, dtype in _eom_columns
         })
 
     def parse_stream(self, stream: RawIOBase, progress_bar=None):
@@ -275,6 +378,9 @@ class Parser:
         if progress_bar is not None:
             last_read = 0
 
+        if self.use_mmap:
+            stream = MappedStream.from_stream(stream)
+
         num_bytes_read, orphan_packet_list, self._timestamp, self._iq_type, self._session_id, self._increment, self._timestamp_from_filename = header.read_first_header(stream)
 
         if self._iq_type == 5:
@@ -286,6 +392,11 @@ class Parser:
 
         self.message_processor.process_orphan_packets(orphan_packet_list, self._iq_type, self._session_id, self._increment, self._timestamp_from_filename)
 
+        if isinstance(stream, MappedStream):
+            self.parse_messages(stream, progress_bar)
+            self.close()
+            return
+
         msg_words, som_obj = self.read_message(stream) #bytearray of the whole message
         while msg_words:
 
@@ -298,3 +409,5 @@ class Parser:
 
             msg_words, som_obj = self.read_message(stream)
 
+
+        self.close()
@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+
+BLOB_EXTENSION = "bin"
+
+_schema = [
+    ("frame_count", pa.uint32()),
+    ("frame_size", pa.uint32()),
+    ("start_bytes", pa.uint64()),
+    ("frame_index", pa.uint32()),
+    ("offset", pa.uint64(), "bytes"),
+    ("length", pa.uint64(), "bytes"),
+    ("reason", pa.string()),
+]
+
+def _schema_elt(e: tuple) -> dict:
+    if len(e) > 2:
+        return {
+                "name": e[0],
+                "type": str(e[1]),
+                "unit": str(e[2]) if e[2] is not None else None
+                }
+    else:
+        return {
+                "name": e[0],
+                "type": str(e[1]),
+                }
+
+schema = [ _schema_elt(e) for e in _schema ]
+
+
+class BadPackets:
+    """
+    Records where in the input file the frames and packets that could not be
+    parsed are, and why, rather than their bytes: `offset` and `length` are
+    the byte range of the packet in the input file.
+
+    With `blob_path` the bytes are also appended to that file, one packet
+    after another, so the bytes of the n-th row start at the sum of the
+    `length`s of the rows before it.
+    """
+    def __init__(self,
+            output_path: Path,
+            Recorder: type,
+            recorder_opts: dict = None,
+            batch_size: int = 1000,
+            blob_path: Path = None,
+            **kwargs):
+
+        if recorder_opts is None:
+            recorder_opts = {}
+
+        self.recorder = Recorder(
+                output_path,
+                schema=pa.schema([(e[0], e[1]) for e in _schema]),
+                options=recorder_opts,
+                batch_size=batch_size)
+
+        self.blob_path = blob_path
+        self._blob = open(blob_path, "wb", buffering=1 << 20) if blob_path is not None else None
+        self.count = 0
+
+    def add(self,
+            payload: bytes,
+            reason: str,
+            *,
+            offset: int,
+            frame_count: int,
+            frame_size: int,
+            start_bytes: int,
+            frame_index: int
+            ):
+        self.recorder.add_record({
+            "frame_count": np.uint32(frame_count),
+            "frame_size": np.uint32(frame_size),
+            "start_bytes": np.uint64(start_bytes),
+            "frame_index": np.uint32(frame_index),
+            "offset": np.uint64(offset),
+            "length": np.uint64(len(payload)),
+            "reason": reason,
+        })
+        if self._blob is not None:
+            self._blob.write(payload)
+        self.count += 1
+
+    def close(self):
+        self.recorder.close()
+        if self._blob is not None:
+            self._blob.close()
+            self._blob = None
+
+    @property
+    def metadata(self) -> dict:
+        return self.recorder.metadata | {
+                "schema": schema,
+                "blob": self.blob_path.name if self.blob_path is not None else None,
+        }
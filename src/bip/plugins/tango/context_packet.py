@@ -341,13 +341,147 @@ class _ContextPacket(ContextPacket):
             self.context_packet_key=context_key
 
 
+# the words of a context packet that are decoded, the 3 after them are
+# frame align pad
+CONTEXT_WORDS = 46
+
+# the header, class id, timestamp codes and CIF words every context packet
+# is expected to have, as (word, mask, expected value, what is checked).
+#
+# TODO: the cif0 disagrees with the spec which has
+#       cif0: 00111000 10100100 00010000 00001110
+SIGNATURE = [
+    (3, 0xFFFF0000, 1 << 16, "information class code"),
+    (3, 0x0000FFFF, 2, "packet class code"),
+    (0, 0x00C00000, 0b10 << 22, "tsi"), # GPS time
+    (0, 0x00300000, 0b10 << 20, "tsf"), # real-time (ps) timestamp
+    (7, 0xFFFFFFFF, 0b00111000101001000000000000001110, "cif0"),
+    (8, 0xFFFFFFFF, 0b11010011000000000000000000010000, "cif1"),
+    (9, 0xFFFFFFFF, 0b00000000000000000000000110000000, "cif2"),
+    (10, 0xFFFFFFFF, 0b00000001110000000000000000000000, "cif3"),
+]
+# the words the signature covers
+SIGNATURE_WORDS = max(word for word, *_ in SIGNATURE) + 1
+
+
+def check_signature(words: np.ndarray) -> np.ndarray:
+    """
+    Which of the rows of the matrix `words` do not have the `SIGNATURE` of
+    the context packets this parser handles.
+    """
+    word, mask, expected = (np.array(column) for column in list(zip(*SIGNATURE))[:3])
+    return ((words[:, word] & mask.astype(np.uint32)) != expected.astype(np.uint32)).any(axis=1)
+
+
+def _int16(words: np.ndarray, high: bool = False) -> np.ndarray:
+    # the lower (or upper) 16 bits of each word, two's complement
+    return ((words >> 16) if high else (words & 0xFFFF)).astype(np.uint16).view(np.int16)
+
+
+def _int64(words: np.ndarray, first: int) -> np.ndarray:
+    return np.ascontiguousarray(words[:, first:first + 2]).view(np.int64)[:, 0]
+
+
+def _float64(words: np.ndarray, first: int) -> np.ndarray:
+    return np.ascontiguousarray(words[:, first:first + 2]).view(np.float64)[:, 0]
+
+
+def decode_context(words: np.ndarray) -> dict:
+    """
+    The fields of a matrix of context packets, a row of (at least)
+    `CONTEXT_WORDS` words per packet, as column arrays; see `_ContextPacket`
+    for the layout and scaling of each field.
+    """
+    header = words[:, 0]
+    tsi, tsf0, tsf1 = words[:, 4], words[:, 5], words[:, 6]
+    pointing = words[:, 24]
+    return {
+        "packet_size": (header & 0xFFFF) + 1,
+        "packet_count": (header >> 16) & 0xF,
+        "tsfd": (header >> 20) & 0x3,
+        "tsid": (header >> 22) & 0x3,
+        "indicators": (header >> 24) & 0x7,
+        "packet_type": header >> 28,
+
+        "tsi": tsi,
+        "tsf0": tsf0,
+        "tsf1": tsf1,
+        "time": bit_manipulation.times(tsi, tsf0, tsf1),
+
+        "stream_id": words[:, 1],
+        "classid0": words[:, 2],
+        "classid1": words[:, 3],
+        "classid_pad_bit_count": words[:, 2] >> 27,
+        "classid_oui": words[:, 2] & 0xFFFFFF,
+        "classid_information_class_code": words[:, 3] >> 16,
+        "classid_packet_class_code": words[:, 3] & 0xFFFF,
+
+        "cif0": words[:, 7],
+        "cif1": words[:, 8],
+        "cif2": words[:, 9],
+        "cif3": words[:, 10],
+
+        "bandwidth": _int64(words, 11) * (2**-20) * (1e-6),
+        "if_reference_freq": _int64(words, 13) * (2**-20) * (1e-9),
+        "rf_reference_freq": _int64(words, 15) * (2**-20) * (1e-9),
+
+        "gain1": _int16(words[:, 17]) * (2**-7),
+        "gain2": _int16(words[:, 17], high=True) * (2**-7),
+
+        "sample_rate": _int64(words, 18) * (2**-20) * (1e-6),
+        "temperature": _int16(words[:, 20]) * (2**-6),
+        "phase_offset": _int16(words[:, 21]) * (2**-7),
+        "ellipticity": _int16(words[:, 22]) * (2**-13),
+        "tilt": _int16(words[:, 22], high=True) * (2**-13),
+
+        "array_size": words[:, 23],
+        "header_size": pointing >> 24,
+        "num_words_per_rec": (pointing >> 12) & 0xFFF,
+        "num_records": pointing & 0xFFF,
+
+        "ecef_0": _float64(words, 25),
+        "ecef_1": _float64(words, 27),
+        "ecef_2": _float64(words, 29),
+
+        "azimuthal_angle_0": _int16(words[:, 31]) * (2**-7),
+        "elevation_angle_0": _int16(words[:, 31], high=True) * (2**-7),
+
+        "steering_mode_0": words[:, 32],
+        "reserved_0": words[:, 33],
+        "reserved_1": words[:, 34],
+
+        "beam_width_vert": (words[:, 35] >> 16) * (2**-7),
+        "beam_width_horiz": (words[:, 35] & 0xFFFF) * (2**-7),
+        "range": words[:, 36] * (2**-6),
+        "health_status": words[:, 37],
+        "mode_id": words[:, 38],
+        "event_id": words[:, 39],
+
+        "pulse_width": _int64(words, 40) * (1e-15),
+        "pri": _int64(words, 42) * (1e-15),
+        "duration": _int64(words, 44) * (1e-15),
+    }
+
+
+def _context_key(context_key: str, stream_id: int) -> str:
+    if ("{stream_id}" in context_key):
+        return context_key.format(stream_id=stream_id)
+    return context_key
+
+
 class Context:
     def __init__(self,
             output_path: Path,
             Recorder: type,
             recorder_opts: dict = None,
             batch_size: int = 1000,
+            bad_packet_sink = None,
             **kwargs):
+        """
+        Records the context packets, decoding `batch_size` of them at a
+        time.  Packets without the expected `SIGNATURE` are recorded to
+        `bad_packet_sink` (a `BadPackets`) rather than the context table.
+        """
 
         if recorder_opts is None:
             recorder_opts = {}
@@ -358,102 +492,81 @@ class Context:
                 options=recorder_opts,
                 batch_size=batch_size)
 
+        self.bad_packet_sink = bad_packet_sink
+        self.batch_size = batch_size
         self.packet_id = 0
-
-    def add_record(self,
-            packet: _ContextPacket,
-            *,
-            frame_index: int,
-            packet_index: int):
-        assert isinstance(packet, _ContextPacket)
-        header = packet.packet_header
-
-        self.recorder.add_record({
-            "packet_id": np.uint32(self.packet_id),
-
-            "packet_size": np.uint16(header.packet_size + 1),
-            "packet_count": np.uint16(header.packet_count),
-            "tsfd": np.uint8(header.tsf),
-            "tsid": np.uint8(header.tsi),
-            "indicators": np.uint8(header.indicators),
-            "packet_type": np.uint8(header.packet_type),
-
-            "tsi": np.uint32(packet.integer_timestamp),
-            "tsf0": np.uint32(packet.fractional_timestamp[0]),
-            "tsf1": np.uint32(packet.fractional_timestamp[1]),
-            "time": np.float64(packet.time),
-
-            "stream_id": np.uint32(packet.stream_id),
-            "classid0": np.uint32(packet.class_id._data[0]),
-            "classid1": np.uint32(packet.class_id._data[1]),
-            "classid_pad_bit_count": np.uint8(packet.class_id.pad_bit_count),
-            "classid_oui": np.uint32(packet.class_id.oui),
-            "classid_information_class_code": np.uint16(packet.class_id.information_class_code),
-            "classid_packet_class_code": np.uint16(packet.class_id.packet_class_code),
-
-            "cif0": np.uint32(packet.cif0),
-            "cif1": np.uint32(packet.cif1),
-            "cif2": np.uint32(packet.cif2),
-            "cif3": np.uint32(packet.cif3),
-
-            "bandwidth": np.float64(packet.bandwidth),
-            "if_reference_freq": np.float64(packet.if_reference_freq),
-            "rf_reference_freq": np.float64(packet.rf_reference_freq),
-
-            "gain1": np.float32(packet.gain1),
-            "gain2": np.float32(packet.gain2),
-
-            "sample_rate": np.float64(packet.sample_rate),
-            "temperature": np.float32(packet.temperature),
-            "phase_offset": np.float32(packet.phase_offset),
-            "ellipticity": np.float32(packet.ellipticity),
-            "tilt": np.float32(packet.tilt),
-
-            "array_size": np.uint32(packet.array_size),
-            "num_records": np.uint32(packet.num_records),
-            "num_words_per_rec": np.uint32(packet.num_words_per_rec),
-            "header_size": np.uint32(packet.header_size),
-
-            "ecef_0": np.float64(packet.ecef_0),
-            "ecef_1": np.float64(packet.ecef_1),
-            "ecef_2": np.float64(packet.ecef_2),
-
-            "azimuthal_angle_0": np.float32(packet.azimuthal_angle_0),
-            "elevation_angle_0": np.float32(packet.elevation_angle_0),
-
-            "steering_mode_0": np.uint32(packet.steering_mode_0),
-            "reserved_0": np.uint32(packet.reserved_0),
-            "reserved_1": np.uint32(packet.reserved_0),
-
-            "beam_width_vert": np.float32(packet.beam_width_vert),
-            "beam_width_horiz": np.float32(packet.beam_width_horiz),
-            "range": np.float32(packet.range),
-            "health_status": np.uint32(packet.health_status),
-            "mode_id": np.uint32(packet.mode_id),
-            "event_id": np.uint32(packet.event_id),
-            "pulse_width": np.float64(packet.pulse_width),
-            "pri": np.float64(packet.pri),
-            "duration": np.float64(packet.duration),
-
-            "frame_index": np.uint32(frame_index),
-            "packet_index": np.uint32(frame_index),
-
-            "local_context_key": packet.context_packet_key
-        })
+        self.bad_packets = 0
+        self._pending = []
+
+    def _record_bad(self, payload, reason: str, bad_packet_info: dict):
+        if self.bad_packet_sink is None:
+            raise ValueError(f"bad context packet: {reason}")
+        self.bad_packet_sink.add(payload, reason, **(bad_packet_info or {}))
+        self.bad_packets += 1
+
+    def _flush(self):
+        if not self._pending:
+            return
+        payloads, packet_ids, frame_indexes, keys = zip(*self._pending)
+        self._pending = []
+
+        words = np.frombuffer(b"".join(p[:4*CONTEXT_WORDS] for p in payloads),
+                dtype=np.uint32).reshape((-1, CONTEXT_WORDS))
+        fields = decode_context(words)
+        frame_index = np.array(frame_indexes, dtype=np.uint32)
+        stream_ids = fields["stream_id"].tolist()
+
+        columns = {
+            "packet_id": np.array(packet_ids, dtype=np.uint32),
+        } | {
+            name: fields[name].astype(type_.to_pandas_dtype())
+            for name, type_, _ in _schema if name in fields
+        } | {
+            # as the packets have always been recorded, reserved_1 repeats
+            # reserved_0 and packet_index is the frame index
+            "reserved_1": fields["reserved_0"].astype(np.uint32),
+            "frame_index": frame_index,
+            "packet_index": frame_index,
+            "local_context_key": [
+                _context_key(key, stream_id)
+                for key, stream_id in zip(keys, stream_ids)
+            ],
+        }
+        self.recorder.add_batch(columns)
 
     def process(self,
             payload: bytes,
             *,
             frame_index: int,
             packet_index: int,
-            context_packet_key: str = ""):
-        self.add_record(_ContextPacket(payload, context_packet_key),
-                frame_index=frame_index,
-                packet_index=packet_index)
+            context_packet_key: str = "",
+            bad_packet_info: dict = None) -> bool:
+        """
+        Queues a context packet, returning whether it was good.  A bad
+        packet is recorded to the `bad_packet_sink`, with the keyword
+        arguments of `BadPackets.add` in `bad_packet_info` locating it in
+        the input.
+        """
+        packet_id = self.packet_id
         self.packet_id += 1
+        if len(payload) < 4*CONTEXT_WORDS:
+            self._record_bad(bytes(payload),
+                    f"context packet of {len(payload)} bytes, expected {4*CONTEXT_WORDS}",
+                    bad_packet_info)
+            return False
+        if check_signature(np.frombuffer(payload, dtype=np.uint32, count=SIGNATURE_WORDS)[None])[0]:
+            self._record_bad(bytes(payload), "unexpected context packet signature", bad_packet_info)
+            return False
+
+        self._pending.append((bytes(payload), packet_id, frame_index, context_packet_key))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        return True
+
+    def close(self):
+        self._flush()
+        self.recorder.close()
 
     @property
     def metadata(self) -> dict :
         return self.recorder.metadata | {"schema": schema}
-
-
@@ -2,8 +2,11 @@ import struct
 from io import (RawIOBase, SEEK_SET)
 from typing import Tuple, Optional
 
+import numba
+import numpy as np
 import pyarrow as pa
 
+from bip.common import numpy_manipulation
 
 schema = pa.schema([
     ("frame_count", pa.uint32()),
@@ -12,6 +15,26 @@ schema = pa.schema([
     ("frame_index", pa.uint32())
 ])
 
+PLRV_WORD = int.from_bytes(bytes("PLRV", encoding="ascii"), byteorder="little")
+DNEV_WORD = int.from_bytes(bytes("DNEV", encoding="ascii"), byteorder="little")
+DEADBEEF_WORD = 0xDEADBEEF
+
+# Frame status codes used in the frame index
+FRAME_OK = 0
+FRAME_INCOMPLETE = 1     # declared frame runs past the end of the file
+FRAME_TOO_LARGE = 2      # DNEV found before the declared end of the frame
+FRAME_TOO_SMALL = 3      # no DNEV at the declared end, frame runs to the next DNEV
+
+index_dtype = np.dtype([
+    ("start", np.uint64),       # byte offset of the PLRV word
+    ("frame_count", np.uint32),
+    ("frame_size", np.uint32),  # declared frame size in words
+    ("length", np.uint64),      # actual frame length in bytes, PLRV to DNEV
+    ("status", np.uint8),
+    ("well_formed", np.bool_),
+    ("deadbeef", np.uint32),    # DEADBEEF words inside the frame, when cleaning
+])
+
 def unpack_header(header_bytes: bytes):
     assert len(header_bytes) == 4
     header = int.from_bytes(header_bytes, byteorder="little", signed=False)
@@ -84,3 +107,110 @@ def first_header(stream: RawIOBase):
     stream.seek(offset, SEEK_SET)
     return offset
 
+
+
+@numba.jit(nopython=True)
+def _skip_deadbeef(deadbeef, begin, end):
+    """
+    Moves `end` out until `[begin, end)` holds as many words that are not
+    DEADBEEF as it held words to begin with.
+    """
+    n_words = end - begin
+    first = np.searchsorted(deadbeef, begin)
+    while True:
+        new_end = begin + n_words + (np.searchsorted(deadbeef, end) - first)
+        if new_end == end:
+            return end
+        end = new_end
+
+
+@numba.jit(nopython=True)
+def _walk_frames(words, plrv, dnev, deadbeef):
+    n_words = len(words)
+    starts = np.zeros(len(plrv), dtype=np.int64)
+    ends = np.zeros(len(plrv), dtype=np.int64)
+    headers = np.zeros(len(plrv), dtype=np.uint32)
+    status = np.zeros(len(plrv), dtype=np.uint8)
+
+    n_frames = 0
+    position = 0
+    while True:
+        i = np.searchsorted(plrv, position)
+        if i >= len(plrv):
+            break
+        start = plrv[i]
+        if start + 1 >= n_words:
+            break
+
+        header = words[start + 1]
+        declared_end = start + np.int64(header & 0xFFFFF)
+        if len(deadbeef) > 0 and declared_end > start + 2:
+            # the declared size does not count the DEADBEEF words
+            declared_end = _skip_deadbeef(deadbeef, start + 2, declared_end)
+
+        if declared_end > n_words:
+            end = n_words
+            code = FRAME_INCOMPLETE
+        elif declared_end >= start + 3 and words[declared_end - 1] == DNEV_WORD:
+            end = declared_end
+            code = FRAME_OK
+        else:
+            j = np.searchsorted(dnev, start + 2)
+            if j < len(dnev) and dnev[j] < declared_end - 1:
+                end = dnev[j] + 1
+                code = FRAME_TOO_LARGE
+            elif j < len(dnev):
+                end = dnev[j] + 1
+                code = FRAME_TOO_SMALL
+            else:
+                end = n_words
+                code = FRAME_TOO_SMALL
+
+        starts[n_frames] = start
+        ends[n_frames] = end
+        headers[n_frames] = header
+        status[n_frames] = code
+        n_frames += 1
+        position = end
+
+    return starts[:n_frames], ends[:n_frames], headers[:n_frames], status[:n_frames]
+
+
+def index_frames(buffer, clean: bool = False) -> np.ndarray:
+    """
+    Builds a table of every frame in `buffer` (e.g. a memory mapped file).
+
+    Frames are found by following the declared frame sizes from one `PLRV`
+    word to the next, skipping anything between frames, the same way
+    `read_header` does.  Frames whose declared size does not line up with a
+    `DNEV` trailer are sized the way `Parser.read_packet` sizes them, and
+    flagged with one of the `FRAME_*` status codes.
+
+    With `clean`, DEADBEEF words inside a frame are not counted towards its
+    declared size, and the number of them is kept in the `deadbeef` column.
+
+    Frames are assumed to be word aligned.
+    """
+    size_bytes = len(buffer)
+    words = np.frombuffer(buffer, dtype=np.uint32, count=size_bytes // 4)
+
+    patterns = [b"PLRV", b"DNEV"]
+    if clean:
+        patterns.append(DEADBEEF_WORD.to_bytes(4, byteorder="little"))
+    plrv, dnev, *deadbeef = numpy_manipulation.find_markers(buffer, patterns, alignment=4)
+    deadbeef = deadbeef[0] // 4 if clean else np.zeros(0, dtype=np.int64)
+    starts, ends, headers, status = _walk_frames(words, plrv // 4, dnev // 4, deadbeef)
+
+    frames = np.zeros(len(starts), dtype=index_dtype)
+    frames["start"] = 4 * starts
+    frames["frame_count"] = headers >> 20
+    frames["frame_size"] = headers & 0xFFFFF
+    frames["length"] = 4 * (ends - starts)
+    frames["status"] = status
+    frames["well_formed"] = status == FRAME_OK
+    frames["deadbeef"] = np.searchsorted(deadbeef, ends) - np.searchsorted(deadbeef, starts + 2)
+
+    # an incomplete frame takes whatever is left of the file
+    incomplete = status == FRAME_INCOMPLETE
+    frames["length"][incomplete] = size_bytes - frames["start"][incomplete]
+    return frames
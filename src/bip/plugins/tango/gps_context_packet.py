@@ -5,6 +5,7 @@ import pyarrow as pa
 import numpy as np
 
 from bip.vita import ContextPacket
+from bip.common import arrow_manipulation
 
 UNIT_ANGLE = "rad"
 UNIT_ANGLE_VEL = "rad/s"
@@ -27,34 +28,62 @@ _schema = [
     ("classid_information_class_code", pa.uint16(), None),
     ("classid_packet_class_code", pa.uint16(), None),
 
-    ("system_status", pa.list_(pa.uint16(), -1), None),
-    ("filter_status", pa.list_(pa.uint16(), -1), None),
-    ("unix_time_seconds", pa.list_(pa.uint32(), -1), "sec"),
-    ("microseconds", pa.list_(pa.uint32(), -1), "usec"),
-    ("latitude", pa.list_(pa.float64(), -1), UNIT_ANGLE),
-    ("longitude", pa.list_(pa.float64(), -1), UNIT_ANGLE),
-    ("altitude", pa.list_(pa.float64(), -1), UNIT_LEN),
-    ("velocity_0", pa.list_(pa.float32(), -1), UNIT_VEL),
-    ("velocity_1", pa.list_(pa.float32(), -1), UNIT_VEL),
-    ("velocity_2", pa.list_(pa.float32(), -1), UNIT_VEL),
-    ("acceleration_0", pa.list_(pa.float32(), -1), UNIT_ACCEL),
-    ("acceleration_1", pa.list_(pa.float32(), -1), UNIT_ACCEL),
-    ("acceleration_2", pa.list_(pa.float32(), -1), UNIT_ACCEL),
-    ("gforce", pa.list_(pa.float32(), -1), "g"),
-    ("attitude_0", pa.list_(pa.float32(), -1), UNIT_ANGLE),
-    ("attitude_1", pa.list_(pa.float32(), -1), UNIT_ANGLE),
-    ("attitude_2", pa.list_(pa.float32(), -1), UNIT_ANGLE),
-    ("attitude_rate_0", pa.list_(pa.float32(), -1), UNIT_ANGLE_VEL),
-    ("attitude_rate_1", pa.list_(pa.float32(), -1), UNIT_ANGLE_VEL),
-    ("attitude_rate_2", pa.list_(pa.float32(), -1), UNIT_ANGLE_VEL),
-    ("latitude_std_dev", pa.list_(pa.float32(), -1), UNIT_LEN),
-    ("longitude_std_dev", pa.list_(pa.float32(), -1), UNIT_LEN),
-    ("altitude_std_dev", pa.list_(pa.float32(), -1), UNIT_LEN),
-
     ("frame_index", pa.uint32(),None),
     ("packet_index", pa.uint32(),None),
 ]
 
+# The GPS Context packet contains 25 navigational structures each containing
+# the following 23 fields, 25 words per structure.  The navigational
+# structures appear starting at word 4 after the header, stream id, and 2
+# word class id
+NAV_RECORDS = 25
+NAV_WORDS = 25
+NAV_START_WORD = 4
+GPS_CONTEXT_WORDS = NAV_START_WORD + NAV_RECORDS*NAV_WORDS
+
+_nav_fields = [
+    ("system_status", pa.uint16(), None),
+    ("filter_status", pa.uint16(), None),
+    ("unix_time_seconds", pa.uint32(), "sec"),
+    ("microseconds", pa.uint32(), "usec"),
+    ("latitude", pa.float64(), UNIT_ANGLE),
+    ("longitude", pa.float64(), UNIT_ANGLE),
+    ("altitude", pa.float64(), UNIT_LEN),
+    ("velocity_0", pa.float32(), UNIT_VEL),
+    ("velocity_1", pa.float32(), UNIT_VEL),
+    ("velocity_2", pa.float32(), UNIT_VEL),
+    ("acceleration_0", pa.float32(), UNIT_ACCEL),
+    ("acceleration_1", pa.float32(), UNIT_ACCEL),
+    ("acceleration_2", pa.float32(), UNIT_ACCEL),
+    ("gforce", pa.float32(), "g"),
+    ("attitude_0", pa.float32(), UNIT_ANGLE),
+    ("attitude_1", pa.float32(), UNIT_ANGLE),
+    ("attitude_2", pa.float32(), UNIT_ANGLE),
+    ("attitude_rate_0", pa.float32(), UNIT_ANGLE_VEL),
+    ("attitude_rate_1", pa.float32(), UNIT_ANGLE_VEL),
+    ("attitude_rate_2", pa.float32(), UNIT_ANGLE_VEL),
+    ("latitude_std_dev", pa.float32(), UNIT_LEN),
+    ("longitude_std_dev", pa.float32(), UNIT_LEN),
+    ("altitude_std_dev", pa.float32(), UNIT_LEN),
+]
+
+# one navigational structure; the fields are packed, so the float64s sit on
+# 4 byte boundaries
+nav_dtype = np.dtype([(e[0], e[1].to_pandas_dtype()) for e in _nav_fields], align=False)
+assert nav_dtype.itemsize == 4*NAV_WORDS
+
+# the list columns of the gps_context table
+_nav_list_schema = [(e[0], pa.list_(e[1], -1), e[2]) for e in _nav_fields]
+
+# the gps_nav table, one row per navigational structure
+_nav_schema = [
+    ("packet_id", pa.uint32(), None),
+    ("nav_index", pa.uint8(), None),
+] + _nav_fields + [
+    ("frame_index", pa.uint32(), None),
+    ("packet_index", pa.uint32(), None),
+]
+
 def _schema_elt(e: tuple) -> dict:
     return {
             "name": e[0],
@@ -62,7 +91,46 @@ def _schema_elt(e: tuple) -> dict:
             "unit": str(e[2]) if e[2] is not None else None
     }
 
-schema = [ _schema_elt(e) for e in _schema ]
+def _context_schema(nav: bool) -> list:
+    """
+    The gps_context table, with the navigational structures as list columns
+    unless they go to the gps_nav table.
+    """
+    if nav:
+        return _schema
+    return _schema[:-2] + _nav_list_schema + _schema[-2:]
+
+schema = [ _schema_elt(e) for e in _context_schema(False) ]
+nav_schema = [ _schema_elt(e) for e in _nav_schema ]
+
+
+def decode_nav(words: np.ndarray) -> np.ndarray:
+    """
+    The navigational structures of a matrix of GPS Context packets, a row
+    of `GPS_CONTEXT_WORDS` words per packet, as a (packets, `NAV_RECORDS`)
+    structured array.
+    """
+    return np.ascontiguousarray(words[:, NAV_START_WORD:GPS_CONTEXT_WORDS]).view(nav_dtype)
+
+def decode_gps_contexts(words: np.ndarray) -> dict:
+    """
+    The header fields of a matrix of GPS Context packets, a row of
+    `GPS_CONTEXT_WORDS` words per packet.
+    """
+    header = words[:, 0]
+    return {
+        "packet_size": header & 0xFFFF,
+        "packet_count": (header >> 16) & 0xF,
+        "tsfd": (header >> 20) & 0x3,
+        "tsid": (header >> 22) & 0x3,
+        "indicators": (header >> 24) & 0x7,
+        "packet_type": header >> 28,
+
+        "classid_pad_bit_count": words[:, 2] >> 27,
+        "classid_oui": words[:, 2] & 0xFFFFFF,
+        "classid_information_class_code": words[:, 3] >> 16,
+        "classid_packet_class_code": words[:, 3] & 0xFFFF,
+    }
 
 class _GPSExtensionContextPacket(ContextPacket):
     def __init__(self, payload: bytes):
@@ -71,59 +139,10 @@ class _GPSExtensionContextPacket(ContextPacket):
         assert self.class_id.information_class_code == 3
         assert self.class_id.packet_class_code == 3
 
-        self.system_status = []
-        self.filter_status = []
-        self.unix_time_seconds = []
-        self.microseconds = []
-        self.latitude = []
-        self.longitude =[]
-        self.altitude = []
-        self.velocity_0 = []
-        self.velocity_1 = []
-        self.velocity_2 = []
-        self.acceleration_0 = []
-        self.acceleration_1 = []
-        self.acceleration_2 = []
-        self.gforce = []
-        self.attitude_0 = []
-        self.attitude_1 = []
-        self.attitude_2 = []
-        self.attitude_rate_0 = []
-        self.attitude_rate_1 = []
-        self.attitude_rate_2 = []
-        self.latitude_std_dev = []
-        self.longitude_std_dev = []
-        self.altitude_std_dev = []
-
-        # The GPS Context packet contains 25 navigational structures each containing the following
-        # 23 fields.
-        # The navigational structures appear starting at word 4 after the
-        # header, stream id, and 2 word class id
-        for i in range(25):
-            ss, fs = self.words[(25*i)+4:(25*i)+5].view(dtype=np.int16)
-            self.system_status.append(np.uint16(ss))
-            self.filter_status.append(np.uint16(fs))
-            self.unix_time_seconds.append(np.uint32(self.words[(25*i)+5]))
-            self.microseconds.append(np.uint32(self.words[(25*i)+6]))
-            self.latitude.append(np.float64(self.words[(25*i)+7:(25*i)+9].view(dtype=np.float64())))
-            self.longitude.append(np.float64(self.words[(25*i)+9:(25*i)+11].view(dtype=np.float64())))
-            self.altitude.append(np.float64(self.words[(25*i)+11:(25*i)+13].view(dtype=np.float64())))
-            self.velocity_0.append(np.float32(self.words[(25*i)+13].view(dtype=np.float32())))
-            self.velocity_1.append(np.float32(self.words[(25*i)+14].view(dtype=np.float32())))
-            self.velocity_2.append(np.float32(self.words[(25*i)+15].view(dtype=np.float32())))
-            self.acceleration_0.append(np.float32(self.words[(25*i)+16].view(dtype=np.float32())))
-            self.acceleration_1.append(np.float32(self.words[(25*i)+17].view(dtype=np.float32())))
-            self.acceleration_2.append(np.float32(self.words[(25*i)+18].view(dtype=np.float32())))
-            self.gforce.append(np.float32(self.words[(25*i)+19].view(dtype=np.float32())))
-            self.attitude_0.append(np.float32(self.words[(25*i)+20].view(dtype=np.float32())))
-            self.attitude_1.append(np.float32(self.words[(25*i)+21].view(dtype=np.float32())))
-            self.attitude_2.append(np.float32(self.words[(25*i)+22].view(dtype=np.float32())))
-            self.attitude_rate_0.append(np.float32(self.words[(25*i)+23].view(dtype=np.float32())))
-            self.attitude_rate_1.append(np.float32(self.words[(25*i)+24].view(dtype=np.float32())))
-            self.attitude_rate_2.append(np.float32(self.words[(25*i)+25].view(dtype=np.float32())))
-            self.latitude_std_dev.append(np.float32(self.words[(25*i)+26].view(dtype=np.float32())))
-            self.longitude_std_dev.append(np.float32(self.words[(25*i)+27].view(dtype=np.float32())))
-            self.altitude_std_dev.append(np.float32(self.words[(25*i)+28].view(dtype=np.float32())))
+        self.nav = decode_nav(self.words[None, :GPS_CONTEXT_WORDS])[0]
+        # the fields of every navigational structure, e.g. `latitude`
+        for name in nav_dtype.names:
+            setattr(self, name, self.nav[name])
 
 
 class GPSExtensionContext:
@@ -131,82 +150,99 @@ class GPSExtensionContext:
             output_path: Path,
             Recorder: type,
             recorder_opts: dict = None,
-            batch_size: int = 1,
+            batch_size: int = 100,
+            nav_output_path: Path = None,
             **kwargs):
+        """
+        Records the GPS Context packets, decoding `batch_size` of them at a
+        time.  Their navigational structures are list columns of the
+        packet's row, or, given `nav_output_path`, rows of their own in the
+        gps_nav table at that path, keyed by the packet_id.
+        """
 
         if recorder_opts is None:
             recorder_opts = {}
 
+        self.nav_output_path = nav_output_path
+        self._schema = _context_schema(nav_output_path is not None)
         self.recorder = Recorder(
                 output_path,
-                schema=pa.schema([(e[0], e[1]) for e in _schema]),
+                schema=pa.schema([(e[0], e[1]) for e in self._schema]),
                 options=recorder_opts,
                 batch_size=batch_size)
 
-        self.packet_id = 0
+        self.nav_recorder = None
+        if nav_output_path is not None:
+            self.nav_recorder = Recorder(
+                    nav_output_path,
+                    schema=pa.schema([(e[0], e[1]) for e in _nav_schema]),
+                    options=recorder_opts,
+                    batch_size=batch_size*NAV_RECORDS)
 
-    def add_record(self,
-            packet: _GPSExtensionContextPacket,
-            *,
-            frame_index: int,
-            packet_index: int
-            ):
-        assert isinstance(packet, _GPSExtensionContextPacket)
-        header = packet.packet_header
-
-        self.recorder.add_record({
-            "packet_id": np.uint32(self.packet_id),
-
-            "packet_size": np.uint16(header.packet_size),
-            "packet_count": np.uint16(header.packet_count),
-            "tsfd": np.uint8(header.tsf),
-            "tsid": np.uint8(header.tsi),
-            "indicators": np.uint8(header.indicators),
-            "packet_type": np.uint8(header.packet_type),
-
-            "classid_pad_bit_count": np.uint8(packet.class_id.pad_bit_count),
-            "classid_oui": np.uint32(packet.class_id.oui),
-            "classid_information_class_code": np.uint16(packet.class_id.information_class_code),
-            "classid_packet_class_code": np.uint16(packet.class_id.packet_class_code),
-
-            "system_status": packet.system_status,
-            "filter_status": packet.filter_status,
-            "unix_time_seconds": packet.unix_time_seconds,
-            "microseconds": packet.microseconds,
-            "latitude": packet.latitude,
-            "longitude": packet.longitude,
-            "altitude": packet.altitude,
-            "velocity_0": packet.velocity_0,
-            "velocity_1": packet.velocity_1,
-            "velocity_2": packet.velocity_2,
-            "acceleration_0": packet.acceleration_0,
-            "acceleration_1": packet.acceleration_1,
-            "acceleration_2": packet.acceleration_2,
-            "gforce": packet.gforce,
-            "attitude_0": packet.attitude_0,
-            "attitude_1": packet.attitude_1,
-            "attitude_2": packet.attitude_2,
-            "attitude_rate_0": packet.attitude_rate_0,
-            "attitude_rate_1": packet.attitude_rate_1,
-            "attitude_rate_2": packet.attitude_rate_2,
-            "latitude_std_dev": packet.latitude_std_dev,
-            "longitude_std_dev": packet.longitude_std_dev,
-            "altitude_std_dev": packet.altitude_std_dev,
-
-            "frame_index": np.uint32(frame_index),
-            "packet_index": np.uint32(packet_index),
-        })
+        self.batch_size = batch_size
+        self.packet_id = 0
+        self._pending = []
+
+    def _flush(self):
+        if not self._pending:
+            return
+        payloads, packet_ids, frame_indexes, packet_indexes = zip(*self._pending)
+        self._pending = []
+
+        words = np.frombuffer(b"".join(payloads), dtype=np.uint32).reshape((-1, GPS_CONTEXT_WORDS))
+        fields = decode_gps_contexts(words)
+        nav = decode_nav(words)
+
+        columns = {
+            "packet_id": np.array(packet_ids, dtype=np.uint32),
+            "frame_index": np.array(frame_indexes, dtype=np.uint32),
+            "packet_index": np.array(packet_indexes, dtype=np.uint32),
+        }
+        if self.nav_recorder is None:
+            offsets = arrow_manipulation.offsets(np.full(len(words), NAV_RECORDS))
+            for name, type_, _ in _nav_list_schema:
+                columns[name] = arrow_manipulation.list_array(
+                        np.ascontiguousarray(nav[name]).reshape(-1), offsets, type_)
+        for name, type_, _ in self._schema:
+            if name not in columns:
+                columns[name] = fields[name].astype(type_.to_pandas_dtype())
+        self.recorder.add_batch(columns)
+
+        if self.nav_recorder is not None:
+            self.nav_recorder.add_batch({
+                "packet_id": np.repeat(columns["packet_id"], NAV_RECORDS),
+                "nav_index": np.tile(np.arange(NAV_RECORDS, dtype=np.uint8), len(words)),
+            } | {
+                name: np.ascontiguousarray(nav[name]).reshape(-1) for name in nav_dtype.names
+            } | {
+                "frame_index": np.repeat(columns["frame_index"], NAV_RECORDS),
+                "packet_index": np.repeat(columns["packet_index"], NAV_RECORDS),
+            })
 
     def process(self, payload: bytes,
             *,
             frame_index: int,
             packet_index: int):
-        self.add_record(_GPSExtensionContextPacket(payload),
-                frame_index=frame_index,
-                packet_index=packet_index)
+        if len(payload) < 4*GPS_CONTEXT_WORDS:
+            raise ValueError(f"GPS context packet of {len(payload)} bytes, "
+                             f"expected {4*GPS_CONTEXT_WORDS}")
+
+        self._pending.append((bytes(payload[:4*GPS_CONTEXT_WORDS]), self.packet_id, frame_index, packet_index))
         self.packet_id += 1
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.recorder.close()
+        if self.nav_recorder is not None:
+            self.nav_recorder.close()
 
     @property
     def metadata(self)->dict :
-        return self.recorder.metadata | {"schema": schema}
-
+        metadata = self.recorder.metadata | {"schema": [ _schema_elt(e) for e in self._schema ]}
+        if self.nav_recorder is not None:
+            metadata["gps_nav"] = {
+                "filename": self.nav_output_path.name,
+            } | self.nav_recorder.metadata | {"schema": nav_schema}
+        return metadata
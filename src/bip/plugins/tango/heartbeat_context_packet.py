@@ -101,6 +101,27 @@ _schema = [
     ("packet_index", pa.uint32(),None),
 ]
 
+# the four 16 word blocks of a heartbeat, as (name, first word)
+BLOCKS = [
+    ("tx_buffer_free", 7),
+    ("rx_buffer_free", 23),
+    ("tx_stream_id", 39),
+    ("rx_stream_id", 55),
+]
+BLOCK_WORDS = 16
+HEARTBEAT_WORDS = 73
+
+# the blocks as fixed size list columns rather than 16 columns each
+_list_schema = [(name, pa.list_(pa.uint32(), BLOCK_WORDS), None) for name, _ in BLOCKS]
+
+def _context_schema(lists: bool) -> list:
+    if not lists:
+        return _schema
+    block_columns = {f"{name}_{i}" for name, _ in BLOCKS for i in range(BLOCK_WORDS)}
+    first = next(i for i, e in enumerate(_schema) if e[0] in block_columns)
+    return (_schema[:first] + _list_schema
+            + [e for e in _schema[first:] if e[0] not in block_columns])
+
 def _schema_elt(e: tuple) -> dict:
     return {
             "name": e[0],
@@ -111,6 +132,37 @@ def _schema_elt(e: tuple) -> dict:
 schema = [ _schema_elt(e) for e in _schema ]
 
 
+def decode_heartbeats(words: np.ndarray) -> dict:
+    """
+    The fields of a matrix of heartbeat context packets, a row of
+    `HEARTBEAT_WORDS` words per packet.  Each block is a (packets, 16) array.
+    """
+    header = words[:, 0]
+    tsi, tsf0, tsf1 = words[:, 4], words[:, 5], words[:, 6]
+    return {
+        "packet_size": header & 0xFFFF,
+        "packet_count": (header >> 16) & 0xF,
+        "tsfd": (header >> 20) & 0x3,
+        "tsid": (header >> 22) & 0x3,
+        "indicators": (header >> 24) & 0x7,
+        "packet_type": header >> 28,
+
+        "classid_pad_bit_count": words[:, 2] >> 27,
+        "classid_oui": words[:, 2] & 0xFFFFFF,
+        "classid_information_class_code": words[:, 3] >> 16,
+        "classid_packet_class_code": words[:, 3] & 0xFFFF,
+
+        "tsi": tsi,
+        "tsf0": tsf0,
+        "tsf1": tsf1,
+        "time": bit_manipulation.times(tsi, tsf0, tsf1),
+
+        "system_time": np.ascontiguousarray(words[:, 71:73]).view(np.float64)[:, 0],
+    } | {
+        name: words[:, start:start + BLOCK_WORDS] for name, start in BLOCKS
+    }
+
+
 class _HeartbeatContextPacket(ContextPacket):
     def __init__(self, payload: bytes):
         super().__init__(payload)
@@ -122,73 +174,11 @@ class _HeartbeatContextPacket(ContextPacket):
         tsf0, tsf1 = self.fractional_timestamp
         self.time = bit_manipulation.time(tsi, tsf0, tsf1)
 
-        self.tx_buffer_free_0 = int(self.words[7])
-        self.tx_buffer_free_1 = int(self.words[8])
-        self.tx_buffer_free_2 = int(self.words[9])
-        self.tx_buffer_free_3 = int(self.words[10])
-        self.tx_buffer_free_4 = int(self.words[11])
-        self.tx_buffer_free_5 = int(self.words[12])
-        self.tx_buffer_free_6 = int(self.words[13])
-        self.tx_buffer_free_7 = int(self.words[14])
-        self.tx_buffer_free_8 = int(self.words[15])
-        self.tx_buffer_free_9 = int(self.words[16])
-        self.tx_buffer_free_10 = int(self.words[17])
-        self.tx_buffer_free_11 = int(self.words[18])
-        self.tx_buffer_free_12 = int(self.words[19])
-        self.tx_buffer_free_13 = int(self.words[20])
-        self.tx_buffer_free_14 = int(self.words[21])
-        self.tx_buffer_free_15 = int(self.words[22])
-
-        self.rx_buffer_free_0 = int(self.words[23])
-        self.rx_buffer_free_1 = int(self.words[24])
-        self.rx_buffer_free_2 = int(self.words[25])
-        self.rx_buffer_free_3 = int(self.words[26])
-        self.rx_buffer_free_4 = int(self.words[27])
-        self.rx_buffer_free_5 = int(self.words[28])
-        self.rx_buffer_free_6 = int(self.words[29])
-        self.rx_buffer_free_7 = int(self.words[30])
-        self.rx_buffer_free_8 = int(self.words[31])
-        self.rx_buffer_free_9 = int(self.words[32])
-        self.rx_buffer_free_10 = int(self.words[33])
-        self.rx_buffer_free_11 = int(self.words[34])
-        self.rx_buffer_free_12 = int(self.words[35])
-        self.rx_buffer_free_13 = int(self.words[36])
-        self.rx_buffer_free_14 = int(self.words[37])
-        self.rx_buffer_free_15 = int(self.words[38])
-
-        self.tx_stream_id_0 = int(self.words[39])
-        self.tx_stream_id_1 = int(self.words[40])
-        self.tx_stream_id_2 = int(self.words[41])
-        self.tx_stream_id_3 = int(self.words[42])
-        self.tx_stream_id_4 = int(self.words[43])
-        self.tx_stream_id_5 = int(self.words[44])
-        self.tx_stream_id_6 = int(self.words[45])
-        self.tx_stream_id_7 = int(self.words[46])
-        self.tx_stream_id_8 = int(self.words[47])
-        self.tx_stream_id_9 = int(self.words[48])
-        self.tx_stream_id_10 = int(self.words[49])
-        self.tx_stream_id_11 = int(self.words[50])
-        self.tx_stream_id_12 = int(self.words[51])
-        self.tx_stream_id_13 = int(self.words[52])
-        self.tx_stream_id_14 = int(self.words[53])
-        self.tx_stream_id_15 = int(self.words[54])
-
-        self.rx_stream_id_0 = int(self.words[55])
-        self.rx_stream_id_1 = int(self.words[56])
-        self.rx_stream_id_2 = int(self.words[57])
-        self.rx_stream_id_3 = int(self.words[58])
-        self.rx_stream_id_4 = int(self.words[59])
-        self.rx_stream_id_5 = int(self.words[60])
-        self.rx_stream_id_6 = int(self.words[61])
-        self.rx_stream_id_7 = int(self.words[62])
-        self.rx_stream_id_8 = int(self.words[63])
-        self.rx_stream_id_9 = int(self.words[64])
-        self.rx_stream_id_10 = int(self.words[65])
-        self.rx_stream_id_11 = int(self.words[66])
-        self.rx_stream_id_12 = int(self.words[67])
-        self.rx_stream_id_13 = int(self.words[68])
-        self.rx_stream_id_14 = int(self.words[69])
-        self.rx_stream_id_15 = int(self.words[70])
+        for name, start in BLOCKS:
+            block = self.words[start:start + BLOCK_WORDS]
+            setattr(self, name, block)
+            for i, value in enumerate(block.tolist()):
+                setattr(self, f"{name}_{i}", value)
 
         self.system_time = float(self.words[71:73].view(dtype = np.float64))
 
@@ -199,133 +189,73 @@ class HeartbeatContext:
             Recorder: type,
             recorder_opts: dict = None,
             batch_size: int = 1000,
+            lists: bool = False,
             **kwargs):
+        """
+        Records the heartbeat context packets, decoding `batch_size` of them
+        at a time.  With `lists` the four 16 word blocks are written as
+        `fixed_size_list<uint32, 16>` columns rather than 16 columns each.
+        """
 
         if recorder_opts is None:
             recorder_opts = {}
 
+        self.lists = lists
+        self._schema = _context_schema(lists)
         self.recorder = Recorder(
                 output_path,
-                schema=pa.schema([(e[0], e[1]) for e in _schema]),
+                schema=pa.schema([(e[0], e[1]) for e in self._schema]),
                 options=recorder_opts,
                 batch_size=batch_size)
 
+        self.batch_size = batch_size
         self.packet_id = 0
-
-    def add_record(self,
-            packet: _HeartbeatContextPacket,
-            *,
-            frame_index: int,
-            packet_index: int
-            ):
-        assert isinstance(packet, _HeartbeatContextPacket)
-        header = packet.packet_header
-
-        self.recorder.add_record({
-            "packet_id": np.uint32(self.packet_id),
-
-            "packet_size": np.uint16(header.packet_size),
-            "packet_count": np.uint16(header.packet_count),
-            "tsfd": np.uint8(header.tsf),
-            "tsid": np.uint8(header.tsi),
-            "indicators": np.uint8(header.indicators),
-            "packet_type": np.uint8(header.packet_type),
-
-            "classid_pad_bit_count": np.uint8(packet.class_id.pad_bit_count),
-            "classid_oui": np.uint32(packet.class_id.oui),
-            "classid_information_class_code": np.uint16(packet.class_id.information_class_code),
-            "classid_packet_class_code": np.uint16(packet.class_id.packet_class_code),
-
-            "tsi": np.uint32(packet.integer_timestamp),
-            "tsf0": np.uint32(packet.fractional_timestamp[0]),
-            "tsf1": np.uint32(packet.fractional_timestamp[1]),
-            "time": np.float64(packet.time),
-
-            "tx_buffer_free_0": np.uint32(packet.tx_buffer_free_0),
-            "tx_buffer_free_1": np.uint32(packet.tx_buffer_free_1),
-            "tx_buffer_free_2": np.uint32(packet.tx_buffer_free_2),
-            "tx_buffer_free_3": np.uint32(packet.tx_buffer_free_3),
-            "tx_buffer_free_4": np.uint32(packet.tx_buffer_free_4),
-            "tx_buffer_free_5": np.uint32(packet.tx_buffer_free_5),
-            "tx_buffer_free_6": np.uint32(packet.tx_buffer_free_6),
-            "tx_buffer_free_7": np.uint32(packet.tx_buffer_free_7),
-            "tx_buffer_free_8": np.uint32(packet.tx_buffer_free_8),
-            "tx_buffer_free_9": np.uint32(packet.tx_buffer_free_9),
-            "tx_buffer_free_10": np.uint32(packet.tx_buffer_free_10),
-            "tx_buffer_free_11": np.uint32(packet.tx_buffer_free_11),
-            "tx_buffer_free_12": np.uint32(packet.tx_buffer_free_12),
-            "tx_buffer_free_13": np.uint32(packet.tx_buffer_free_13),
-            "tx_buffer_free_14": np.uint32(packet.tx_buffer_free_14),
-            "tx_buffer_free_15": np.uint32(packet.tx_buffer_free_15),
-
-            "rx_buffer_free_0": np.uint32(packet.rx_buffer_free_0),
-            "rx_buffer_free_1": np.uint32(packet.rx_buffer_free_1),
-            "rx_buffer_free_2": np.uint32(packet.rx_buffer_free_2),
-            "rx_buffer_free_3": np.uint32(packet.rx_buffer_free_3),
-            "rx_buffer_free_4": np.uint32(packet.rx_buffer_free_4),
-            "rx_buffer_free_5": np.uint32(packet.rx_buffer_free_5),
-            "rx_buffer_free_6": np.uint32(packet.rx_buffer_free_6),
-            "rx_buffer_free_7": np.uint32(packet.rx_buffer_free_7),
-            "rx_buffer_free_8": np.uint32(packet.rx_buffer_free_8),
-            "rx_buffer_free_9": np.uint32(packet.rx_buffer_free_9),
-            "rx_buffer_free_10": np.uint32(packet.rx_buffer_free_10),
-            "rx_buffer_free_11": np.uint32(packet.rx_buffer_free_11),
-            "rx_buffer_free_12": np.uint32(packet.rx_buffer_free_12),
-            "rx_buffer_free_13": np.uint32(packet.rx_buffer_free_13),
-            "rx_buffer_free_14": np.uint32(packet.rx_buffer_free_14),
-            "rx_buffer_free_15": np.uint32(packet.rx_buffer_free_15),
-
-            "tx_stream_id_0": np.uint32(packet.tx_stream_id_0),
-            "tx_stream_id_1": np.uint32(packet.tx_stream_id_1),
-            "tx_stream_id_2": np.uint32(packet.tx_stream_id_2),
-            "tx_stream_id_3": np.uint32(packet.tx_stream_id_3),
-            "tx_stream_id_4": np.uint32(packet.tx_stream_id_4),
-            "tx_stream_id_5": np.uint32(packet.tx_stream_id_5),
-            "tx_stream_id_6": np.uint32(packet.tx_stream_id_6),
-            "tx_stream_id_7": np.uint32(packet.tx_stream_id_7),
-            "tx_stream_id_8": np.uint32(packet.tx_stream_id_8),
-            "tx_stream_id_9": np.uint32(packet.tx_stream_id_9),
-            "tx_stream_id_10": np.uint32(packet.tx_stream_id_10),
-            "tx_stream_id_11": np.uint32(packet.tx_stream_id_11),
-            "tx_stream_id_12": np.uint32(packet.tx_stream_id_12),
-            "tx_stream_id_13": np.uint32(packet.tx_stream_id_13),
-            "tx_stream_id_14": np.uint32(packet.tx_stream_id_14),
-            "tx_stream_id_15": np.uint32(packet.tx_stream_id_15),
-
-            "rx_stream_id_0": np.uint32(packet.rx_stream_id_0),
-            "rx_stream_id_1": np.uint32(packet.rx_stream_id_1),
-            "rx_stream_id_2": np.uint32(packet.rx_stream_id_2),
-            "rx_stream_id_3": np.uint32(packet.rx_stream_id_3),
-            "rx_stream_id_4": np.uint32(packet.rx_stream_id_4),
-            "rx_stream_id_5": np.uint32(packet.rx_stream_id_5),
-            "rx_stream_id_6": np.uint32(packet.rx_stream_id_6),
-            "rx_stream_id_7": np.uint32(packet.rx_stream_id_7),
-            "rx_stream_id_8": np.uint32(packet.rx_stream_id_8),
-            "rx_stream_id_9": np.uint32(packet.rx_stream_id_9),
-            "rx_stream_id_10": np.uint32(packet.rx_stream_id_10),
-            "rx_stream_id_11": np.uint32(packet.rx_stream_id_11),
-            "rx_stream_id_12": np.uint32(packet.rx_stream_id_12),
-            "rx_stream_id_13": np.uint32(packet.rx_stream_id_13),
-            "rx_stream_id_14": np.uint32(packet.rx_stream_id_14),
-            "rx_stream_id_15": np.uint32(packet.rx_stream_id_15),
-
-            "system_time": np.float64(packet.system_time),
-
-            "frame_index": np.uint32(frame_index),
-            "packet_index": np.uint32(packet_index),
-        })
+        self._pending = []
+
+    def _flush(self):
+        if not self._pending:
+            return
+        payloads, packet_ids, frame_indexes, packet_indexes = zip(*self._pending)
+        self._pending = []
+
+        words = np.frombuffer(b"".join(payloads), dtype=np.uint32).reshape((-1, HEARTBEAT_WORDS))
+        fields = decode_heartbeats(words)
+
+        columns = {
+            "packet_id": np.array(packet_ids, dtype=np.uint32),
+            "frame_index": np.array(frame_indexes, dtype=np.uint32),
+            "packet_index": np.array(packet_indexes, dtype=np.uint32),
+        }
+        for name, type_, _ in self._schema:
+            if name in columns:
+                continue
+            if pa.types.is_fixed_size_list(type_):
+                block = np.ascontiguousarray(fields[name], dtype=np.uint32)
+                columns[name] = pa.FixedSizeListArray.from_arrays(block.reshape(-1), BLOCK_WORDS)
+            elif name in fields:
+                columns[name] = fields[name].astype(type_.to_pandas_dtype())
+            else:
+                block, i = name.rsplit("_", 1)
+                columns[name] = fields[block][:, int(i)].astype(np.uint32)
+        self.recorder.add_batch(columns)
 
     def process(self, payload: bytes,
             *,
             frame_index: int,
             packet_index: int):
+        if len(payload) < 4*HEARTBEAT_WORDS:
+            raise ValueError(f"heartbeat context packet of {len(payload)} bytes, "
+                             f"expected {4*HEARTBEAT_WORDS}")
 
-        self.add_record(_HeartbeatContextPacket(payload),
-                frame_index=frame_index,
-                packet_index=packet_index)
+        self._pending.append((bytes(payload[:4*HEARTBEAT_WORDS]), self.packet_id, frame_index, packet_index))
         self.packet_id += 1
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.recorder.close()
 
     @property
     def metadata(self)->dict :
-        return self.recorder.metadata | {"schema": schema}
-
+        return self.recorder.metadata | {"schema": [ _schema_elt(e) for e in self._schema ]}
@@ -12,10 +12,14 @@ from bip import vita
 from . __version__ import __version__ as version
 from . import frame
 from . signal_data_packet import SignalData
-from . context_packet import Context
+from . context_packet import Context, CONTEXT_WORDS, SIGNATURE_WORDS, check_signature
 from . heartbeat_context_packet import HeartbeatContext
 from . gps_context_packet import GPSExtensionContext
+from . bad_packets import BadPackets, BLOB_EXTENSION
 from bip.common import logger as our_logging
+from bip.common import iq_layout as iq_layouts
+from bip.common import parallel
+from bip.common.mapped_stream import MappedStream
 
 BAD_PACKET_STATUS_CODE = "BAD_PACKET"
 
@@ -26,21 +30,12 @@ SIGNAL_DATA_FILENAME="data"
 CONTEXT_FILENAME="context"
 HEARTBEAT_CONTEXT_FILENAME="heartbeat_context"
 GPS_EXTENSION_CONTEXT_FILENAME="gps_context"
+GPS_NAV_FILENAME="gps_nav"
 
 SIGNAL_DATA_PACKET = 0b0001
 CONTEXT_DATA_PACKET = 0b0100
 OTHER_CONTEXT_PACKETS = 0b0101
 
-bad_packets_schema = pa.schema([
-    ("frame_count", pa.uint32()),
-    ("frame_size", pa.uint32()),
-    ("start_bytes", pa.uint64()),
-    ("frame_index", pa.uint32()),
-    ("bytes", pa.list_(pa.uint32(), -1)),
-    ("reason", pa.string()),
-])
-
-
 
 
 class Parser:
@@ -64,10 +59,32 @@ class Parser:
         if recorder_opts is None:
             recorder_opts = {}
 
+        # everything a worker process needs to build its own parser
+        self._parser_args = {
+                "input_path": input_path,
+                "output_path": output_path,
+                "Recorder": Recorder,
+                "log_level": log_level,
+                "data_recorder": data_recorder,
+                "recorder_opts": recorder_opts,
+                "context_key_function": context_key_function,
+                "orphan_context_key": orphan_context_key,
+        } | kwargs
+
         self.options = kwargs
         self.clean = False
         if kwargs.get("clean") == True:
             self.clean = True
+        self.use_mmap = False
+        if kwargs.get("mmap") == True:
+            self.use_mmap = True
+        self.workers = int(kwargs.get("workers") or 1)
+        self.dump_bad_packets = kwargs.get("dump_bad_packets") == True
+        self.gps_nav = kwargs.get("gps_nav") == True
+        self.heartbeat_lists = kwargs.get("heartbeat_lists") == True
+        self.iq_layout = kwargs.get("iq_layout") or iq_layouts.SPLIT
+        self._output_path = output_path
+        self._recorder_options = recorder_opts
         self._bytes_read = 0
         self._packets_read = 0
         self._frames_read = 0
@@ -95,24 +112,28 @@ class Parser:
         } | self.frame_recorder.metadata
 
         bad_packets_filename = f"{BAD_PACKETS_FILENAME}.{Recorder.extension()}"
-        self.bad_packets_recorder = Recorder(
+        self.bad_packet_sink = BadPackets(
                 output_path / bad_packets_filename,
-                schema = bad_packets_schema,
-                options=recorder_opts,
-                batch_size = 1)
+                Recorder,
+                recorder_opts,
+                batch_size = 1000,
+                blob_path = (output_path / f"{BAD_PACKETS_FILENAME}.{BLOB_EXTENSION}"
+                             if self.dump_bad_packets else None))
         self.options["bad_packets_data"] = {
             "filename": bad_packets_filename,
-        } | self.bad_packets_recorder.metadata
+        } | self.bad_packet_sink.metadata
 
         unknown_packets_filename = f"{UNKNOWN_PACKETS_FILENAME}.{Recorder.extension()}"
-        self.unknown_packets_recorder = Recorder(
+        self.unknown_packet_sink = BadPackets(
                 output_path / unknown_packets_filename,
-                schema = bad_packets_schema,
-                options=recorder_opts,
-                batch_size = 1)
-        self.options["bad_packets_data"] = {
-            "filename": bad_packets_filename,
-        } | self.bad_packets_recorder.metadata
+                Recorder,
+                recorder_opts,
+                batch_size = 1000,
+                blob_path = (output_path / f"{UNKNOWN_PACKETS_FILENAME}.{BLOB_EXTENSION}"
+                             if self.dump_bad_packets else None))
+        self.options["unknown_packets_data"] = {
+            "filename": unknown_packets_filename,
+        } | self.unknown_packet_sink.metadata
 
         signal_data_filename = f"{SIGNAL_DATA_FILENAME}.{data_recorder.extension()}"
         self.signal_data = SignalData(
@@ -120,6 +141,7 @@ class Parser:
                 data_recorder,
                 recorder_opts,
                 batch_size = 100,
+                iq_layout = self.iq_layout,
                 clean = self.clean)
         self.options["signal_data"] = {
                 "filename": signal_data_filename,
@@ -131,6 +153,7 @@ class Parser:
                 Recorder,
                 recorder_opts,
                 batch_size = 100,
+                bad_packet_sink = self.bad_packet_sink,
                 clean = self.clean)
         self.options["context"] = {
                 "filename": context_filename,
@@ -142,6 +165,7 @@ class Parser:
                 Recorder,
                 recorder_opts,
                 batch_size = 100,
+                lists = self.heartbeat_lists,
                 clean = self.clean)
         self.options["heartbeat_context"] = {
                 "filename": heartbeat_context_filename,
@@ -152,7 +176,9 @@ class Parser:
                 output_path / gps_context_filename,
                 Recorder,
                 recorder_opts,
-                batch_size = 1,
+                batch_size = 100,
+                nav_output_path = (output_path / f"{GPS_NAV_FILENAME}.{Recorder.extension()}"
+                                   if self.gps_nav else None),
                 clean = self.clean)
         self.options["gps_context"] = {
                 "filename": gps_context_filename,
@@ -164,7 +190,7 @@ class Parser:
                 "name": "Tango parser",
                 "version": version,
                 "options": self.options,
-                "bad packets": self._bad_packets,
+                "bad packets": self.bad_packets,
         }
 
     @property
@@ -189,60 +215,83 @@ class Parser:
 
     @property
     def bad_packets(self) -> int:
-        return self._bad_packets
+        return self._bad_packets + self.context.bad_packets
 
     def find_first_packet(self, buf: RawIOBase):
         bytes_read = frame.first_header(buf)
         self.options["first_packet_offset"] = bytes_read
         self._bytes_read = bytes_read
 
-    def remove_deadbeef(self, payload: bytearray):
-        DEADBEEF_BYTEARRAY = bytearray.fromhex("EFBEADDE")
+    def _bad_bytes_info(self, offset: int) -> dict:
+        """
+        Where bytes found at `offset` in the file are, as `BadPackets.add`
+        takes it.
+        """
+        return {
+                "offset": offset,
+                "frame_count": self._frame_count,
+                "frame_size": self._frame_size,
+                "start_bytes": self._start_bytes,
+                "frame_index": self._frames_read,
+        }
+
+    def _record_bad_bytes(self, sink: BadPackets, payload, reason: str, offset: int):
+        sink.add(payload, reason, **self._bad_bytes_info(offset))
 
-        db_idx = payload.find(DEADBEEF_BYTEARRAY)
-        new_payload = bytearray()
-        if (db_idx > 0):
-            self.bad_packets_recorder.add_record({
-                    "frame_count": np.uint32(self._frame_count),
-                    "frame_size": np.uint32(self._frame_size),
-                    "start_bytes": np.uint64(self._start_bytes),
-                    "frame_index": np.uint32(self._frames_read),
-                    "bytes": np.frombuffer(payload, count = -1, dtype=np.uint32),
-                    "reason":"DEADBEEF found in payload."
-                })
-            self.logger.info("Removing DEADBEEF from the payload...")
-            new_payload.extend(payload[:db_idx])
-            while db_idx > 0:
-                start_search = db_idx + len(DEADBEEF_BYTEARRAY)
-                db_idx = payload.find(DEADBEEF_BYTEARRAY, start_search)
-                if (db_idx - start_search > 0):
-                    new_payload.extend(payload[start_search:db_idx])
-            new_payload.extend(payload[start_search:])
-            return new_payload
-        return payload
+    def remove_deadbeef(self, payload: bytearray, offset: int = None):
+        '''
+        Drops every DEADBEEF word from the payload in one masked compaction,
+        recording the dirty payload, found at `offset` in the file, as a bad
+        packet.
+        '''
+        words = np.frombuffer(payload, count = len(payload) // 4, dtype=np.uint32)
+        keep = words != frame.DEADBEEF_WORD
+        if keep.all():
+            return payload
+
+        self._record_bad_bytes(self.bad_packet_sink, payload, "DEADBEEF found in payload.",
+                self._start_bytes if offset is None else offset)
+        self.logger.info("Removing DEADBEEF from the payload...")
+        return bytearray(words[keep].tobytes()) + payload[4*len(words):]
 
 
     def clean_deadbeef_for_packet(self, buf:RawIOBase, payload: bytearray, expected_size : int):
             total_payload_diff = 0
-            payload = self.remove_deadbeef(payload)
+            payload = self.remove_deadbeef(payload, self._start_bytes)
 
-            # If some dead beef was removed, we need to read in more data
-            while (len(payload) != expected_size):
+            # If some dead beef was removed, we need to read in more data.
+            # Only the newly read words need scrubbing.  A short read is the
+            # end of the file, which leaves the payload short (incomplete).
+            while (len(payload) < expected_size):
                 self.logger.info("Grabbing more data due to removal of DEADBEEF...")
                 payload_diff = expected_size - len(payload)
-                total_payload_diff += payload_diff
                 additional_payload = bytearray(payload_diff)
-                buf.readinto(additional_payload)
-                payload.extend(additional_payload)
-                payload = self.remove_deadbeef(payload)
+                additional_size = buf.readinto(additional_payload)
+                total_payload_diff += additional_size
+                payload += self.remove_deadbeef(additional_payload[:additional_size],
+                        buf.tell() - additional_size)
+                if additional_size < payload_diff:
+                    break
 
             return payload, total_payload_diff
 
 
     def close_recorder(self):
-        if self.frame_recorder.writer != None:
+        if self.frame_recorder.writer is not None:
             self.frame_recorder.close()
 
+    def close(self):
+        """
+        Closes every recorder, writing out whatever is left in their batches.
+        """
+        self.signal_data.close()
+        self.context.close()
+        self.bad_packet_sink.close()
+        self.unknown_packet_sink.close()
+        self.heartbeat_context.close()
+        self.gps_context.close()
+        self.frame_recorder.close()
+
 
     def read_packet(self, buf: RawIOBase):
         bytes_read, header = frame.read_header(buf)
@@ -259,11 +308,19 @@ class Parser:
         FRAME_HEADER_WORDS_CNT = 2
         payload_size_words = header[1] - FRAME_HEADER_WORDS_CNT
         expected_size = 4*payload_size_words
-        payload = bytearray(expected_size)
-        payload_size_bytes = buf.readinto(payload)
+        if isinstance(buf, MappedStream):
+            # zero-copy view of the frame inside the mapped file
+            payload = buf.read(expected_size)
+            payload_size_bytes = len(payload)
+        else:
+            payload = bytearray(expected_size)
+            payload_size_bytes = buf.readinto(payload)
 
         total_payload_diff = 0
         if self.clean:
+            # only what was actually read, so that a frame cut short by the
+            # end of the file stays short
+            payload = bytearray(payload[:payload_size_bytes])
             payload, total_payload_diff = self.clean_deadbeef_for_packet(buf, payload, expected_size)
 
         if payload[-4:] == bytes("DNEV", encoding="ascii"):
@@ -278,7 +335,7 @@ class Parser:
             self._bytes_read += (bytes_read + payload_size_bytes + total_payload_diff)
 
             #leave off VEND
-            return payload[:-4], payload_size_words - 1
+            return memoryview(payload)[:-4], payload_size_words - 1
 
         # This is a bad packet.
         ''' From here we know the packet_size is wrong
@@ -287,14 +344,16 @@ class Parser:
         2: Packet_size is too small
         3: packet_size is too large'''
 
+        if not isinstance(payload, bytearray):
+            payload = bytearray(payload)
         premature_ending = payload.find(b'DNEV')
         #This checks if we're at the end of the file
-        if payload_size_bytes != expected_size:
+        if payload_size_bytes != expected_size or len(payload) != expected_size:
             self._bytes_read += (bytes_read + payload_size_bytes + total_payload_diff)
             payload = payload[:payload_size_bytes]
-            reason = f"incomplete read {payload_size_bytes}/{expected_size} bytes"
+            reason = f"incomplete read {len(payload)}/{expected_size} bytes"
             self.close_recorder()
-            self.logger.warning(f"incomplete read {payload_size_bytes}/{expected_size} bytes")
+            self.logger.warning(reason)
 
         #This checks if packet_size is too large
         elif premature_ending != -1:
@@ -321,15 +380,7 @@ class Parser:
                 payload += buffer_payload
             self._bytes_read += (bytes_read + payload_size_bytes + total_payload_diff)
 
-        self.bad_packets_recorder.add_record({
-            "frame_count": np.uint32(self._frame_count),
-            "frame_size": np.uint32(self._frame_size),
-            "start_bytes": np.uint64(self._start_bytes),
-            "frame_index": np.uint32(self._frames_read),
-            "bytes": np.frombuffer(payload, count = -1, dtype=np.uint32),
-            "reason": reason,
-        })
-        self._bad_packets += 1
+        self._record_bad_frame(payload, reason)
         return BAD_PACKET_STATUS_CODE, None
 
 
@@ -345,14 +396,16 @@ class Parser:
                     payload_size = payload_size,
                     context_packet_key = self._latest_context_key)
         elif packet_type == CONTEXT_DATA_PACKET:
-            # We found a new context packet, so set the latest context key
-            self._latest_context_key = self._context_key_function(str(self._frames_read))
-
-            self.context.process(
+            context_key = self._context_key_function(str(self._frames_read))
+            # We found a new context packet, so set the latest context key,
+            # unless the packet is bad and the last good one still holds
+            if self.context.process(
                     payload,
                     frame_index = self._frames_read,
                     packet_index = self._packets_read,
-                    context_packet_key = self._latest_context_key)
+                    context_packet_key = context_key,
+                    bad_packet_info = self._bad_bytes_info(self._start_bytes)):
+                self._latest_context_key = context_key
         elif (packet_type == OTHER_CONTEXT_PACKETS) & (info_class_code == 1) & (packet_class_code == 2):
             self.heartbeat_context.process(
                     payload,
@@ -365,49 +418,247 @@ class Parser:
                     packet_index = self._packets_read)
         else:
             print(f"unhandled packet type: {packet_type}")
-            self.unknown_packets_recorder.add_record({
-                "frame_count": np.uint32(self._frame_count),
-                "frame_size": np.uint32(self._frame_size),
-                "start_bytes": np.uint64(self._start_bytes),
-                "frame_index": np.uint32(self._frames_read),
-                "bytes": np.frombuffer(payload, count = -1, dtype=np.uint32),
+            self._record_bad_bytes(self.unknown_packet_sink, payload,
+                    f"unhandled packet type: {packet_type}", self._start_bytes)
+
+    def _record_bad_frame(self, payload, reason: str):
+        self._record_bad_bytes(self.bad_packet_sink, payload, reason, self._start_bytes)
+        self._bad_packets += 1
+
+    def _process_frame(self, vita_payload, payload_size: int):
+        #in principle i need a second loop here because, acording to the
+        #spec provided, multiple "VRT" packets can be squished inside one
+        #vita 49.1 frame packet.  But each frame packet seems to only
+        #contain one vita 49.2 packet + some junk that I can't make sense
+        #of yet.
+        self._packets_read += 1
+        if vita_payload != BAD_PACKET_STATUS_CODE:
+            header = vita.vrt_header(vita_payload)
+            packet = vita.vrt_packet(vita_payload)
+            class_id = packet.class_identifier
+
+            self.process_packet(header.packet_type, class_id[1], vita_payload, payload_size)
+
+        self._packets_read += 1
+        self._frames_read += 1
+
+    def _update_progress(self, progress_bar, last_read: int) -> int:
+        if progress_bar is not None:
+            progress_bar.update(self.bytes_read - last_read)
+        elif (self.packets_read % 1000 == 0):
+            print(f"{(self.bytes_read / self.EOF) * 100:.2f}% processed")
+        return self.bytes_read
+
+    def index_frames(self, buffer) -> np.ndarray:
+        frames = frame.index_frames(buffer, clean = self.clean)
+        if len(frames) == 0:
+            raise RuntimeError("end of file before first packet")
+        self.options["first_packet_offset"] = int(frames["start"][0])
+        return frames
+
+    def parse_frames(self, stream: MappedStream, progress_bar=None, frames: np.ndarray=None):
+        """
+        Parses a mapped file by walking its frame index (see
+        `frame.index_frames`) instead of reading frames one at a time.
+
+        `frames` restricts the walk to some of the rows of the index.
+        """
+        buffer = stream.buffer
+        if frames is None:
+            frames = self.index_frames(buffer)
+
+        reasons = {
+            frame.FRAME_TOO_LARGE: "Found DNEV within payload, frame size given is larger than actual frame size.",
+            frame.FRAME_TOO_SMALL: "Could not find DNEV trailer, frame size given does not match data",
+        }
+
+        last_read = 0
+        for start, frame_count, frame_size, length, status, deadbeef in zip(
+                frames["start"].tolist(),
+                frames["frame_count"].tolist(),
+                frames["frame_size"].tolist(),
+                frames["length"].tolist(),
+                frames["status"].tolist(),
+                frames["deadbeef"].tolist()):
+            self._frame_count = frame_count
+            self._frame_size = np.uint32(frame_size)
+            self._start_bytes = start + 8
+            self._bytes_read = start + length
+            payload = buffer[start + 8:start + length]
+            if deadbeef > 0:
+                payload = self.remove_deadbeef(payload, self._start_bytes)
+
+            if status == frame.FRAME_OK:
+                self.frame_recorder.add_record({
+                    "frame_count": np.uint32(self._frame_count),
+                    "frame_size": np.uint32(self._frame_size),
+                    "start_bytes": np.uint64(self._start_bytes),
+                    "frame_index": np.uint32(self._frames_read)
+                })
+                #leave off VEND
+                self._process_frame(memoryview(payload)[:-4], frame_size - 3)
+            else:
+                if status == frame.FRAME_INCOMPLETE:
+                    expected_size = 4 * (frame_size - 2)
+                    reason = f"incomplete read {len(payload)}/{expected_size} bytes"
+                    self.logger.warning(reason)
+                else:
+                    reason = reasons[status]
+                self._record_bad_frame(payload, reason)
+                self._process_frame(BAD_PACKET_STATUS_CODE, None)
+
+            last_read = self._update_progress(progress_bar, last_read)
+
+        self.close_recorder()
+
+    def _plan_chunks(self, buffer, frames: np.ndarray) -> list:
+        """
+        Splits the frame index into a chunk per worker, working out from the
+        index where each chunk's frame index, packet ids and context key
+        start so the parts line up when they are merged.
+        """
+        n_frames = len(frames)
+        words = np.frombuffer(buffer, dtype=np.uint32, count=len(buffer) // 4)
+
+        # the VRT header and second class id word of every well formed frame
+        first_word = (frames["start"] // 4 + 2).astype(np.int64)
+        well_formed = (frames["status"] == frame.FRAME_OK) & (frames["length"] >= 4 * 7)
+        # the words (less the VEND) each frame's packet would be given
+        payload_words = frames["length"].astype(np.int64) // 4 - 3 - frames["deadbeef"]
+        # the words a context packet's signature covers, of long enough frames
+        has_signature = well_formed & (payload_words >= CONTEXT_WORDS)
+        signature = np.zeros((n_frames, SIGNATURE_WORDS), dtype=np.uint32)
+        vrt_header = np.zeros(n_frames, dtype=np.uint32)
+        class_id = np.zeros(n_frames, dtype=np.uint32)
+        vrt_header[well_formed] = words[first_word[well_formed]]
+        class_id[well_formed] = words[first_word[well_formed] + 3]
+        rows = np.flatnonzero(has_signature & (frames["deadbeef"] == 0))
+        signature[rows] = words[first_word[rows, None] + np.arange(SIGNATURE_WORDS)]
+        for row in np.flatnonzero(well_formed & (frames["deadbeef"] > 0)).tolist():
+            end = int(frames["start"][row] + frames["length"][row]) // 4
+            payload = words[first_word[row]:end]
+            payload = payload[payload != frame.DEADBEEF_WORD]
+            vrt_header[row], class_id[row] = payload[0], payload[3]
+            if has_signature[row]:
+                signature[row] = payload[:SIGNATURE_WORDS]
+
+        packet_type = vrt_header >> 28
+        info_class_code = class_id >> 16
+        packet_class_code = class_id & 0xFFFF
+        other_context = well_formed & (packet_type == OTHER_CONTEXT_PACKETS)
+        tables = {
+            "signal_data": well_formed & (packet_type == SIGNAL_DATA_PACKET),
+            "context": well_formed & (packet_type == CONTEXT_DATA_PACKET),
+            "heartbeat_context": other_context & (info_class_code == 1) & (packet_class_code == 2),
+            "gps_context": other_context & (info_class_code == 3) & (packet_class_code == 3),
+        }
+        packets_before = {
+            name: np.concatenate([[0], np.cumsum(mask)])
+            for name, mask in tables.items()
+        }
+        # the context key only moves on at a good context packet
+        good_context = tables["context"] & has_signature & ~check_signature(signature)
+        last_context = np.maximum.accumulate(
+                np.where(good_context, np.arange(n_frames), -1))
+
+        chunks = []
+        for start, end in parallel.split_rows(frames["length"], self.workers):
+            context_row = int(last_context[start - 1]) if start > 0 else -1
+            chunks.append({
+                "frames": frames[start:end],
+                "frame_index": start,
+                "packet_ids": {
+                    name: int(counts[start]) for name, counts in packets_before.items()
+                },
+                "context_key": (self._context_key_function(str(context_row))
+                                if context_row >= 0 else self._latest_context_key),
             })
+        return chunks
+
+    def _start_chunk(self, chunk: dict):
+        self._frames_read = chunk["frame_index"]
+        self._packets_read = 2 * chunk["frame_index"]
+        self.signal_data.packet_id = chunk["packet_ids"]["signal_data"]
+        self.context.packet_id = chunk["packet_ids"]["context"]
+        self.heartbeat_context.packet_id = chunk["packet_ids"]["heartbeat_context"]
+        self.gps_context.packet_id = chunk["packet_ids"]["gps_context"]
+        self._latest_context_key = chunk["context_key"]
+
+    def parse_parallel(self, stream: MappedStream, progress_bar=None):
+        """
+        Parses a mapped file in `workers` processes.
+
+        The file is indexed once, the index is split into byte balanced
+        chunks of whole frames, and each worker parses its chunk of the
+        file into a directory of its own.  The parts are then merged into
+        the usual outputs.
+        """
+        frames = self.index_frames(stream.buffer)
+        chunks = self._plan_chunks(stream.buffer, frames)
+        part_paths = [parallel.part_directory(self._output_path, i) for i in range(len(chunks))]
+
+        last_read = 0
+        for result in parallel.run_parts(_parse_part,
+                [(self._parser_args, part_path, chunk) for part_path, chunk in zip(part_paths, chunks)],
+                self.workers):
+            self._bytes_read = result["bytes_read"]
+            self._packets_read = result["packets_read"]
+            self._frames_read = result["frames_read"]
+            self._bad_packets += result["bad_packets"]
+            last_read = self._update_progress(progress_bar, last_read)
+
+        parallel.merge_parts(part_paths, self._output_path, self._recorder_options)
 
     def parse_stream(self, stream: RawIOBase, progress_bar=None):
         self.logger.info("Starting the parsing...")
 
-        if progress_bar is not None:
-            last_read = 0
+        last_read = 0
+
+        if self.use_mmap or self.workers > 1:
+            stream = MappedStream.from_stream(stream)
 
         stream.seek(0, os.SEEK_END)
         self.EOF = stream.tell()
         stream.seek(0, os.SEEK_SET)
 
+        if isinstance(stream, MappedStream):
+            if self.workers > 1:
+                self.parse_parallel(stream, progress_bar)
+            else:
+                self.parse_frames(stream, progress_bar)
+            self.close()
+            return
+
         self.find_first_packet(stream)
 
         vita_payload, payload_size = self.read_packet(stream)
-        while self.bytes_read < self.EOF:
-            #in principle i need a second loop here because, acording to the
-            #spec provided, multiple "VRT" packets can be squished inside one
-            #vita 49.1 frame packet.  But each frame packet seems to only
-            #contain one vita 49.2 packet + some junk that I can't make sense
-            #of yet.
-            self._packets_read += 1
-            if vita_payload != BAD_PACKET_STATUS_CODE:
-                header = vita.vrt_header(vita_payload)
-                packet = vita.vrt_packet(vita_payload)
-                class_id = packet.class_identifier
-
-                self.process_packet(header.packet_type, class_id[1], vita_payload, payload_size)
-
-            self._packets_read += 1
-            self._frames_read += 1
-
-            if progress_bar is not None:
-                progress_bar.update(self.bytes_read - last_read)
-                last_read = self.bytes_read
-            else:
-                if (self.packets_read % 1000 == 0):
-                    print(f"{(self.bytes_read / self.EOF) * 100:.2f}% processed")
+        while vita_payload is not None:
+            self._process_frame(vita_payload, payload_size)
+            last_read = self._update_progress(progress_bar, last_read)
 
+            if self.bytes_read >= self.EOF:
+                break
             vita_payload, payload_size = self.read_packet(stream)
+
+        self.close()
+
+
+def _parse_part(parser_args: dict, part_path: Path, chunk: dict) -> dict:
+    """
+    Worker side of `Parser.parse_parallel`: parses one chunk of the frame
+    index into `part_path`.
+    """
+    part_path.mkdir(parents=True, exist_ok=True)
+    parser = Parser(**(parser_args | {"output_path": part_path, "workers": 1}))
+    with open(parser_args["input_path"], "rb") as f:
+        stream = MappedStream.from_stream(f)
+    parser.EOF = len(stream)
+    parser._start_chunk(chunk)
+    parser.parse_frames(stream, frames=chunk["frames"])
+    parser.close()
+    return {
+        "bytes_read": parser.bytes_read,
+        "packets_read": parser.packets_read,
+        "frames_read": parser._frames_read,
+        "bad_packets": parser.bad_packets,
+    }
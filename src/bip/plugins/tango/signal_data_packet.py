@@ -4,6 +4,8 @@ import pyarrow as pa
 import numpy as np
 
 from bip.vita import SignalDataPacket
+from bip.vita.signal_data_packet import decode_signal_data
+from bip.common import iq_layout as iq_layouts
 from bip.common import bit_manipulation
 
 
@@ -76,18 +78,23 @@ class SignalData:
             Recorder: type,
             recorder_opts: dict = None,
             batch_size: int = 1000,
+            iq_layout: str = iq_layouts.SPLIT,
             **kwargs):
 
         if recorder_opts is None:
             recorder_opts = {}
 
+        self.iq_layout = iq_layouts.check(iq_layout)
+        self._schema = iq_layouts.schema(_schema, self.iq_layout)
         self.recorder = Recorder(
                 output_path,
-                schema=pa.schema([(e[0], e[1]) for e in _schema]),
+                schema=pa.schema([(e[0], e[1]) for e in self._schema]),
                 options=recorder_opts,
                 batch_size=batch_size)
 
+        self.batch_size = batch_size
         self.packet_id = 0
+        self._pending = []
 
     def add_record(self,
             packet: _SignalDataPacket,
@@ -125,11 +132,8 @@ class SignalData:
             "frame_index": np.uint32(frame_index),
             "packet_index": np.uint32(packet_index),
 
-            "samples_i": packet.data[:,0],
-            "samples_q": packet.data[:,1],
-
             "data_key": packet.context_packet_key
-        })
+        } | iq_layouts.record(packet.data, self.iq_layout))
 
     def process(self,
             payload: bytes,
@@ -138,13 +142,71 @@ class SignalData:
             packet_index: int,
             payload_size: int,
             context_packet_key: str = ""):
-        #payload_size -1 since tango adds an extra trailer
-        self.add_record(_SignalDataPacket(payload, payload_size, context_packet_key),
-                frame_index=frame_index,
-                packet_index=packet_index)
+        # the packet is decoded along with the rest of its batch
+        self._pending.append((payload, payload_size, frame_index, packet_index,
+                context_packet_key, self.packet_id))
         self.packet_id += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Decodes the pending packets in one go and hands them to the recorder
+        as a batch.
+        """
+        if len(self._pending) == 0:
+            return
+
+        payloads, payload_sizes, frame_index, packet_index, context_keys, packet_id = zip(*self._pending)
+        self._pending = []
+
+        #payload_size -1 since tango adds an extra trailer
+        packets = decode_signal_data(payloads, trailer_words=2, payload_sizes=payload_sizes)
+        stream_id = packets["stream_id"]
+        class_id = packets["class_id"]
+        data_keys = [
+            key.format(stream_id=s) if "{stream_id}" in key else key
+            for key, s in zip(context_keys, stream_id.tolist())
+        ]
+
+        self.recorder.add_batch({
+            "packet_id": np.array(packet_id, dtype=np.uint32),
+
+            "packet_size": packets["packet_size"],
+            "packet_count": packets["packet_count"],
+            "tsfd": packets["tsf"],
+            "tsid": packets["tsi"],
+            "indicators": packets["indicators"],
+            "packet_type": packets["packet_type"],
+
+            "classid_pad_bit_count": (class_id[:, 0] >> 27).astype(np.uint8),
+            "classid_oui": class_id[:, 0] & np.uint32(0xFFFFFF),
+            "classid_information_class_code": (class_id[:, 1] >> 16).astype(np.uint16),
+            "classid_packet_class_code": (class_id[:, 1] & 0xFFFF).astype(np.uint16),
+
+            "tsi": packets["integer_timestamp"],
+            "tsf0": packets["fractional_timestamp"][:, 0],
+            "tsf1": packets["fractional_timestamp"][:, 1],
+            "time": packets["time"],
+
+            "stream_id": stream_id,
+            "sample_count": packets["sample_count"],
+            "trailer": list(packets["trailer"]),
+
+            "frame_index": np.array(frame_index, dtype=np.uint32),
+            "packet_index": np.array(packet_index, dtype=np.uint32),
+
+            "data_key": data_keys,
+        } | iq_layouts.columns(packets["samples"], packets["sample_offsets"], self.iq_layout))
+
+    def close(self):
+        self.flush()
+        self.recorder.close()
 
     @property
     def metadata(self) -> dict :
-        return self.recorder.metadata | {"schema": schema}
+        return self.recorder.metadata | {
+                "schema": [ _schema_elt(e) for e in self._schema ],
+                "iq_layout": self.iq_layout,
+        }
 
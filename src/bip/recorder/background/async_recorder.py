@@ -0,0 +1,154 @@
+import queue
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+
+
+_RECORD = 0
+_BATCH = 1
+
+
+def _write(chunks: queue.Queue, recorder, errors: list):
+    """
+    The writer thread: hands the chunks of records to `recorder` until it
+    gets `None`, then closes it.  Only refers to the wrapper's parts rather
+    than the wrapper itself, so that an unclosed wrapper can still be
+    garbage collected (and closed).
+    """
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            break
+        if len(errors) > 0:
+            # keep draining the queue so that the parser never blocks
+            continue
+        try:
+            for kind, value in chunk:
+                if kind == _RECORD:
+                    recorder.add_record(value)
+                else:
+                    recorder.add_batch(value)
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        recorder.close()
+    except Exception as e:
+        errors.append(e)
+
+
+class AsyncRecorder:
+    """
+    Wraps a recorder so that its batches are encoded and written by a
+    background thread, overlapping writing with parsing.
+
+    Records are handed to the thread a batch at a time over a queue of at
+    most `queue_size` batches; adding records blocks while the queue is
+    full.  The first error the wrapped recorder raises is raised again by
+    the next `add_record`/`add_batch`, or by `close`.
+    """
+    def __init__(self,
+            Recorder: type,
+            filename: Path,
+            schema: pa.schema,
+            options: dict = {},
+            batch_size: int = 1000,
+            queue_size: int = 8
+            ):
+
+        # closed until the writer thread is running
+        self._closed = True
+        self._recorder = Recorder(filename, schema=schema, options=options, batch_size=batch_size)
+        self._chunk_size = max(1, batch_size)
+        self._pending = []
+        self._errors = []
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(
+                target=_write,
+                args=(self._queue, self._recorder, self._errors),
+                name=f"bip-writer-{Path(filename).name}",
+                daemon=True)
+        self._thread.start()
+        self._closed = False
+
+    def extension(self) -> str:
+        return self._recorder.extension()
+
+    @property
+    def schema(self) -> pa.schema:
+        return self._recorder.schema
+
+    @property
+    def batch_size(self) -> int:
+        return self._recorder.batch_size
+
+    @property
+    def writer(self):
+        return getattr(self._recorder, "writer", None)
+
+    @property
+    def metadata(self) -> dict:
+        return self._recorder.metadata | {"queue_size": self._queue.maxsize}
+
+    def _check(self):
+        if len(self._errors) > 0:
+            raise self._errors[0]
+
+    def _submit(self):
+        if len(self._pending) > 0:
+            self._queue.put(self._pending)
+            self._pending = []
+
+    def add_record(self, record: dict):
+        self._check()
+        self._pending.append((_RECORD, record))
+        if len(self._pending) >= self._chunk_size:
+            self._submit()
+
+    def add_batch(self, columns: dict):
+        self._check()
+        self._pending.append((_BATCH, columns))
+        self._submit()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        self._submit()
+        self._queue.put(None)
+        self._thread.join()
+        self._check()
+
+    def __del__(self):
+        if not self._closed:
+            self.close()
+
+
+class _AsyncRecorderConstructor:
+    """
+    Builds `AsyncRecorder`s around recorders of type `Recorder`.  A class
+    rather than a lambda, so that it can be handed to worker processes.
+    """
+    def __init__(self, Recorder: type, queue_size: int = 8):
+        self.Recorder = Recorder
+        self.queue_size = queue_size
+
+    def extension(self) -> str:
+        return self.Recorder.extension()
+
+    def __call__(self, filename, schema, options={}, batch_size=1000):
+        return AsyncRecorder(
+            self.Recorder,
+            filename,
+            schema,
+            options=options,
+            batch_size=batch_size,
+            queue_size=self.queue_size
+        )
+
+
+def new_async_recorder(Recorder: type, queue_size: int = 8):
+    return _AsyncRecorderConstructor(Recorder, queue_size)
@@ -26,6 +26,7 @@ class DummyWriter:
         self._options = options
 
         self._add_record = self._options.get("add_record_callback", None)
+        self._add_batch = self._options.get("add_batch_callback", None)
         self._close = self._options.get("close_callback", None)
 
         self.batch_size = batch_size
@@ -45,6 +46,18 @@ class DummyWriter:
         if self._add_record is not None:
             self._add_record(record)
 
+    def add_batch(self, columns: dict):
+        if self._add_batch is not None:
+            self._add_batch(columns)
+        elif self._add_record is not None:
+            columns = {
+                name: column.to_numpy(zero_copy_only=False) if isinstance(column, pa.Array) else column
+                for name, column in columns.items()
+            }
+            n_records = len(next(iter(columns.values()), []))
+            for i in range(n_records):
+                self._add_record({name: column[i] for name, column in columns.items()})
+
     def close(self):
         if self._closed:
             return
@@ -0,0 +1,32 @@
+from pathlib import Path
+from typing import List
+
+import pyarrow.parquet as pq
+
+
+# options of the bip recorders rather than of `pyarrow.parquet.ParquetWriter`
+_RECORDER_OPTIONS = ("partition_cols", "max_open_files",
+        "batch_bytes", "min_batch_rows", "max_batch_rows")
+
+def concatenate_parquet(sources: List[Path], destination: Path, options: dict = None):
+    """
+    Writes the row groups of every parquet file in `sources`, in order, to
+    a single parquet file at `destination` using the schema of the first
+    source.  `options` are passed on to `pyarrow.parquet.ParquetWriter`
+    (e.g. compression).
+    """
+    if options is None:
+        options = {}
+    options = {k: v for k, v in options.items() if k not in _RECORDER_OPTIONS}
+
+    writer = None
+    try:
+        for source in sources:
+            parquet_file = pq.ParquetFile(source)
+            if writer is None:
+                writer = pq.ParquetWriter(destination, parquet_file.schema_arrow, **options)
+            for i in range(parquet_file.num_row_groups):
+                writer.write_table(parquet_file.read_row_group(i))
+    finally:
+        if writer is not None:
+            writer.close()
@@ -1,12 +1,61 @@
 from pathlib import Path
 from typing import List, Tuple
 
-import pandas as pd
+import numpy as np
 import pyarrow as pa
 import pyarrow.parquet as pq
 
+from bip.common import arrow_manipulation
+
+
+class _ColumnBuffer:
+    """
+    A batch worth of values of one column.  Fixed width columns are kept in
+    a preallocated numpy array, anything else (lists, strings) in a list.
+    """
+    def __init__(self, type_: pa.DataType, size: int):
+        self.type = type_
+        if arrow_manipulation.is_fixed_width(type_):
+            self.values = np.zeros(size, dtype=type_.to_pandas_dtype())
+            self.valid = np.ones(size, dtype=bool)
+        else:
+            self.values = [None] * size
+            self.valid = None
+
+    def set(self, index: int, value):
+        if self.valid is None:
+            self.values[index] = value
+        elif value is None:
+            self.valid[index] = False
+        else:
+            self.values[index] = value
+            self.valid[index] = True
+
+    def array(self, length: int) -> pa.Array:
+        if self.valid is None:
+            values = self.values[:length]
+            if (arrow_manipulation.is_numeric_list(self.type)
+                    and not any(v is None for v in values)):
+                # gather the lists into one buffer in one go
+                return arrow_manipulation.concatenate_lists(values, self.type)
+            return pa.array(values, type=self.type)
+        valid = self.valid[:length]
+        return pa.array(self.values[:length], type=self.type,
+                mask=None if valid.all() else ~valid)
+
 
 class PQWriter:
+    """
+    Writes records to a parquet file in row groups.
+
+    By default records are written a row group of `batch_size` records at a
+    time.  With `options['batch_bytes']` set, records are instead gathered
+    until they take up that many bytes (in memory, uncompressed) and each
+    row group holds about that many bytes, with at least
+    `options['min_batch_rows']` and at most `options['max_batch_rows']`
+    rows.  `batch_size` is then only how many records are gathered before
+    their size is looked at.
+    """
     @staticmethod
     def extension() -> str:
         return "parquet"
@@ -26,50 +75,134 @@ class PQWriter:
 
         self.batch_size = batch_size
         self.schema = schema
-        self.data = []
         self.writer = None
         self.current_index = 0
+        self._columns = self._new_columns()
 
         # terrible, horrible, no good, very bad hack.
         if "partition_cols" in self._options:
             del self._options['partition_cols']
 
-    def _record(self):
-        df = pd.DataFrame(self.data)
-        table = pa.Table.from_pandas(df)
-        try:
-            if self.writer == None:
-                self.writer = pq.ParquetWriter(self._filename, self.schema, **self._options)
-            self.writer.write_table(table)
-        except Exception as e:
-            print(f"Error writing file: {e}, {self._filename}")
+        self._batch_bytes = self._options.pop("batch_bytes", None)
+        self._min_batch_rows = self._options.pop("min_batch_rows", None) or 1
+        self._max_batch_rows = self._options.pop("max_batch_rows", None)
+        self._pending = []
+        self._pending_rows = 0
+        self._pending_bytes = 0
+
+    def _is_full(self, rows: int, nbytes: int) -> bool:
+        """
+        Whether `rows` records taking up `nbytes` bytes make a row group.
+        """
+        if self._batch_bytes is None:
+            return rows >= self.batch_size
+        if rows < self._min_batch_rows:
+            return False
+        return (nbytes >= self._batch_bytes
+                or (self._max_batch_rows is not None and rows >= self._max_batch_rows))
+
+    def _row_group_size(self, rows: int, nbytes: int) -> int:
+        """
+        The number of rows per row group to write `rows` records taking up
+        `nbytes` bytes with.
+        """
+        if self._batch_bytes is None or rows == 0:
+            return None
+        size = int(self._batch_bytes * rows / max(nbytes, 1))
+        size = max(size, self._min_batch_rows)
+        if self._max_batch_rows is not None:
+            size = min(size, self._max_batch_rows)
+        return max(1, size)
+
+    def _flush(self, final: bool = True):
+        """
+        Writes out the pending records.  Unless `final`, records short of a
+        whole row group are kept back for the next one.
+        """
+        if len(self._pending) == 0:
+            return
 
-        self.data = []
+        table = pa.Table.from_batches(self._pending, schema=self.schema)
+        rows, nbytes = self._pending_rows, self._pending_bytes
+        row_group_size = self._row_group_size(rows, nbytes)
+        self._pending = []
+        self._pending_rows = 0
+        self._pending_bytes = 0
+
+        if not final and row_group_size is not None:
+            whole = rows - rows % row_group_size
+            if whole < rows:
+                rest = table.slice(whole)
+                self._pending = rest.to_batches()
+                self._pending_rows = rows - whole
+                self._pending_bytes = nbytes * (rows - whole) // rows
+                table = table.slice(0, whole)
+
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self._filename, self.schema, **self._options)
+        self.writer.write_table(table, row_group_size=row_group_size)
+
+    def _write_batch(self, batch: pa.RecordBatch):
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        self._pending_bytes += batch.nbytes
+        if self._batch_bytes is None or self._is_full(self._pending_rows, self._pending_bytes):
+            self._flush(final=self._batch_bytes is None)
+
+    def _new_columns(self) -> dict:
+        return {
+            field.name: _ColumnBuffer(field.type, self.batch_size) for field in self.schema
+        }
+
+    def _record(self):
+        self._write_batch(pa.RecordBatch.from_arrays(
+                [self._columns[field.name].array(self.current_index) for field in self.schema],
+                schema=self.schema))
         self.current_index = 0
+        if len(self._pending) > 0:
+            # the pending batch shares the buffers' memory
+            self._columns = self._new_columns()
 
     def add_record(self, record: dict):
         assert self.current_index < self.batch_size
-        self.data.append(record)
+        for name, column in self._columns.items():
+            column.set(self.current_index, record.get(name))
         self.current_index += 1
         if self.current_index == self.batch_size:
             self._record()
 
-    def close(self):
-        if self._closed:
-            return
-
+    def add_batch(self, columns: dict):
+        # keep the records in the order they were added
         if self.current_index != 0:
             self._record()
 
-        self.writer.close()
+        self._write_batch(pa.RecordBatch.from_arrays(
+                [arrow_manipulation.to_array(columns[field.name], field.type) for field in self.schema],
+                schema=self.schema))
+
+    def close(self):
+        if self._closed:
+            return
+        # a failed write is raised once, not again when collected
         self._closed = True
 
+        try:
+            if self.current_index != 0:
+                self._record()
+            self._flush()
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+
     @property
     def metadata(self) -> dict:
         return  {
                 "output": str(self._filename),
                 "options": self._options,
-                "batch_size": self.batch_size
+                "batch_size": self.batch_size,
+                "batch_bytes": self._batch_bytes,
+                "min_batch_rows": self._min_batch_rows,
+                "max_batch_rows": self._max_batch_rows,
         }
 
     def __del__(self):
@@ -1,12 +1,43 @@
+import os
+from collections import OrderedDict
 from pathlib import Path
 from typing import List
+from urllib.parse import quote
 
-import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
 
+from bip.recorder.parquet.merge import concatenate_parquet
 from bip.recorder.parquet.pqwriter import PQWriter
 
+
+_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _partition_directory(partition_cols: List[str], key: tuple) -> Path:
+    """
+    The hive style directory (`col=value/...`) of the partition `key`.
+    """
+    return Path(*[
+        f"{col}={_NULL_PARTITION if value is None else quote(str(value), safe='')}"
+        for col, value in zip(partition_cols, key)
+    ])
+
+
+class _Partition:
+    """
+    The rows of one partition waiting to be written, and the writer of the
+    file they are written to (while it is open).
+    """
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.tables = []
+        self.rows = 0
+        self.nbytes = 0
+        self.writer = None
+        self.files = []
+
+
 class PartitionedPQWriter(PQWriter):
     def __init__(self,
         filename: Path,
@@ -14,59 +45,165 @@ class PartitionedPQWriter(PQWriter):
         partition_cols,
         options: dict = {},
         batch_size: int = 1000,
+        max_open_files: int = 64,
     ):
         """
-        `existing_data_behavior` can be any of:
-            "delete_matching" - delete an existing dataset at the same path
-            "overwrite_or_ignore" - append to existing data at the same path
-            "error" - raise an error if data exists at the same path
-            
+        Writes a hive partitioned dataset, `filename/col=value/part-0.parquet`,
+        with a single file per partition.  The partition columns are not
+        written to the files.
+
+        Rows are gathered per partition and written as row groups of
+        `batch_size` rows (or of `options['batch_bytes']` bytes, see
+        `PQWriter`).  At most `max_open_files` (or
+        `options['max_open_files']`) partitions are kept open; when another
+        one is needed the least recently used is written out and closed,
+        and is continued in another file if it turns up again.  Those files
+        are joined back together on `close`.
+
+        The rows waiting across all the open partitions are kept under
+        `options['max_pending_bytes']` bytes, by default `batch_bytes`:
+        past that the partition with the most rows waiting is written out
+        early, as a smaller row group.
+
         `options['partition_cols'] MUST be set for this recorder
         """
-            
+
         super(PartitionedPQWriter, self).__init__(filename, schema, options, batch_size)
-        
-        self._partition_cols = partition_cols
-        
-    
-    def _record(self):
-        df = pd.DataFrame(self.data)
-        table = pa.Table.from_pandas(df)
-        pq.write_to_dataset(
-            table, 
-            self._filename,
-            schema=self.schema,
-            existing_data_behavior="overwrite_or_ignore",
-            partition_cols=self._partition_cols,
-            **self._options
-        )
-        
-        self.data = []
-        self.current_index = 0
-        
-        
+
+        self._partition_cols = list(partition_cols)
+        self._max_open_files = max(1, self._options.pop("max_open_files", max_open_files))
+        self._max_pending_bytes = self._options.pop("max_pending_bytes", None) or self._batch_bytes
+        # the bytes waiting across every partition
+        self._partition_bytes = 0
+        self._file_schema = pa.schema(
+            [field for field in schema if field.name not in self._partition_cols])
+
+        # open partitions, least recently used first
+        self._open = OrderedDict()
+        # every partition written so far
+        self._partitions = {}
+
+    def _partition(self, key: tuple) -> _Partition:
+        if key in self._open:
+            self._open.move_to_end(key)
+            return self._open[key]
+
+        if len(self._open) >= self._max_open_files:
+            _, evicted = self._open.popitem(last=False)
+            self._flush_partition(evicted)
+            evicted.writer.close()
+            evicted.writer = None
+
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = _Partition(Path(self._filename) / _partition_directory(self._partition_cols, key))
+            self._partitions[key] = partition
+        self._open[key] = partition
+        return partition
+
+    def _flush_partition(self, partition: _Partition):
+        if partition.writer is None:
+            partition.directory.mkdir(parents=True, exist_ok=True)
+            file_ = partition.directory / f"part-{len(partition.files)}.parquet"
+            partition.writer = pq.ParquetWriter(file_, self._file_schema, **self._options)
+            partition.files.append(file_)
+
+        if partition.rows > 0:
+            partition.writer.write_table(
+                pa.concat_tables(partition.tables),
+                row_group_size=self._row_group_size(partition.rows, partition.nbytes) or partition.rows)
+            self._partition_bytes -= partition.nbytes
+            partition.tables = []
+            partition.rows = 0
+            partition.nbytes = 0
+
+    def _write_batch(self, batch: pa.RecordBatch):
+        keys = zip(*[batch.column(col).to_pylist() for col in self._partition_cols])
+        rows = {}
+        for i, key in enumerate(keys):
+            rows.setdefault(key, []).append(i)
+
+        table = pa.Table.from_batches([batch]).select(self._file_schema.names)
+        for key, indices in rows.items():
+            partition = self._partition(key)
+            part = table.take(indices)
+            partition.tables.append(part)
+            partition.rows += part.num_rows
+            partition.nbytes += part.nbytes
+            self._partition_bytes += part.nbytes
+            if self._is_full(partition.rows, partition.nbytes):
+                self._flush_partition(partition)
+
+        while (self._max_pending_bytes is not None
+               and self._partition_bytes > self._max_pending_bytes):
+            self._flush_partition(max(self._open.values(), key=lambda p: p.nbytes))
+
+    def _join_files(self, partition: _Partition):
+        if len(partition.files) < 2:
+            return
+        joined = partition.directory / "part.parquet.tmp"
+        concatenate_parquet(partition.files, joined, self._options)
+        for file_ in partition.files:
+            os.remove(file_)
+        os.replace(joined, partition.files[0])
+        partition.files = partition.files[:1]
+
     def close(self):
         if self._closed:
             return
-        
-        if self.current_index != 0:
-            self._record()
-            
+        # a failed write is raised once, not again when collected
         self._closed = True
-        
-    
+
+        try:
+            if self.current_index != 0:
+                self._record()
+            for partition in self._open.values():
+                self._flush_partition(partition)
+        finally:
+            for partition in self._open.values():
+                if partition.writer is not None:
+                    partition.writer.close()
+                    partition.writer = None
+            self._open.clear()
+
+        for partition in self._partitions.values():
+            self._join_files(partition)
+
+    @property
+    def metadata(self) -> dict:
+        return super().metadata | {
+            "partition_cols": self._partition_cols,
+            "max_open_files": self._max_open_files,
+            "max_pending_bytes": self._max_pending_bytes,
+        }
+
+
+class _PartitionedPQWriterConstructor:
+    """
+    Builds `PartitionedPQWriter`s for fixed partition columns.  A class
+    rather than a lambda, so that it can be handed to worker processes.
+    """
+    def __init__(self, partition_cols, max_open_files: int = 64):
+        self.partition_cols = partition_cols
+        self.max_open_files = max_open_files
+
+    @staticmethod
+    def extension() -> str:
+        return PartitionedPQWriter.extension()
+
+    def __call__(self, filename, schema, options={}, batch_size=1000):
+        return PartitionedPQWriter(
+            filename,
+            schema,
+            self.partition_cols,
+            options=options,
+            batch_size=batch_size,
+            max_open_files=self.max_open_files
+        )
+
+
 def new_partitioned_parquet_writer(
-    partition_cols
+    partition_cols,
+    max_open_files: int = 64
 ):
-    constructor = lambda filename, schema, options={}, batch_size=1000: PartitionedPQWriter(
-        filename, 
-        schema, 
-        partition_cols,
-        options=options,
-        batch_size=batch_size
-    )
-    
-    constructor.extension = PartitionedPQWriter.extension
-    
-    return constructor
-        
\ No newline at end of file
+    return _PartitionedPQWriterConstructor(partition_cols, max_open_files)
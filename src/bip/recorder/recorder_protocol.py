@@ -35,6 +35,13 @@ class Recorder(Protocol):
         """
         pass
 
+    def add_batch(self, columns: dict):
+        """
+        Add a batch of records to the recorder, given as a column (an array,
+        or a list with an element per record) for every field of the schema.
+        """
+        pass
+
     def close(self):
         """
         Close the recorder.
@@ -1,5 +1,8 @@
 import numpy as np
+
+from bip.common import arrow_manipulation
 from . vrt_packet import VRTPacket
+from . vrt_packet import decode_vrt_packets
 from . class_identifier import ClassIdentifier
 
 
@@ -77,4 +80,58 @@ class SignalDataPacket(VRTPacket):
 
     @property
     def class_id_codes(self) -> ClassIdentifier:
-        return ClassIdentifier(self.words[2:4])
\ No newline at end of file
+        return ClassIdentifier(self.words[2:4])
+
+SIGNAL_DATA_HEADER_WORDS = 7
+
+
+def decode_signal_data(payloads: list, *, trailer_words: int = 1, payload_sizes=None) -> dict:
+    """
+    Decodes the fixed fields, trailers and samples of a batch of signal
+    data packets in one go, rather than building a `SignalDataPacket` for
+    each of them.
+
+    `trailer_words` is the size of the trailer when the trailer indicator
+    is set (Tango has a 2 word trailer, Juliet a 1 word one).  The sample
+    count comes from `payload_sizes` (in words) when given, and from the
+    packet size in the header otherwise.
+
+    Returns a dict of arrays with a row per packet, except for `samples`:
+    the interleaved I, Q samples of every packet back to back, the samples
+    of the i-th packet running from pair `sample_offsets[i]` to pair
+    `sample_offsets[i+1]`.
+    """
+    n_packets = len(payloads)
+    lengths = np.fromiter((len(p) for p in payloads), dtype=np.int64, count=n_packets)
+    if np.any(lengths < 4*SIGNAL_DATA_HEADER_WORDS):
+        raise ValueError("signal data packet shorter than its header")
+
+    header_bytes = 4*SIGNAL_DATA_HEADER_WORDS
+    words = np.frombuffer(b"".join(p[:header_bytes] for p in payloads),
+            dtype=np.uint32).reshape((n_packets, SIGNAL_DATA_HEADER_WORDS))
+    header = words[:, 0]
+
+    has_trailer = (header & np.uint32(1 << 26)) != 0
+    trailer = np.frombuffer(b"".join(p[len(p) - 4*trailer_words:] for p in payloads),
+            dtype=np.uint32).reshape((n_packets, trailer_words)).copy()
+    trailer[~has_trailer] = 0
+
+    if payload_sizes is None:
+        payload_sizes = header & np.uint32(0xFFFF)
+    sample_count = (np.asarray(payload_sizes, dtype=np.int64)
+                    - SIGNAL_DATA_HEADER_WORDS - trailer_words*has_trailer)
+    if np.any((sample_count < 0) | (header_bytes + 4*sample_count > lengths)):
+        raise ValueError("signal data packet smaller than its sample count")
+
+    # the interleaved samples of every packet, back to back
+    samples = np.frombuffer(b"".join(
+            p[header_bytes:header_bytes + 4*count]
+            for p, count in zip(payloads, sample_count.tolist())), dtype=np.int16)
+
+    return decode_vrt_packets(words) | {
+        "has_trailer": has_trailer,
+        "trailer": trailer,
+        "sample_count": sample_count.astype(np.uint32),
+        "sample_offsets": arrow_manipulation.offsets(sample_count),
+        "samples": samples,
+    }
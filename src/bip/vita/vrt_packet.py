@@ -1,5 +1,7 @@
 import numpy as np
 
+from bip.common import bit_manipulation
+
 class VRTPacketHeader:
     def __init__(self, value):
         self.value = int(value)
@@ -63,3 +65,32 @@ class VRTPacket:
         return self.words[5:7]
 
 
+
+PROLOGUE_WORDS = 7
+
+
+def decode_vrt_packets(words: np.ndarray) -> dict:
+    """
+    Decodes the header, stream id, class id and timestamps of a batch of
+    packets in one go, from a matrix with a row of (at least
+    `PROLOGUE_WORDS`) words per packet.
+
+    Returns a dict of arrays with a row per packet, the same values
+    `VRTPacketHeader` and `VRTPacket` give for a single packet.
+    """
+    header = words[:, 0]
+
+    return {
+        "header": header,
+        "packet_size": (header & 0xFFFF).astype(np.uint16),
+        "packet_count": ((header >> 16) & 0xF).astype(np.uint16),
+        "tsf": ((header >> 20) & 0x3).astype(np.uint8),
+        "tsi": ((header >> 22) & 0x3).astype(np.uint8),
+        "indicators": ((header >> 24) & 0x7).astype(np.uint8),
+        "packet_type": (header >> 28).astype(np.uint8),
+        "stream_id": words[:, 1],
+        "class_id": words[:, 2:4],
+        "integer_timestamp": words[:, 4],
+        "fractional_timestamp": words[:, 5:7],
+        "time": bit_manipulation.times(words[:, 4], words[:, 5], words[:, 6]),
+    }
@@ -0,0 +1,46 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from bip.common import arrow_manipulation
+
+
+def test_offsets():
+    np.testing.assert_array_equal(arrow_manipulation.offsets([2, 0, 3]), [0, 2, 2, 5])
+    assert arrow_manipulation.offsets([]).tolist() == [0]
+    assert arrow_manipulation.offsets([2, 0, 3]).dtype == np.int32
+
+
+def test_offsets_overflow():
+    lengths = np.full(3, 1 << 30, dtype=np.int64)
+    np.testing.assert_array_equal(arrow_manipulation.offsets(lengths[:1]), [0, 1 << 30])
+    with pytest.raises(ValueError, match="int32"):
+        arrow_manipulation.offsets(lengths)
+
+
+def test_list_array():
+    values = np.arange(5, dtype=np.int16)
+    array = arrow_manipulation.list_array(values, arrow_manipulation.offsets([2, 0, 3]))
+
+    assert array.type == pa.list_(pa.int16(), -1)
+    assert array.to_pylist() == [[0, 1], [], [2, 3, 4]]
+    # the values are not copied
+    assert array.values.buffers()[1].address == values.ctypes.data
+
+
+def test_concatenate_lists():
+    data = np.arange(12, dtype=np.int16).reshape((-1, 2))
+    array = arrow_manipulation.concatenate_lists([data[:3, 0], data[3:, 1], data[:0, 0]],
+            pa.list_(pa.int16(), -1))
+    assert array.to_pylist() == [[0, 2, 4], [7, 9, 11], []]
+
+    empty = arrow_manipulation.concatenate_lists([], pa.list_(pa.uint32(), -1))
+    assert len(empty) == 0
+    assert empty.type == pa.list_(pa.uint32(), -1)
+
+
+def test_to_array():
+    array = pa.array([1, 2], type=pa.uint32())
+    assert arrow_manipulation.to_array(array, pa.uint32()) is array
+    assert arrow_manipulation.to_array(array, pa.uint64()).type == pa.uint64()
+    assert arrow_manipulation.to_array(np.array([1, 2]), pa.uint8()).type == pa.uint8()
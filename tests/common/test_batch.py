@@ -0,0 +1,100 @@
+import json
+import struct
+
+import pandas as pd
+import pytest
+
+from bip import batch
+
+
+def _juliet_packet(time_ns, words):
+    return (struct.pack("<III", time_ns >> 32, time_ns & 0xFFFFFFFF, len(words))
+            + struct.pack(f">{len(words)}I", *words))
+
+
+def _signal_data_words(samples):
+    words = [0x1CE10000 | (len(samples) + 8), 0xB1DED1ED, 0x00000001,
+             0xF0000000, 0x0000FFFF, 0x00000000, 0x10000000]
+    words += [((q & 0xFFFF) << 16) | (i & 0xFFFF) for i, q in samples]
+    words += [0xFFFFFFFF]
+    return words
+
+
+@pytest.fixture
+def juliet_directory(tmp_path):
+    directory = tmp_path / "inputs"
+    directory.mkdir()
+    for n in range(3):
+        with open(directory / f"input{n}.bin", "wb") as f:
+            for t in range(n + 1):
+                f.write(_juliet_packet(t, _signal_data_words([(t, -t)])))
+            # incomplete packet at the end of the file
+            f.write(struct.pack("<IIII", 0, 4, 100, 0))
+    yield directory
+
+
+def test_find_jobs(juliet_directory, tmp_path):
+    output = tmp_path / "outputs"
+    options = {"mmap": True}
+
+    jobs = batch.find_jobs(str(juliet_directory), output, "juliet", options)
+    assert [job["input"] for job in jobs] == [
+            str(juliet_directory / f"input{n}.bin") for n in range(3)]
+    assert [job["output"] for job in jobs] == [
+            str(output / f"input{n}") for n in range(3)]
+    assert all(job["parser"] == "juliet" and job["options"] == options for job in jobs)
+
+    globbed = batch.find_jobs(str(juliet_directory / "input[12].bin"), output, "juliet", options)
+    assert globbed == jobs[1:]
+
+    manifest = tmp_path / "jobs.json"
+    manifest.write_text(json.dumps({"jobs": [
+        "inputs/input0.bin",
+        {"input": "inputs/input1.bin", "output": "elsewhere", "options": {"clean": True}},
+    ]}))
+    assert batch.is_batch_input(str(manifest))
+    assert not batch.is_batch_input(str(juliet_directory / "input0.bin"))
+    jobs = batch.find_jobs(str(manifest), output, "juliet", options)
+    assert jobs[0]["output"] == str(output / "input0")
+    assert jobs[1]["output"] == str(tmp_path / "elsewhere")
+    assert jobs[1]["options"] == {"mmap": True, "clean": True}
+
+
+@pytest.mark.parametrize("max_jobs", [1, 2])
+def test_run_batch(juliet_directory, tmp_path, max_jobs):
+    output = tmp_path / "outputs"
+    jobs = batch.find_jobs(str(juliet_directory), output, "juliet", {})
+    jobs.append({"input": str(juliet_directory / "missing.bin"),
+                 "output": str(output / "missing"), "parser": "juliet", "options": {}})
+
+    summary = batch.run_batch(jobs, output, max_jobs, verbose=False)
+
+    results = summary["jobs"]
+    assert [r["status"] for r in results] == ["ok", "ok", "ok", "failed"]
+    assert results[3]["error"].startswith("FileNotFoundError")
+    assert [r["packets"] for r in results[:3]] == [2, 3, 4]
+    assert [r["bad_packets"] for r in results[:3]] == [1, 1, 1]
+
+    totals = summary["totals"]
+    assert totals["files"] == 4
+    assert totals["succeeded"] == 3
+    assert totals["failed"] == 1
+    assert totals["packets"] == 9
+    assert totals["bad_packets"] == 3
+    assert json.loads((output / batch.SUMMARY_FILENAME).read_text()) == summary
+
+    for n in range(3):
+        data = pd.read_parquet(output / f"input{n}" / "data.parquet")
+        assert len(data) == n + 1
+
+
+def test_run_batch_background_writes(juliet_directory, tmp_path):
+    output = tmp_path / "outputs"
+    jobs = batch.find_jobs(str(juliet_directory), output, "juliet", {"background_writes": True})
+
+    summary = batch.run_batch(jobs, output, 1, verbose=False)
+
+    assert summary["totals"]["succeeded"] == 3
+    for n in range(3):
+        data = pd.read_parquet(output / f"input{n}" / "data.parquet")
+        assert len(data) == n + 1
@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+
+from bip.common import bit_manipulation
+
+
+def test_pointing_vector():
+    # elevation -1 degree (two's complement), azimuth 300 degrees wraps to -60
+    az, el = bit_manipulation.pointing_vector(np.uint32(0xFF809600))
+    assert el == -1.0
+    assert az == -60.0
+
+    az, el = bit_manipulation.pointing_vector(np.uint32(0x010A020B))
+    assert el == pytest.approx(2.078125)
+    assert az == pytest.approx(4.0859375)
+
+
+def test_time():
+    assert bit_manipulation.time(np.uint32(0xFFFF), np.uint32(0), np.uint32(0x10000000)) \
+            == pytest.approx(0xFFFF + 0x10000000 * 1e-12)
+
+
+@pytest.mark.parametrize("name", ["bandwidth", "dwell", "frequency", "offset", "sample_rate"])
+def test_word_pair_columns(name):
+    rng = np.random.default_rng(0)
+    word1, word2 = rng.integers(0, 1 << 32, size=(2, 100), dtype=np.uint32)
+
+    scalar = getattr(bit_manipulation, name)
+    columns = {
+        "bandwidth": bit_manipulation.bandwidths,
+        "dwell": bit_manipulation.dwells,
+        "frequency": bit_manipulation.frequencies,
+        "offset": bit_manipulation.offsets,
+        "sample_rate": bit_manipulation.sample_rates,
+    }[name](word1, word2)
+
+    assert columns.shape == (100,)
+    np.testing.assert_array_equal(columns, [scalar(a, b) for a, b in zip(word1, word2)])
+
+
+def test_pointing_vector_columns():
+    words = np.array([0, 0xFF809600, 0x010A020B, 0x7FFF8C00, 0xFFFFFFFF], dtype=np.uint32)
+    az, el = bit_manipulation.pointing_vectors(words)
+    expected = [bit_manipulation.pointing_vector(w) for w in words]
+    np.testing.assert_array_equal(az, [e[0] for e in expected])
+    np.testing.assert_array_equal(el, [e[1] for e in expected])
+
+
+def test_time_columns():
+    tsi = np.array([0, 0xFFFF, 0xFFFFFFFF], dtype=np.uint32)
+    tsf0 = np.array([0, 0, 0xE8], dtype=np.uint32)
+    tsf1 = np.array([0, 0x10000000, 0xD4A50FFF], dtype=np.uint32)
+    np.testing.assert_array_equal(bit_manipulation.times(tsi, tsf0, tsf1),
+            [bit_manipulation.time(*w) for w in zip(tsi, tsf0, tsf1)])
@@ -0,0 +1,65 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from bip.common import iq_layout
+
+
+def _packets():
+    return [np.arange(2*n, dtype=np.int16).reshape((-1, 2)) - n for n in (3, 0, 2)]
+
+
+def test_schema():
+    entries = [("id", pa.uint32()), ("samples_i_left", None), ("samples_q_left", None), ("time", pa.float64())]
+
+    assert iq_layout.schema(entries, iq_layout.SPLIT) == [
+        ("id", pa.uint32()),
+        ("samples_i_left", pa.list_(pa.int16(), -1)),
+        ("samples_q_left", pa.list_(pa.int16(), -1)),
+        ("time", pa.float64()),
+    ]
+    assert iq_layout.schema(entries, iq_layout.BINARY) == [
+        ("id", pa.uint32()), ("samples_left", pa.binary()), ("time", pa.float64()),
+    ]
+    with pytest.raises(ValueError):
+        iq_layout.schema(entries, "planar")
+
+
+@pytest.mark.parametrize("layout", iq_layout.LAYOUTS)
+def test_columns_match_records(layout):
+    packets = _packets()
+    samples = np.concatenate(packets).reshape(-1)
+    offsets = np.array([0, 3, 3, 5], dtype=np.int32)
+
+    columns = iq_layout.columns(samples, offsets, layout, "_left")
+    schema = pa.schema(iq_layout.fields(layout, "_left"))
+    records = [iq_layout.record(data, layout, "_left") for data in packets]
+
+    assert list(columns) == schema.names
+    for field in schema:
+        assert columns[field.name].type == field.type
+        values = [r[field.name] for r in records]
+        if layout == iq_layout.FIXED_SIZE_LIST:
+            values = [v.tolist() for v in values]
+        assert columns[field.name].equals(pa.array(values, type=field.type))
+
+
+def test_columns_layouts():
+    samples = np.array([1, -1, 2, -2], dtype=np.int16)
+    offsets = np.array([0, 2], dtype=np.int32)
+
+    split = iq_layout.columns(samples, offsets, iq_layout.SPLIT)
+    assert split["samples_i"].to_pylist() == [[1, 2]]
+    assert split["samples_q"].to_pylist() == [[-1, -2]]
+    assert iq_layout.columns(samples, offsets, iq_layout.INTERLEAVED)["samples"].to_pylist() == [[1, -1, 2, -2]]
+    assert iq_layout.columns(samples, offsets, iq_layout.FIXED_SIZE_LIST)["samples"].to_pylist() == [[[1, -1], [2, -2]]]
+    assert iq_layout.columns(samples, offsets, iq_layout.BINARY)["samples"].to_pylist() == [samples.tobytes()]
+
+
+def test_columns_byte_offsets_overflow():
+    # 2**29 pairs fit int32 offsets, but not as 2**31 bytes
+    offsets = np.array([0, 1 << 29], dtype=np.int32)
+    with pytest.raises(ValueError, match="int32"):
+        iq_layout.columns(np.zeros(0, dtype=np.int16), offsets, iq_layout.BINARY)
+    with pytest.raises(ValueError, match="int32"):
+        iq_layout.columns(np.zeros(0, dtype=np.int16), 2*offsets, iq_layout.INTERLEAVED)
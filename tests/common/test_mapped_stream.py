@@ -0,0 +1,64 @@
+import io
+import os
+
+import numpy as np
+
+from bip.common.mapped_stream import MappedStream
+
+
+def test_read_returns_views():
+    stream = MappedStream(bytes(range(16)))
+
+    data = stream.read(4)
+    assert isinstance(data, memoryview)
+    assert data == bytes([0, 1, 2, 3])
+    assert stream.tell() == 4
+
+    words = np.frombuffer(stream.read(8), dtype=np.uint8)
+    assert words[0] == 4
+    assert not words.flags.owndata
+
+
+def test_read_past_end():
+    stream = MappedStream(bytes(range(6)))
+    stream.seek(4)
+    assert stream.read(4) == bytes([4, 5])
+    assert stream.read(4) == b""
+    assert stream.tell() == 6
+
+
+def test_readinto():
+    stream = MappedStream(bytes(range(6)))
+    target = bytearray(4)
+    assert stream.readinto(target) == 4
+    assert target == bytes([0, 1, 2, 3])
+    assert stream.readinto(target) == 2
+    assert target[:2] == bytes([4, 5])
+
+
+def test_seek():
+    stream = MappedStream(bytes(range(8)))
+    assert stream.seek(0, os.SEEK_END) == 8
+    assert stream.seek(-2, os.SEEK_CUR) == 6
+    assert stream.read() == bytes([6, 7])
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / "input.bin"
+    path.write_bytes(bytes(range(8)))
+
+    with open(path, "rb") as f:
+        f.seek(2)
+        stream = MappedStream.from_stream(f)
+        assert len(stream) == 8
+        assert stream.tell() == 2
+        assert stream.read(2) == bytes([2, 3])
+
+
+def test_from_bytesio():
+    with io.BytesIO(bytes(range(8))) as f:
+        f.seek(3)
+        stream = MappedStream.from_stream(f)
+        assert stream.tell() == 3
+        assert f.tell() == 3
+        assert stream.read(1) == bytes([3])
@@ -1,3 +1,4 @@
+import pytest
 import numpy as np
 import bip.common.numpy_manipulation as np_manip
 
@@ -27,3 +28,41 @@ def test_find_subarray_indexes_numba():
     indexes_numba = np_manip.find_subarray_indexes_numba(array, subarray)
 
     assert (indexes == indexes_numba).all()
+
+def test_find_markers():
+    array, subarray, indexes = get_array_and_subarray()
+    array = array.astype(np.uint8)
+    subarray = subarray.astype(np.uint8)
+
+    found, overlapping, missing = np_manip.find_markers(array, [subarray.tobytes(), b"\x01\x01", b"\x0a"])
+
+    assert (found == indexes).all()
+    assert (overlapping == np_manip.find_subarray_indexes_numpy(array, np.array([1, 1]))).all()
+    assert len(missing) == 0
+
+def test_find_markers_aligned():
+    buffer = bytes.fromhex("00" + "F17FFF7FFF7FFF7F" + "00"*7 + "F17FFF7FFF7FFF7F"*2 + "F27FFF7FFF7FFF7F")
+
+    sop, eom = np_manip.find_markers(buffer, [bytes.fromhex("F17FFF7FFF7FFF7F"), bytes.fromhex("F27FFF7FFF7FFF7F")], alignment=8)
+    assert sop.tolist() == [16, 24]
+    assert eom.tolist() == [32]
+
+    unaligned, = np_manip.find_markers(buffer, [bytes.fromhex("F17FFF7FFF7FFF7F")])
+    assert unaligned.tolist() == [1, 16, 24]
+
+    with pytest.raises(ValueError):
+        np_manip.find_markers(buffer, [b"PLRV"], alignment=8)
+
+@pytest.mark.parametrize("lengths", [[6, 3, 9], [7, 2, 0, 5]])
+def test_deinterleave(lengths):
+    frames = [np.arange(2*n, dtype=np.int16).reshape((-1, 2)) + 100*i
+              for i, n in enumerate(lengths)]
+
+    channels, counts = np_manip.deinterleave(frames, 3)
+
+    assert len(channels) == 3
+    for c, channel in enumerate(channels):
+        assert channel.flags.c_contiguous
+        expected = [frame[c::3] for frame in frames]
+        assert counts[c].tolist() == [len(e) for e in expected]
+        assert (channel == np.concatenate(expected)).all()
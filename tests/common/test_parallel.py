@@ -0,0 +1,29 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from bip.common.parallel import split_rows, part_directory, merge_parts, PARTS_DIRECTORY
+
+
+def test_split_rows():
+    assert split_rows(np.array([10, 10, 10, 10]), 2) == [(0, 2), (2, 4)]
+    assert split_rows(np.array([30, 1, 1, 1, 30]), 3) == [(0, 1), (1, 5)]
+    assert split_rows(np.array([5, 5]), 8) == [(0, 1), (1, 2)]
+    assert split_rows(np.array([], dtype=np.uint64), 4) == []
+
+
+def test_merge_parts(tmp_path):
+    parts = [part_directory(tmp_path, i) for i in range(3)]
+    for i, part in enumerate(parts):
+        (part / "logs").mkdir(parents=True)
+        (part / "logs" / "bip.log").write_text(f"part {i}")
+        pq.write_table(pa.table({"id": [2*i, 2*i + 1]}), part / "data.parquet")
+    pq.write_table(pa.table({"id": [7]}), parts[1] / "only.parquet")
+
+    merge_parts(parts, tmp_path)
+
+    assert pq.read_table(tmp_path / "data.parquet")["id"].to_pylist() == [0, 1, 2, 3, 4, 5]
+    assert pq.read_table(tmp_path / "only.parquet")["id"].to_pylist() == [7]
+    assert sorted(p.name for p in (tmp_path / "logs").iterdir()) == [
+            "part-0000-bip.log", "part-0001-bip.log", "part-0002-bip.log"]
+    assert not (tmp_path / PARTS_DIRECTORY).exists()
@@ -1,12 +1,14 @@
 import pytest
 import io
 import struct
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import bip
 from bip.plugins.juliet.ackR_packet import _ExtensionCommandPacket as ackRp
 from bip.plugins.juliet.ackR_packet import AckR_Packet as ap
+from bip.recorder.dummy.dummywriter import DummyWriter
 
 
 @pytest.fixture
@@ -67,6 +69,19 @@ def test_dcp_packet(simple_ackR_packet):
     assert packet.fractional_timestamp[1] == 0x10000000
 
 
-    
-
+def test_ackR_batch(simple_ackR_packet):
+    batches = []
+    ackr = ap(Path("ackr"), DummyWriter,
+            recorder_opts={ 'add_batch_callback': batches.append })
+    ackr.process(simple_ackR_packet[1], frame_index=5, packet_index=5)
+    ackr.close()
 
+    assert len(batches) == 1
+    packet = ackRp(simple_ackR_packet[1])
+    batch = batches[0]
+    assert batch["stream_id"].tolist() == [0xB1DED1ED]
+    assert batch["time"].tolist() == [packet.time]
+    assert batch["cam"].tolist() == [packet.cam]
+    assert batch["cited_SID"].tolist() == [packet.cited_sid]
+    assert batch["data_addr_index"].tolist() == [packet.data_addr_index]
+    assert batch["frame_index"].tolist() == [5]
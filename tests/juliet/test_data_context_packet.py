@@ -1,11 +1,14 @@
 import pytest
 import io
 import struct
+from pathlib import Path
 
 import numpy as np
 
 import bip
 from bip.plugins.juliet.data_context_packet import _DataContextPacket as dcp
+from bip.plugins.juliet.data_context_packet import DataContext
+from bip.recorder.dummy.dummywriter import DummyWriter
 
 @pytest.fixture
 def simple_dcp_packet():
@@ -180,3 +183,22 @@ def test_dcp_packet_II(simple_dcp_packet_II):
     assert packet.data_addr_index == 0x10
     assert packet.TxDigitalInputPower == 0x100
 
+
+def test_data_context_batch(simple_dcp_packet, simple_dcp_packet_II):
+    payloads = [simple_dcp_packet[1], simple_dcp_packet_II[1]]
+    batches = []
+    data_context = DataContext(Path("context_data"), DummyWriter,
+            recorder_opts={ 'add_batch_callback': batches.append })
+    for i, payload in enumerate(payloads):
+        data_context.process(payload, frame_index=i, packet_index=i)
+    assert len(batches) == 0
+    data_context.close()
+    assert len(batches) == 1
+
+    batch = batches[0]
+    packets = [dcp(payload) for payload in payloads]
+    for name in ("time", "bandwidth", "freq", "rfFreqOffset", "gain", "sampling_rate",
+                 "dwell", "azimuth", "elevation", "cif0", "cited_SID", "TxDigitalInputPower"):
+        np.testing.assert_array_equal(batch[name], [getattr(p, name) for p in packets])
+    assert batch["beamwidth"].tolist() == [p.beamWidth for p in packets]
+    assert batch["packet_index"].tolist() == [0, 1]
@@ -1,11 +1,14 @@
 import pytest
 import io
 import struct
+from pathlib import Path
 
 import numpy as np
 
 import bip
 from bip.plugins.juliet.extension_command_packet import _ExtensionCommandPacket as Ecp
+from bip.plugins.juliet.extension_command_packet import ExtensionCommand, EXTENSION_COMMAND_WORDS
+from bip.recorder.dummy.dummywriter import DummyWriter
 
 @pytest.fixture
 def simple_ecp_packet():
@@ -171,4 +174,32 @@ def test_ecp_packet_II(simple_ecp_packet_II):
 
     assert packet.cited_sid == 0xBEEFFEED
 
-    assert packet.dwell == 300248278499328 * (10**-9)
\ No newline at end of file
+    assert packet.dwell == 300248278499328 * (10**-9)
+
+
+def test_extension_command_batch(simple_ecp_packet, simple_ecp_packet_II):
+    payloads = [simple_ecp_packet[1], simple_ecp_packet_II[1], simple_ecp_packet[1]]
+    batches = []
+    extension_command = ExtensionCommand(Path("extension_command"), DummyWriter,
+            recorder_opts={ 'add_batch_callback': batches.append },
+            batch_size=2)
+    for i, payload in enumerate(payloads):
+        extension_command.process(payload, frame_index=i, packet_index=i)
+    assert len(batches) == 1
+    extension_command.close()
+    assert len(batches) == 2
+
+    for column in batches[0]:
+        assert len(batches[0][column]) == 2
+    packets = [Ecp(payload) for payload in payloads]
+    for name in ("freq", "offset", "sampling_rate", "dwell", "az", "el", "time", "cited_sid"):
+        values = np.concatenate([batches[0][name], batches[1][name]])
+        np.testing.assert_array_equal(values, [getattr(p, name) for p in packets])
+    assert batches[1]["packet_id"].tolist() == [2]
+
+
+def test_extension_command_short_packet(simple_ecp_packet):
+    extension_command = ExtensionCommand(Path("extension_command"), DummyWriter)
+    with pytest.raises(ValueError):
+        extension_command.process(simple_ecp_packet[1][:4*(EXTENSION_COMMAND_WORDS - 1)],
+                frame_index=0, packet_index=0)
@@ -1,7 +1,8 @@
 import pytest
+import struct
 from io import BytesIO
 
-from bip.plugins.juliet.frame import unpack_header, read_header
+from bip.plugins.juliet.frame import unpack_header, read_header, index_packets
 
 def test_unpack_header():
     header = [ 0x11111111, 0x22222222, 0x33333333 ]
@@ -26,3 +27,19 @@ def test_read_header():
         assert br == 12
 
 
+def test_index_packets():
+    buffer = (struct.pack("<III", 1, 2, 2) + struct.pack(">II", 0x501A0018, 1)
+              + struct.pack("<III", 0, 3, 1) + struct.pack(">I", 0x74110020)
+              + struct.pack("<III", 0, 4, 100))
+    packets = index_packets(buffer)
+
+    assert packets["offset"].tolist() == [0, 20]
+    assert packets["time_ns"].tolist() == [(1 << 32) | 2, 3]
+    assert packets["word_count"].tolist() == [2, 1]
+    assert packets["packet_type"].tolist() == [5, 7]
+    assert packets["indicators"].tolist() == [0, 4]
+
+
+def test_index_packets_empty():
+    assert len(index_packets(b"")) == 0
+    assert len(index_packets(struct.pack("<III", 0, 0, 0))) == 0
@@ -5,6 +5,7 @@ import unittest #
 
 import numpy as np
 import pyarrow as pa #
+import pandas as pd
 
 from pathlib import Path
 
@@ -223,4 +224,99 @@ def test_custom_packet_read_bad_payload(bad_payload):
 def test_read_custom_packet_empty():
     parser = Parser(Path(), Path(), PQWriter)
     payload = parser.read_packet(io.BytesIO())
-    assert payload is None
\ No newline at end of file
+    assert payload is None
+
+
+def _juliet_packet(time_ns, words):
+    return (struct.pack("<III", time_ns >> 32, time_ns & 0xFFFFFFFF, len(words))
+            + struct.pack(f">{len(words)}I", *words))
+
+
+def _signal_data_words(samples):
+    words = [0x1CE10000 | (len(samples) + 8), 0xB1DED1ED, 0x00000001,
+             0xF0000000, 0x0000FFFF, 0x00000000, 0x10000000]
+    words += [((q & 0xFFFF) << 16) | (i & 0xFFFF) for i, q in samples]
+    words += [0xFFFFFFFF]
+    return words
+
+
+@pytest.fixture
+def juliet_file(tmp_path):
+    path = tmp_path / "input.bin"
+    with open(path, "wb") as f:
+        f.write(_juliet_packet(1, _signal_data_words([(1, -1), (2, -2)])))
+        f.write(_juliet_packet(2, [0x88883333, 1, 2, 3]))
+        f.write(_juliet_packet(3, _signal_data_words([(3, -3)])))
+        # incomplete packet at the end of the file
+        f.write(struct.pack("<IIII", 0, 4, 100, 0))
+    yield path
+
+
+def _parse_records(path, **kwargs):
+    records = []
+    parser = Parser(path, path.parent, DummyWriter,
+            recorder_opts={ 'add_record_callback': records.append },
+            **kwargs)
+    with open(path, "rb") as f:
+        parser.parse_stream(f)
+    return parser, records
+
+
+def test_parse_stream_mmap(juliet_file):
+    parser, records = _parse_records(juliet_file)
+    mapped_parser, mapped_records = _parse_records(juliet_file, mmap=True)
+
+    assert mapped_parser.bytes_read == parser.bytes_read
+    assert mapped_parser.packets_read == parser.packets_read == 4
+    assert mapped_parser.unknown_packets == parser.unknown_packets == 1
+    assert mapped_parser.bad_packets == parser.bad_packets == 1
+
+    assert len(mapped_records) == len(records)
+    for record, expected in zip(mapped_records, records):
+        assert record.keys() == expected.keys()
+        for key in expected:
+            np.testing.assert_array_equal(record[key], expected[key])
+
+
+def test_parse_stream_mmap_small_blocks(juliet_file, monkeypatch):
+    _, records = _parse_records(juliet_file)
+    # every packet is larger than a block, and gets one of its own
+    monkeypatch.setattr("bip.plugins.juliet.parser.READ_AHEAD_BYTES", 16)
+    _, mapped_records = _parse_records(juliet_file, mmap=True)
+
+    assert len(mapped_records) == len(records)
+    for record, expected in zip(mapped_records, records):
+        for key in expected:
+            np.testing.assert_array_equal(record[key], expected[key])
+
+
+def _parse_to(input_path, output_path, **kwargs):
+    output_path.mkdir()
+    parser = Parser(input_path, output_path, PQWriter, **kwargs)
+    with open(input_path, "rb") as f:
+        parser.parse_stream(f)
+    parser.close()
+    return parser
+
+
+def test_parse_stream_workers(juliet_file, tmp_path):
+    parser = _parse_to(juliet_file, tmp_path / "sequential", mmap=True)
+    parallel_parser = _parse_to(juliet_file, tmp_path / "parallel", workers=2)
+
+    assert parallel_parser.bytes_read == parser.bytes_read
+    assert parallel_parser.packets_read == parser.packets_read == 4
+    assert parallel_parser.unknown_packets == parser.unknown_packets == 1
+    assert parallel_parser.bad_packets == parser.bad_packets == 1
+    assert not (tmp_path / "parallel" / "_parts").exists()
+
+    outputs = sorted(p.name for p in (tmp_path / "sequential").glob("*.parquet"))
+    assert "data.parquet" in outputs
+    assert sorted(p.name for p in (tmp_path / "parallel").glob("*.parquet")) == outputs
+    for name in outputs:
+        expected = pd.read_parquet(tmp_path / "sequential" / name)
+        merged = pd.read_parquet(tmp_path / "parallel" / name)
+        pd.testing.assert_frame_equal(merged, expected)
+
+    data = pd.read_parquet(tmp_path / "parallel" / "data.parquet")
+    assert data["packet_id"].tolist() == [0, 1]
+    assert data["packet_index"].tolist() == [1, 3]
@@ -5,7 +5,6 @@ import numpy as np
 import uuid
 from pathlib import Path
 
-from bip.non_vita.mblb import MblbPacket
 from bip.non_vita import mblb as mb
 from bip.plugins.mikelima.IQ0_packet_data import ProcessIq0Packet
 from bip.plugins.mikelima.IQ5_packet_data import ProcessIq5Packet
@@ -104,36 +103,39 @@ def fake_som():
     return content, f.getvalue()
 
 
+def _process_packets(Processor, packet, som_obj, count):
+    batches = []
+    packet_processor = Processor(Path(), DummyWriter,
+            recorder_opts={ 'add_batch_callback': batches.append })
+    packet_list = [packet]*count
+    packets = mb.decode_packets(mb.stack_words([p[24:120] for p in packet_list], mb.PACKET_WORDS))
+    packet_processor.process_packets(packet_list, packets, som_obj)
+    assert len(batches) == 1
+    return batches[0]
+
+
 def test_process_iq0_packet(fake_iq0_packet, fake_som):
-    sop_obj = MblbPacket(fake_iq0_packet[24:120])
-    packet_processor =  ProcessIq0Packet(Path(), DummyWriter)
     _ , payload = fake_som
     timestamp = 123456789
     iq_type = 2
-    packet_list_index = 4
     session_id = 15
     increment = 4
     timestamp_from_filename = 19411207120000
     som_obj = mb.MblbSOM(payload, timestamp, iq_type, session_id, increment, timestamp_from_filename)
 
-    packet_processor.process_packet(fake_iq0_packet, sop_obj, som_obj, packet_list_index)
-
-    assert packet_processor.time == 123456794
+    columns = _process_packets(ProcessIq0Packet, fake_iq0_packet, som_obj, 5)
 
-    assert np.array_equal(
-            packet_processor.left_data[0],
-            np.array([0x0c0d, 0x0a0b], dtype = np.int16))
-    assert len(packet_processor.left_data) == 10
+    # the fifth packet of the message is four dwells in
+    assert columns["time"][4] == pytest.approx(123456794 / 1000000)
 
-    assert np.array_equal(
-            packet_processor.right_data[0],
-            np.array([0x0c0d, 0x0a0b], dtype = np.int16))
-    assert len(packet_processor.right_data) == 10
+    for suffix in ("_left", "_right"):
+        assert columns[f"samples_i{suffix}"][4].as_py()[0] == 0x0c0d
+        assert columns[f"samples_q{suffix}"][4].as_py()[0] == 0x0a0b
+        assert len(columns[f"samples_i{suffix}"][4]) == 10
+    assert "samples_i_center" not in columns
 
 
 def test_process_iq5_packet(fake_iq5_packet, fake_som):
-    sop_obj = MblbPacket(fake_iq5_packet[24:120])
-    packet_processor =  ProcessIq5Packet(Path(), DummyWriter)
     _ , payload = fake_som
     timestamp = 123456789
     iq_type = 5
@@ -142,21 +144,11 @@ def test_process_iq5_packet(fake_iq5_packet, fake_som):
     timestamp_from_filename = 19411207120000
     som_obj = mb.MblbSOM(payload, timestamp, iq_type, session_id, increment, timestamp_from_filename)
 
-    packet_processor.process_packet(fake_iq5_packet, sop_obj, som_obj, 4)
-
-    assert packet_processor.time == 123456794
-
-    assert np.array_equal(
-            packet_processor.left_data[0],
-            np.array([0x0c0d, 0x0a0b], dtype = np.int16))
-    assert len(packet_processor.left_data) == 10
+    columns = _process_packets(ProcessIq5Packet, fake_iq5_packet, som_obj, 5)
 
-    assert np.array_equal(
-            packet_processor.right_data[0],
-            np.array([0x0c0d, 0x0a0b], dtype = np.int16))
-    assert len(packet_processor.right_data) == 10
+    assert columns["time"][4] == pytest.approx(123456794 / 1000000)
 
-    assert np.array_equal(
-            packet_processor.center_data[0],
-            np.array([0x0c0d, 0x0a0b], dtype = np.int16))
-    assert len(packet_processor.center_data) == 10
+    for suffix in ("_left", "_right", "_center"):
+        assert columns[f"samples_i{suffix}"][4].as_py()[0] == 0x0c0d
+        assert columns[f"samples_q{suffix}"][4].as_py()[0] == 0x0a0b
+        assert len(columns[f"samples_i{suffix}"][4]) == 10
@@ -2,9 +2,15 @@ import pytest
 import io
 import struct
 
+import numpy as np
+import pyarrow.parquet as pq
+
 from pathlib import Path
 
+from bip.common import iq_layout as iq_layouts
+from bip.common.mapped_stream import MappedStream
 from bip.non_vita import mblb as mb
+from bip.plugins.mikelima.message_index import index_messages, END_OF_FILE, UNHANDLED_MARKER, MESSAGE_COMPLETE, MESSAGE_NO_EOM
 from bip.plugins.mikelima.parser import Parser
 from bip.recorder.dummy.dummywriter import DummyWriter
 from bip.recorder.parquet.pqwriter import PQWriter
@@ -138,3 +144,117 @@ def test_bad_message_unhandled_markers(fake_file_unhandled_markers):
     with pytest.raises(Exception):
         parser.read_message(fake_file_unhandled_markers)
 
+
+
+def _message(packets, eom_words=22):
+    # dwell of 1 clock with 2 beams gives 64 byte packets
+    som = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 1] + [0]*21
+    f = io.BytesIO()
+    f.write(bytes.fromhex('F07FFF7FFF7FFF7F')*3) #SOM Markers
+    f.write(struct.pack("<36Q", *som)) #SOM Header and SWDefined Words
+    for data in packets:
+        f.write(bytes.fromhex('F17FFF7FFF7FFF7F')*3) #SOP Markers
+        f.write(struct.pack("<12Q", *range(12))) #SOP Header
+        f.write(struct.pack("<32h", *data)) #Data
+    f.write(bytes.fromhex('F27FFF7FFF7FFF7F')*3) #EOM Markers
+    f.write(struct.pack(f"<{eom_words}Q", *range(eom_words))) #EOM information
+    return f.getvalue()
+
+
+@pytest.fixture
+def mapped_file():
+    buffer = (struct.pack("<QQ", 1, 2) #junk before the first message
+              + _message([range(32), range(32, 64)])
+              + _message([range(-32, 0)])
+              + _message([]))
+    yield buffer
+
+
+def _parse_records(stream, mapped):
+    messages = []
+    packets = []
+    parser = Parser(Path(), Path(), DummyWriter,
+            recorder_opts={ 'add_record_callback': packets.append })
+    parser.initialize_message_processor(0)
+    parser.message_recorder = DummyWriter(Path(), None,
+            options={ 'add_record_callback': messages.append })
+    if mapped:
+        parser.parse_messages(stream)
+    else:
+        msg_words, som_obj = parser.read_message(stream)
+        while msg_words:
+            parser._packets_read += parser.message_processor.process_msg(msg_words, som_obj)
+            parser._messages_read += 1
+            msg_words, som_obj = parser.read_message(stream)
+    for record in messages:
+        del record["message_key"]
+    return parser, messages, packets
+
+
+def test_parse_messages(mapped_file):
+    parser, messages, packets = _parse_records(io.BytesIO(mapped_file), False)
+    mapped_parser, mapped_messages, mapped_packets = _parse_records(MappedStream(mapped_file), True)
+
+    assert mapped_parser.packets_read == parser.packets_read == 3
+    assert mapped_parser.messages_read == 3
+    assert mapped_parser.bytes_read == len(mapped_file)
+
+    # reading from a stream stops at the message without packets
+    assert mapped_messages[:len(messages)] == messages
+    assert len(mapped_packets) == len(packets)
+    for record, expected in zip(mapped_packets, packets):
+        assert record.keys() == expected.keys()
+        for key in expected:
+            np.testing.assert_array_equal(record[key], expected[key])
+
+
+def test_index_messages(mapped_file):
+    messages, packets, position, reason = index_messages(mapped_file, 0, 0)
+
+    assert reason == END_OF_FILE
+    assert position == len(mapped_file)
+    assert messages["packet_count"].tolist() == [2, 1, 0]
+    assert messages["first_packet"].tolist() == [0, 2, 3]
+    assert messages["status"].tolist() == [MESSAGE_COMPLETE]*3
+    assert messages["som"][0] == 16 + 24
+    assert packets["end"][0] == packets["start"][1]
+    assert (packets["end"] - packets["start"]).tolist() == [24 + 96 + 64]*3
+
+
+def test_index_messages_broken(fake_file_no_eom):
+    messages, packets, _, reason = index_messages(fake_file_no_eom.getvalue(), 0, 0)
+    assert reason == END_OF_FILE
+    assert messages["status"].tolist() == [MESSAGE_NO_EOM]
+    assert messages["eom"].tolist() == [-1]
+
+    message = _message([range(32)])
+    change_of_mode = bytes.fromhex('F37FFF7FFF7FFF7F')*3 #Change of Mode Markers
+    buffer = message[:-(24 + 22*8)] + change_of_mode + message[-(24 + 22*8):]
+    messages, _, position, reason = index_messages(buffer, 0, 0)
+    assert reason == UNHANDLED_MARKER
+    assert len(messages) == 0
+    assert position == len(message) - (24 + 22*8)
+
+
+@pytest.mark.parametrize("layout", iq_layouts.LAYOUTS)
+def test_parse_messages_iq_layout(mapped_file, tmp_path, layout):
+    parser = Parser(Path(), tmp_path, PQWriter, iq_layout=layout)
+    parser.initialize_message_processor(0)
+    parser.parse_messages(MappedStream(mapped_file))
+    parser.close()
+
+    table = pq.read_table(tmp_path / "iq0_packet_content.parquet")
+    data = [np.array(range(32), dtype=np.int16), np.array(range(32, 64), dtype=np.int16),
+            np.array(range(-32, 0), dtype=np.int16)]
+    for suffix, beam in (("_left", 0), ("_right", 1)):
+        expected = [d.reshape((-1, 2))[beam::2] for d in data]
+        if layout == iq_layouts.SPLIT:
+            samples = [np.stack([i, q], axis=1) for i, q in zip(
+                table[f"samples_i{suffix}"].to_pylist(), table[f"samples_q{suffix}"].to_pylist())]
+        elif layout == iq_layouts.BINARY:
+            samples = [np.frombuffer(s, dtype="<i2").reshape((-1, 2)) for s in table[f"samples{suffix}"].to_pylist()]
+        else:
+            samples = [np.array(s).reshape((-1, 2)) for s in table[f"samples{suffix}"].to_pylist()]
+        assert len(samples) == len(expected)
+        for got, want in zip(samples, expected):
+            np.testing.assert_array_equal(got, want)
@@ -190,3 +190,25 @@ def test_eom(fake_eom):
     assert mblb_eom_obj.path_width == 0xAE
     assert mblb_eom_obj.subpath_id == 0xE
     assert mblb_eom_obj.subpath_width == 0xF
+
+def test_decode_som(fake_som):
+    _ , payload = fake_som
+    timestamp = 123456789
+    som_obj = mb.MblbSOM(payload, timestamp, 5, 15, 4, 19411207120000)
+    columns = mb.decode_som(mb.stack_words([payload, payload], mb.SOM_WORDS), timestamp)
+    for name in list(mb.SOM_FIELDS) + ["event_start_time_us", "time_since_epoch_us", "bti_length", "dwell", "freq_ghz"]:
+        assert columns[name].tolist() == [getattr(som_obj, name)]*2, name
+
+def test_decode_packets(fake_sop):
+    _, payload = fake_sop
+    sop_obj = mb.MblbPacket(payload)
+    columns = mb.decode_packets(mb.stack_words([payload, payload], mb.PACKET_WORDS))
+    for name in mb.PACKET_FIELDS:
+        assert columns[name].tolist() == [getattr(sop_obj, name)]*2, name
+
+def test_decode_eom(fake_eom):
+    _ , payload = fake_eom
+    eom_obj = mb.MblbEOM(payload)
+    columns = mb.decode_eom(mb.stack_words([payload, payload], mb.EOM_WORDS))
+    for name in mb.EOM_FIELDS:
+        assert columns[name].tolist() == [getattr(eom_obj, name)]*2, name
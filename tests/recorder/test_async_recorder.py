@@ -0,0 +1,79 @@
+import pickle
+
+import pytest
+
+import numpy as np
+import pyarrow as pa
+import pandas as pd
+from bip.recorder.background.async_recorder import AsyncRecorder, new_async_recorder
+from bip.recorder.dummy.dummywriter import DummyWriter
+from bip.recorder.parquet.pqwriter import PQWriter
+
+
+_schema = pa.schema([("id", pa.int32()), ("val", pa.int32())])
+
+
+def test_extension():
+    assert new_async_recorder(PQWriter).extension() == "parquet"
+
+
+def test_pickle():
+    constructor = pickle.loads(pickle.dumps(new_async_recorder(PQWriter, queue_size=2)))
+    assert constructor.Recorder is PQWriter
+    assert constructor.queue_size == 2
+
+
+def test_add_record_and_batch(tmp_path):
+    file_ = tmp_path / "test.parquet"
+
+    writer = new_async_recorder(PQWriter, queue_size=1)(file_, _schema, {}, batch_size=3)
+    assert isinstance(writer, AsyncRecorder)
+
+    for i in range(10):
+        writer.add_record({"id": np.int32(i), "val": np.int32(i)})
+    writer.add_batch({
+        "id": np.arange(10, 20, dtype=np.int32),
+        "val": np.arange(10, 20, dtype=np.int32),
+    })
+    writer.add_record({"id": np.int32(20), "val": np.int32(20)})
+    writer.close()
+
+    df = pd.read_parquet(file_)
+    assert (df.id.to_numpy() == np.arange(21, dtype=np.int32)).all()
+    assert (df.val.to_numpy() == np.arange(21, dtype=np.int32)).all()
+    assert writer.metadata["queue_size"] == 1
+
+
+def test_error_raised_on_close(tmp_path):
+    def add_record(record):
+        raise RuntimeError("cannot write")
+
+    writer = AsyncRecorder(DummyWriter, tmp_path / "test.dummy", _schema,
+            {"add_record_callback": add_record}, batch_size=1000)
+    writer.add_record({"id": np.int32(1), "val": np.int32(1)})
+
+    with pytest.raises(RuntimeError, match="cannot write"):
+        writer.close()
+
+
+def test_error_raised_on_add(tmp_path):
+    def add_record(record):
+        raise RuntimeError("cannot write")
+
+    writer = AsyncRecorder(DummyWriter, tmp_path / "test.dummy", _schema,
+            {"add_record_callback": add_record}, batch_size=1)
+    writer.add_record({"id": np.int32(1), "val": np.int32(1)})
+
+    with pytest.raises(RuntimeError, match="cannot write"):
+        for i in range(1000):
+            writer.add_record({"id": np.int32(i), "val": np.int32(i)})
+
+
+def test_pqwriter_error_raised_on_close(tmp_path):
+    # the records are only written, and the directory found missing, on close
+    writer = new_async_recorder(PQWriter)(tmp_path / "missing" / "test.parquet", _schema, {}, batch_size=100)
+    for i in range(25):
+        writer.add_record({"id": np.int32(i), "val": np.int32(i)})
+
+    with pytest.raises(OSError):
+        writer.close()
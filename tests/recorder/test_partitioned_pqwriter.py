@@ -0,0 +1,108 @@
+import pickle
+
+import pytest
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+from bip.recorder.partitioned_parquet.partitioned_pqwriter import (
+        PartitionedPQWriter, new_partitioned_parquet_writer)
+
+
+_schema = pa.schema([("id", pa.int32()), ("data_key", pa.string())])
+
+
+def _write(file_, keys, **kwargs):
+    writer = PartitionedPQWriter(file_, _schema, ["data_key"], {}, **kwargs)
+    for i, key in enumerate(keys):
+        writer.add_record({"id": np.int32(i), "data_key": key})
+    writer.close()
+    return writer
+
+
+def test_extension():
+    assert new_partitioned_parquet_writer(["data_key"]).extension() == "parquet"
+
+
+def test_pickle():
+    constructor = pickle.loads(pickle.dumps(new_partitioned_parquet_writer(["data_key"], 2)))
+    assert constructor.partition_cols == ["data_key"]
+    assert constructor.max_open_files == 2
+
+
+def test_one_file_per_partition(tmp_path):
+    file_ = tmp_path / "data.parquet"
+    keys = ["a", "b", "c"] * 10
+    _write(file_, keys, batch_size=4)
+
+    files = sorted(p.relative_to(file_).as_posix() for p in file_.rglob("*") if p.is_file())
+    assert files == ["data_key=a/part-0.parquet", "data_key=b/part-0.parquet", "data_key=c/part-0.parquet"]
+
+    # rows are gathered into row groups of batch_size rows per partition
+    parquet_file = pq.ParquetFile(file_ / "data_key=a" / "part-0.parquet")
+    assert parquet_file.schema_arrow.names == ["id"]
+    assert [parquet_file.metadata.row_group(i).num_rows
+            for i in range(parquet_file.num_row_groups)] == [4, 4, 2]
+
+    data = pd.read_parquet(file_).sort_values("id")
+    assert data["id"].tolist() == list(range(30))
+    assert data["data_key"].astype(str).tolist() == keys
+
+
+@pytest.mark.parametrize("max_open_files", [1, 2])
+def test_reopen(tmp_path, max_open_files):
+    file_ = tmp_path / "data.parquet"
+    keys = ["a", "b", "c", "a", "a", "b", "c", "c", "a"]
+    writer = _write(file_, keys, batch_size=2, max_open_files=max_open_files)
+    assert writer.metadata["max_open_files"] == max_open_files
+
+    for key in "abc":
+        directory = file_ / f"data_key={key}"
+        assert [p.name for p in directory.iterdir()] == ["part-0.parquet"]
+        data = pd.read_parquet(directory / "part-0.parquet")
+        assert data["id"].tolist() == [i for i, k in enumerate(keys) if k == key]
+
+
+def test_pending_bytes_bounded(tmp_path):
+    file_ = tmp_path / "data.parquet"
+    rng = np.random.default_rng(0)
+    keys = [f"key{k}" for k in rng.integers(0, 50, size=5000)]
+
+    writer = PartitionedPQWriter(file_, _schema, ["data_key"],
+            {"batch_bytes": 2000}, batch_size=100)
+    assert writer.metadata["max_pending_bytes"] == 2000
+    pending = []
+    for start in range(0, len(keys), 100):
+        writer.add_batch({
+            "id": np.arange(start, start + 100, dtype=np.int32),
+            "data_key": keys[start:start + 100],
+        })
+        pending.append(writer._partition_bytes)
+        assert writer._partition_bytes == sum(p.nbytes for p in writer._open.values())
+    writer.close()
+
+    # with 50 partitions each holding up to batch_bytes this would reach
+    # about 50 times as much
+    assert 0 < max(pending) <= 2000
+
+    data = pd.read_parquet(file_).sort_values("id")
+    assert data["id"].tolist() == list(range(len(keys)))
+    assert data["data_key"].astype(str).tolist() == keys
+
+
+def test_writers_closed_when_close_fails(tmp_path):
+    file_ = tmp_path / "data.parquet"
+    # partition b cannot be created, so writing it out fails on close
+    file_.mkdir()
+    (file_ / "data_key=b").write_bytes(b"")
+
+    writer = PartitionedPQWriter(file_, _schema, ["data_key"], {}, batch_size=2)
+    for i, key in enumerate(["b", "a", "a"]):
+        writer.add_record({"id": np.int32(i), "data_key": key})
+
+    with pytest.raises(FileExistsError):
+        writer.close()
+    writer.close()
+
+    assert pq.read_table(file_ / "data_key=a" / "part-0.parquet")["id"].to_pylist() == [1, 2]
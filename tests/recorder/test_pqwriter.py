@@ -2,6 +2,7 @@ import pytest
 
 import numpy as np
 import pyarrow as pa
+import pyarrow.parquet
 import pandas as pd
 from bip.recorder.parquet.pqwriter import PQWriter
 
@@ -57,6 +58,44 @@ def test_add_batch(tmp_path):
     assert (df.id.to_numpy() == np.array(range(10), dtype=np.int32)).all()
     assert (df.val.to_numpy() == np.array(range(10), dtype=np.int32)).all()
 
+def test_add_batch_columns(tmp_path):
+    file_ = tmp_path / "test.parquet"
+
+    writer = PQWriter(file_,
+            pa.schema([("id", pa.int32()), ("val", pa.list_(pa.int16(), -1))]),
+            {},
+            batch_size = 3)
+
+    writer.add_record({"id": np.int32(0), "val": np.array([0], dtype=np.int16)})
+    writer.add_batch({
+        "id": np.array([1, 2], dtype=np.int32),
+        "val": [np.array([1, 1], dtype=np.int16), np.array([], dtype=np.int16)],
+    })
+    writer.close()
+
+    df = pd.read_parquet(file_)
+    assert df.id.tolist() == [0, 1, 2]
+    assert [v.tolist() for v in df.val] == [[0], [1, 1], []]
+
+def test_add_record_columns(tmp_path):
+    file_ = tmp_path / "test.parquet"
+
+    writer = PQWriter(file_,
+            pa.schema([("id", pa.uint32()), ("val", pa.list_(pa.int16(), -1)), ("key", pa.string())]),
+            {},
+            batch_size = 2)
+
+    writer.add_record({"id": np.uint32(1), "val": np.array([1, -1], dtype=np.int16), "key": "a"})
+    writer.add_record({"id": np.uint32(2), "val": np.array([], dtype=np.int16)})
+    writer.add_record({"val": np.array([3], dtype=np.int16), "key": "c"})
+    writer.close()
+
+    table = pa.parquet.read_table(file_)
+    assert table.schema == writer.schema
+    assert table.column("id").to_pylist() == [1, 2, None]
+    assert table.column("val").to_pylist() == [[1, -1], [], [3]]
+    assert table.column("key").to_pylist() == ["a", None, "c"]
+
 def test_zip(tmp_path):
     file_ = tmp_path / "test.parquet"
 
@@ -94,3 +133,29 @@ def test_metadata(tmp_path):
 
 
 
+
+@pytest.mark.parametrize("options, row_groups", [
+    ({"batch_bytes": 80}, [10] * 10),
+    ({"batch_bytes": 80, "max_batch_rows": 4}, [4] * 25),
+    ({"batch_bytes": 8, "min_batch_rows": 6}, [6] * 16 + [4]),
+])
+def test_batch_bytes(tmp_path, options, row_groups):
+    file_ = tmp_path / "test.parquet"
+
+    # 8 bytes a record
+    writer = PQWriter(file_,
+            pa.schema([("id", pa.int32()), ("val", pa.int32())]),
+            options=options,
+            batch_size = 3)
+
+    for i in range(90):
+        writer.add_record({"id": np.int32(i), "val": np.int32(i)})
+    writer.add_batch({"id": np.arange(90, 100, dtype=np.int32), "val": np.arange(90, 100, dtype=np.int32)})
+    writer.close()
+
+    parquet_file = pyarrow.parquet.ParquetFile(file_)
+    assert [parquet_file.metadata.row_group(i).num_rows
+            for i in range(parquet_file.num_row_groups)] == row_groups
+    df = pd.read_parquet(file_)
+    assert (df.id.to_numpy() == np.arange(100, dtype=np.int32)).all()
+    assert writer.metadata["batch_bytes"] == options["batch_bytes"]
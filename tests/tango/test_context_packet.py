@@ -7,6 +7,7 @@ import numpy as np
 
 import bip
 from bip.plugins.tango.context_packet import _ContextPacket as ContextPacket
+from bip.plugins.tango.context_packet import CONTEXT_WORDS, check_signature, decode_context
 
 
 @pytest.fixture
@@ -135,3 +136,25 @@ def test_cp_packet(simple_cp_packet):
 
     assert packet.pri == pytest.approx(1e-15, 0.001)
     assert packet.duration == pytest.approx(1e-15, 0.001)
+
+
+def test_decode_context(simple_cp_packet):
+    _, payload = simple_cp_packet
+    packet = ContextPacket(payload)
+    words = np.frombuffer(bytes(payload[:4*CONTEXT_WORDS]) * 2, dtype=np.uint32).reshape((2, -1))
+
+    assert check_signature(words).tolist() == [False, False]
+    fields = decode_context(words)
+    for name in ("time", "bandwidth", "if_reference_freq", "rf_reference_freq",
+                 "gain1", "gain2", "sample_rate", "temperature", "phase_offset",
+                 "ellipticity", "tilt", "array_size", "header_size",
+                 "num_words_per_rec", "num_records", "ecef_0", "ecef_1", "ecef_2",
+                 "azimuthal_angle_0", "elevation_angle_0", "beam_width_vert",
+                 "beam_width_horiz", "range", "health_status", "mode_id",
+                 "event_id", "pulse_width", "pri", "duration"):
+        np.testing.assert_array_equal(fields[name], np.repeat(np.asarray(getattr(packet, name)).reshape(-1), 2), err_msg=name)
+    assert fields["packet_size"].tolist() == [packet.packet_header.packet_size + 1]*2
+
+    words = words.copy()
+    words[1, 9] ^= 1
+    assert check_signature(words).tolist() == [False, True]
@@ -1,7 +1,10 @@
 import pytest
+import struct
 from io import BytesIO
 
 from bip.plugins.tango.frame import unpack_header, read_header, first_header
+from bip.plugins.tango.frame import (index_frames, FRAME_OK, FRAME_INCOMPLETE,
+        FRAME_TOO_LARGE, FRAME_TOO_SMALL)
 
 def test_unpack_header():
     header = int((0x1<<20) | 108).to_bytes(4, byteorder='little')
@@ -64,4 +67,55 @@ def test_artifacts_before_header():
 
         f.seek(0)
         br, h = read_header(f)
-        assert br == 16
\ No newline at end of file
+        assert br == 16
+
+def _frame_bytes(frame_count, frame_size, words):
+    return (bytes("PLRV", encoding="ascii")
+            + struct.pack("<I", (frame_count << 20) | frame_size)
+            + struct.pack(f"<{len(words)}I", *words)
+            + bytes("DNEV", encoding="ascii"))
+
+
+def test_index_frames():
+    buffer = (_frame_bytes(1, 6, [1, 2, 3])
+              + struct.pack("<II", 7, 7)
+              + _frame_bytes(2, 9, [1, 2, 3])
+              + _frame_bytes(3, 4, [1, 2, 3])
+              + _frame_bytes(4, 6, [1, 2, 3]))
+    frames = index_frames(buffer)
+
+    assert len(frames) == 4
+    assert frames["start"].tolist() == [0, 32, 56, 80]
+    assert frames["frame_count"].tolist() == [1, 2, 3, 4]
+    assert frames["frame_size"].tolist() == [6, 9, 4, 6]
+    assert frames["length"].tolist() == [24, 24, 24, 24]
+    assert frames["status"].tolist() == [
+        FRAME_OK, FRAME_TOO_LARGE, FRAME_TOO_SMALL, FRAME_OK]
+    assert frames["well_formed"].tolist() == [True, False, False, True]
+
+
+def test_index_frames_incomplete():
+    buffer = _frame_bytes(1, 6, [1, 2, 3]) + _frame_bytes(2, 16, [1, 2])[:-2]
+    frames = index_frames(buffer)
+
+    assert frames["status"].tolist() == [FRAME_OK, FRAME_INCOMPLETE]
+    assert frames["length"].tolist() == [24, 18]
+
+
+def test_index_frames_empty():
+    assert len(index_frames(b"")) == 0
+    assert len(index_frames(struct.pack("<III", 1, 2, 3))) == 0
+
+
+def test_index_frames_deadbeef():
+    buffer = (_frame_bytes(1, 6, [1, 0xDEADBEEF, 0xDEADBEEF, 2, 3])
+              + _frame_bytes(2, 6, [1, 2, 3]))
+
+    frames = index_frames(buffer, clean=True)
+    assert frames["status"].tolist() == [FRAME_OK, FRAME_OK]
+    assert frames["length"].tolist() == [32, 24]
+    assert frames["deadbeef"].tolist() == [2, 0]
+
+    frames = index_frames(buffer)
+    assert frames["status"].tolist() == [FRAME_TOO_SMALL, FRAME_OK]
+    assert frames["deadbeef"].tolist() == [0, 0]
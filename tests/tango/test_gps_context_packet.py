@@ -1,12 +1,15 @@
 import pytest
 import io
 import struct
+from pathlib import Path
 
 import numpy as np
 
 
 import bip
 from bip.plugins.tango.gps_context_packet import _GPSExtensionContextPacket as GPSExtensionContextPacket
+from bip.plugins.tango.gps_context_packet import GPSExtensionContext
+from bip.recorder.dummy.dummywriter import DummyWriter
 
 
 @pytest.fixture
@@ -129,3 +132,50 @@ def test_gps_packet(simple_gps_packet):
     assert packet.latitude_std_dev[0] == 0
     assert packet.longitude_std_dev[0] == 0
     assert packet.altitude_std_dev[0] == 0
+
+
+def test_gps_nav_table(simple_gps_packet):
+    batches = []
+    gps_context = GPSExtensionContext(Path("gps_context"), DummyWriter,
+            recorder_opts={ 'add_batch_callback': batches.append },
+            batch_size=2,
+            nav_output_path=Path("gps_nav"))
+
+    for i in range(3):
+        gps_context.process(simple_gps_packet[1], frame_index=3 + i, packet_index=4 + i)
+    # one batch per table per flush
+    assert len(batches) == 2
+    gps_context.close()
+    assert len(batches) == 4
+
+    context, nav = batches[0], batches[1]
+    assert "latitude" not in context
+    assert context["packet_id"].tolist() == [0, 1]
+    assert context["classid_packet_class_code"].tolist() == [3, 3]
+    assert nav["nav_index"].tolist() == list(range(25))*2
+    assert nav["packet_id"].tolist() == [0]*25 + [1]*25
+    assert nav["frame_index"].tolist() == [3]*25 + [4]*25
+    assert nav["filter_status"].tolist() == ([4667] + [0]*24)*2
+    assert nav["unix_time_seconds"][0] == 1695312275
+    assert nav["velocity_0"][0] == pytest.approx(213.10912)
+    assert nav["altitude_std_dev"].tolist() == [0]*50
+    assert batches[3]["packet_id"].tolist() == [2]*25
+    assert "gps_nav" in gps_context.metadata
+
+
+def test_gps_context_list_columns(simple_gps_packet):
+    batches = []
+    gps_context = GPSExtensionContext(Path("gps_context"), DummyWriter,
+            recorder_opts={ 'add_batch_callback': batches.append })
+
+    for i in range(2):
+        gps_context.process(simple_gps_packet[1], frame_index=i, packet_index=i)
+    assert len(batches) == 0
+    gps_context.close()
+    assert len(batches) == 1
+
+    packet = GPSExtensionContextPacket(simple_gps_packet[1])
+    columns = batches[0]
+    assert columns["packet_id"].tolist() == [0, 1]
+    assert columns["filter_status"].to_pylist() == [packet.filter_status.tolist()]*2
+    assert columns["velocity_0"].to_pylist() == [packet.velocity_0.tolist()]*2
@@ -1,12 +1,15 @@
 import pytest
 import io
 import struct
+from pathlib import Path
 
 import numpy as np
 
 
 import bip
 from bip.plugins.tango.heartbeat_context_packet import _HeartbeatContextPacket as HeartbeatContextPacket
+from bip.plugins.tango.heartbeat_context_packet import HeartbeatContext
+from bip.recorder.dummy.dummywriter import DummyWriter
 
 
 @pytest.fixture
@@ -196,3 +199,33 @@ def test_heartbeat_packet(simple_heartbeat_packet):
     assert packet.rx_stream_id_15 == 0.0
     
     assert packet.system_time == 0.0
+
+
+@pytest.mark.parametrize("lists", [False, True])
+def test_heartbeat_context_batch(simple_heartbeat_packet, lists):
+    payload = bytearray(simple_heartbeat_packet[1])
+    payload[4*7:4*71] = np.arange(64, dtype=np.uint32).tobytes()
+    batches = []
+    heartbeat_context = HeartbeatContext(Path("heartbeat_context"), DummyWriter,
+            recorder_opts={ 'add_batch_callback': batches.append },
+            batch_size=2, lists=lists)
+
+    for i in range(3):
+        heartbeat_context.process(payload, frame_index=i, packet_index=2*i)
+    assert len(batches) == 1
+    heartbeat_context.close()
+    assert len(batches) == 2
+
+    packet = HeartbeatContextPacket(payload)
+    columns = batches[0]
+    assert columns["packet_id"].tolist() == [0, 1]
+    assert columns["frame_index"].tolist() == [0, 1]
+    assert columns["time"].tolist() == [packet.time]*2
+    assert columns["tsi"].tolist() == [0xFFFF]*2
+    assert columns["packet_type"].tolist() == [0x4]*2
+    if lists:
+        assert columns["rx_stream_id"].to_pylist() == [list(range(48, 64))]*2
+        assert "rx_stream_id_0" not in columns
+    else:
+        assert columns["rx_stream_id_15"].tolist() == [63]*2
+        assert columns["tx_buffer_free_1"].tolist() == [packet.tx_buffer_free_1]*2
@@ -5,10 +5,14 @@ import logging
 
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 from bip.plugins.tango.frame import unpack_header
 from bip.plugins.tango.parser import Parser
 from bip.recorder.dummy.dummywriter import DummyWriter
 from bip.recorder.parquet.pqwriter import PQWriter
+from bip.recorder.partitioned_parquet.partitioned_pqwriter import new_partitioned_parquet_writer
 
 
 @pytest.fixture
@@ -155,3 +159,254 @@ def test_bad_packet_size_smaller_than_stated():
 
     assert payload == 'BAD_PACKET'
     assert payload_size == None
+
+
+_CONTEXT_WORDS = [
+    0x4CA10031, 0x576EA41D, 0x00000001, 0x00010002, 0x0000FFFF, 0x00000001,
+    0x00000000,
+    0b00111000101001000000000000001110,
+    0b11010011000000000000000000010000,
+    0b00000000000000000000000110000000,
+    0b00000001110000000000000000000000,
+    0x00000001, 0x00000000, 0x00000001, 0x00000000, 0x80000000, 0x00100000,
+    0x00010001, 0x80000000, 0x00001000, 0x00000001, 0x00000000, 0x15000000,
+    0x00000000, 0x00000000, 0x00000000, 0x00000000, 0x00000000, 0x00000000,
+    0x00000000, 0x00000000, 0x00010001, 0x00000001, 0x00000000, 0x00000000,
+    0x00000000, 0x11000000, 0x00007777, 0xABCDEFAB, 0x01020304, 0x50000000,
+    0x0000a000, 0x00000001, 0x00000000, 0x00000001, 0x00000000, 0x00000000,
+    0x00000000, 0x00000000,
+]
+
+
+def _frame(frame_count, words):
+    return (bytes("PLRV", encoding="ascii")
+            + struct.pack("<I", (frame_count << 20) | (len(words) + 3))
+            + struct.pack(f"<{len(words)}I", *words)
+            + bytes("DNEV", encoding="ascii"))
+
+
+def _signal_data_frame(frame_count, samples):
+    words = [0x1CE10000 | (len(samples) + 9), 0x576EA41D, 0x00000001,
+             0xF0000000, 0x0000FFFF, 0x00000000, 0x10000000]
+    words += [((q & 0xFFFF) << 16) | (i & 0xFFFF) for i, q in samples]
+    words += [0xAAAAAAAA, 0xFFFFFFFF]
+    return _frame(frame_count, words)
+
+
+@pytest.fixture
+def tango_file(tmp_path):
+    path = tmp_path / "input.bin"
+    with open(path, "wb") as f:
+        f.write(_signal_data_frame(0, [(1, -1), (2, -2)]))
+        f.write(_frame(1, _CONTEXT_WORDS))
+        f.write(_signal_data_frame(2, [(3, -3)]))
+        # frame size larger than the actual frame
+        f.write(bytes("PLRV", encoding="ascii"))
+        f.write(struct.pack("<IIII", (3 << 20) | 9, 1, 2, 3))
+        f.write(bytes("DNEV", encoding="ascii"))
+        # garbage between frames
+        f.write(struct.pack("<II", 7, 7))
+        # frame size smaller than the actual frame
+        f.write(bytes("PLRV", encoding="ascii"))
+        f.write(struct.pack("<IIIIII", (4 << 20) | 5, 1, 2, 3, 4, 5))
+        f.write(bytes("DNEV", encoding="ascii"))
+        f.write(_signal_data_frame(5, [(4, -4), (5, -5), (6, -6)]))
+    yield path
+
+
+def _parse_records(path, **kwargs):
+    records = []
+    parser = Parser(path, path.parent, DummyWriter, logging.WARNING,
+            recorder_opts={ 'add_record_callback': records.append },
+            **kwargs)
+    with open(path, "rb") as f:
+        parser.parse_stream(f)
+    return parser, records
+
+
+def _assert_same_records(records, expected_records):
+    assert len(records) == len(expected_records)
+    for record, expected in zip(records, expected_records):
+        assert record.keys() == expected.keys()
+        for key in expected:
+            np.testing.assert_array_equal(record[key], expected[key])
+
+
+def test_parse_stream_mmap(tango_file):
+    parser, records = _parse_records(tango_file)
+    mapped_parser, mapped_records = _parse_records(tango_file, mmap=True)
+
+    assert parser.bytes_read == tango_file.stat().st_size
+    assert mapped_parser.bytes_read == parser.bytes_read
+    assert mapped_parser.packets_read == parser.packets_read
+    assert mapped_parser.bad_packets == parser.bad_packets == 2
+    _assert_same_records(mapped_records, records)
+
+
+def _with_deadbeef(frame_bytes, positions):
+    words = list(struct.unpack(f"<{len(frame_bytes) // 4}I", frame_bytes))
+    for position in sorted(positions, reverse=True):
+        words.insert(position, 0xDEADBEEF)
+    return struct.pack(f"<{len(words)}I", *words)
+
+
+@pytest.fixture
+def dirty_tango_file(tmp_path):
+    path = tmp_path / "dirty.bin"
+    with open(path, "wb") as f:
+        f.write(_with_deadbeef(_signal_data_frame(0, [(1, -1), (2, -2)]), [2, 5, 5, 10]))
+        f.write(_frame(1, _CONTEXT_WORDS))
+        f.write(_with_deadbeef(_signal_data_frame(2, [(3, -3)]), [11]))
+        f.write(_signal_data_frame(3, [(4, -4), (5, -5), (6, -6)]))
+    yield path
+
+
+def test_parse_stream_mmap_clean(dirty_tango_file, tango_file):
+    parser, records = _parse_records(dirty_tango_file, clean=True)
+    mapped_parser, mapped_records = _parse_records(dirty_tango_file, clean=True, mmap=True)
+
+    assert parser.bytes_read == dirty_tango_file.stat().st_size
+    assert mapped_parser.bytes_read == parser.bytes_read
+    assert mapped_parser.packets_read == parser.packets_read == 8
+    assert mapped_parser.bad_packets == parser.bad_packets == 0
+
+    # the stream path records DEADBEEF once per read, the mapped path once per frame
+    dirty = lambda r: r.get("reason") == "DEADBEEF found in payload."
+    assert sum(map(dirty, mapped_records)) == 2
+    _assert_same_records([r for r in mapped_records if not dirty(r)],
+                         [r for r in records if not dirty(r)])
+
+    # a clean file parses the same with and without --clean
+    _, clean_records = _parse_records(tango_file, clean=True, mmap=True)
+    _, expected_records = _parse_records(tango_file, mmap=True)
+    _assert_same_records(clean_records, expected_records)
+
+
+def test_parse_stream_mmap_clean_truncated(dirty_tango_file):
+    # the last frame has DEADBEEF in it and runs past the end of the file
+    with open(dirty_tango_file, "ab") as f:
+        f.write(_with_deadbeef(_signal_data_frame(4, [(7, -7), (8, -8)]), [4, 9])[:-12])
+
+    parser, records = _parse_records(dirty_tango_file, clean=True)
+    mapped_parser, mapped_records = _parse_records(dirty_tango_file, clean=True, mmap=True)
+
+    assert parser.bytes_read == dirty_tango_file.stat().st_size
+    assert mapped_parser.bytes_read == parser.bytes_read
+    assert mapped_parser.bad_packets == parser.bad_packets == 1
+
+    incomplete = lambda r: str(r.get("reason", "")).startswith("incomplete read")
+    assert [r["reason"] for r in records if incomplete(r)] \
+            == [r["reason"] for r in mapped_records if incomplete(r)]
+
+
+def _prefixed_key(key):
+    return f"prefix_{key}"
+
+
+def _parse_to(input_path, output_path, **kwargs):
+    output_path.mkdir()
+    parser = Parser(input_path, output_path, PQWriter, logging.WARNING,
+            context_key_function=_prefixed_key, **kwargs)
+    with open(input_path, "rb") as f:
+        parser.parse_stream(f)
+    parser.close()
+    return parser
+
+
+def test_parse_stream_workers(tango_file, tmp_path):
+    parser = _parse_to(tango_file, tmp_path / "sequential", mmap=True)
+    parallel_parser = _parse_to(tango_file, tmp_path / "parallel", workers=3)
+
+    assert parallel_parser.bytes_read == parser.bytes_read
+    assert parallel_parser.packets_read == parser.packets_read
+    assert parallel_parser.bad_packets == parser.bad_packets == 2
+    assert not (tmp_path / "parallel" / "_parts").exists()
+
+    outputs = sorted(p.name for p in (tmp_path / "sequential").glob("*.parquet"))
+    assert "data.parquet" in outputs
+    assert sorted(p.name for p in (tmp_path / "parallel").glob("*.parquet")) == outputs
+    for name in outputs:
+        expected = pd.read_parquet(tmp_path / "sequential" / name)
+        merged = pd.read_parquet(tmp_path / "parallel" / name)
+        pd.testing.assert_frame_equal(merged, expected)
+
+    # the context key carries over into the chunks after the context packet
+    data = pd.read_parquet(tmp_path / "parallel" / "data.parquet")
+    assert data["data_key"].tolist() == ["ORPHAN_DATA", "prefix_1", "prefix_1"]
+    assert data["packet_id"].tolist() == [0, 1, 2]
+
+
+@pytest.mark.parametrize("layout", ["interleaved", "fixed_size_list", "binary"])
+def test_parse_stream_iq_layout(tango_file, tmp_path, layout):
+    _parse_to(tango_file, tmp_path / "split")
+    parser = _parse_to(tango_file, tmp_path / layout, iq_layout=layout)
+    assert parser.metadata["options"]["signal_data"]["iq_layout"] == layout
+
+    split = pd.read_parquet(tmp_path / "split" / "data.parquet")
+    data = pd.read_parquet(tmp_path / layout / "data.parquet")
+    assert "samples_i" not in data.columns
+    pd.testing.assert_frame_equal(data.drop(columns="samples"),
+            split.drop(columns=["samples_i", "samples_q"]))
+
+    for samples, i, q in zip(data["samples"], split["samples_i"], split["samples_q"]):
+        if layout == "binary":
+            samples = np.frombuffer(samples, dtype=np.int16)
+        else:
+            samples = np.stack(samples).reshape(-1)
+        np.testing.assert_array_equal(samples, np.stack([i, q], axis=1).reshape(-1))
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"mmap": True}, {"workers": 3}])
+def test_parse_stream_dump_bad_packets(tango_file, tmp_path, kwargs):
+    output = tmp_path / "output"
+    parser = _parse_to(tango_file, output, dump_bad_packets=True, **kwargs)
+    assert parser.metadata["options"]["bad_packets_data"]["blob"] == "bad_packets.bin"
+
+    bad_packets = pd.read_parquet(output / "bad_packets.parquet")
+    assert bad_packets["frame_index"].tolist() == [3, 4]
+    assert bad_packets["reason"].tolist() == [
+        "Found DNEV within payload, frame size given is larger than actual frame size.",
+        "Could not find DNEV trailer, frame size given does not match data",
+    ]
+
+    # the dumped bytes are the bytes of the input file at each offset
+    data = tango_file.read_bytes()
+    blob = (output / "bad_packets.bin").read_bytes()
+    assert len(blob) == bad_packets["length"].sum()
+    position = 0
+    for offset, length in zip(bad_packets["offset"].tolist(), bad_packets["length"].tolist()):
+        assert blob[position:position + length] == data[offset:offset + length]
+        position += length
+    assert (output / "unknown_packets.bin").read_bytes() == b""
+
+
+# with two workers the second chunk starts just after the bad context packet
+@pytest.mark.parametrize("kwargs", [{}, {"mmap": True}, {"workers": 2}])
+def test_parse_stream_bad_context_signature(tmp_path, kwargs):
+    bad_cif = list(_CONTEXT_WORDS)
+    bad_cif[8] ^= 1
+    path = tmp_path / "input.bin"
+    with open(path, "wb") as f:
+        f.write(_frame(0, _CONTEXT_WORDS))
+        f.write(_signal_data_frame(1, [(1, -1)]))
+        f.write(_frame(2, bad_cif))
+        f.write(_signal_data_frame(3, [(2, -2)]))
+        f.write(_frame(4, _CONTEXT_WORDS))
+        f.write(_signal_data_frame(5, [(3, -3)]))
+
+    output = tmp_path / "output"
+    parser = _parse_to(path, output, **kwargs)
+
+    assert parser.bad_packets == 1
+    context = pd.read_parquet(output / "context.parquet")
+    assert context["packet_id"].tolist() == [0, 2]
+    assert context["frame_index"].tolist() == [0, 4]
+    # the data after the bad context packet keeps the last good context key
+    data = pd.read_parquet(output / "data.parquet")
+    assert data["data_key"].tolist() == ["prefix_0", "prefix_0", "prefix_4"]
+    bad_packets = pd.read_parquet(output / "bad_packets.parquet")
+    assert bad_packets["frame_index"].tolist() == [2]
+    assert bad_packets["reason"].tolist() == ["unexpected context packet signature"]
+    data = path.read_bytes()
+    offset, length = int(bad_packets["offset"][0]), int(bad_packets["length"][0])
+    assert data[offset:offset + length] == struct.pack(f"<{len(bad_cif)}I", *bad_cif)
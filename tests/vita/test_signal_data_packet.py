@@ -3,7 +3,7 @@ from io import BytesIO
 
 import numpy as np
 
-from bip.vita.signal_data_packet import SignalDataIndicators, SignalDataPacket
+from bip.vita.signal_data_packet import SignalDataIndicators, SignalDataPacket, decode_signal_data
 
 
 @pytest.fixture
@@ -110,3 +110,26 @@ def test_data_no_trailer(signal_data_packet):
     assert packet.data[1][0] == np.uint16(0xCCCC).astype(np.int16)
     assert packet.data[1][1] == np.uint16(0xCCCC).astype(np.int16)
 
+
+
+def test_decode_signal_data(signal_data_packet):
+    raw, bytes_ = signal_data_packet
+    raw[0] = 0x1F5C0009 & ~(1<<26)
+    with BytesIO() as f:
+        for n in raw:
+            f.write(n.to_bytes(4, byteorder='little'))
+        no_trailer = f.getvalue()
+
+    columns = decode_signal_data([bytes_, memoryview(no_trailer)])
+    for row, payload in enumerate([bytes_, no_trailer]):
+        packet = SignalDataPacket(payload)
+        assert columns["packet_size"][row] == packet.packet_header.packet_size
+        assert columns["indicators"][row] == packet.packet_header.indicators
+        assert columns["stream_id"][row] == packet.stream_id
+        assert columns["trailer"][row, 0] == packet.trailer
+        assert columns["sample_count"][row] == packet.sample_count
+        start, end = columns["sample_offsets"][row:row + 2]
+        np.testing.assert_array_equal(columns["samples"][2*start:2*end], packet.data.reshape(-1))
+
+    with pytest.raises(ValueError):
+        decode_signal_data([bytes_[:-8]])